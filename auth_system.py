@@ -1,12 +1,100 @@
 import os
-import json
 import shutil
 import getpass
+import hashlib
+import hmac
 import sqlite3
-import bcrypt
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from database import obter_gerenciador
+
+# Custo do bcrypt enquanto a instalação não for calibrada (o padrão da biblioteca)
+CUSTO_PADRAO = 12
+# Tempo desejado para gerar/verificar um hash na máquina da instalação
+ALVO_CALIBRACAO_MS = 250
+
+# PIN de troca rápida de usuário
+PIN_MIN = 4
+PIN_MAX = 8
+TENTATIVAS_PIN = 5
+BLOQUEIO_PIN_SEGUNDOS = 30
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    """Threads de trabalho do bcrypt, criadas no primeiro uso.
+
+    O bcrypt libera o GIL durante o cálculo, então os hashes rodam em
+    paralelo com a interface (e entre si, até o número de núcleos).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='bcrypt')
+        return _executor
+
+
+def custo_do_hash(senha_hash: str) -> int:
+    """Custo gravado no próprio hash ("$2b$12$..." -> 12)."""
+    return int(senha_hash.split('$')[2])
+
+
+def calibrar_custo(alvo_ms: float = ALVO_CALIBRACAO_MS) -> int:
+    """Maior custo cujo hash leva no máximo `alvo_ms` nesta máquina (mínimo 10).
+
+    Cada unidade de custo dobra o tempo; a medição sobe a partir do custo 10
+    até o próximo passar do alvo.
+    """
+    import bcrypt
+
+    def medir(custo):
+        inicio = time.perf_counter()
+        bcrypt.hashpw(b'calibracao', bcrypt.gensalt(custo))
+        return (time.perf_counter() - inicio) * 1000
+
+    custo = 10
+    tempo = medir(custo)
+    while custo < 31 and tempo * 2 <= alvo_ms:
+        custo += 1
+        tempo = medir(custo)
+    return custo if tempo <= alvo_ms or custo == 10 else custo - 1
+
+
+def caminho_chave_pin(db_path: str) -> str:
+    return db_path + '-chave-pin'
+
+
+def _ler_chave_pin(db_path: str) -> bytes:
+    """Chave do HMAC dos PINs, criada (só para o dono do arquivo) no primeiro uso.
+
+    Fica fora do banco: com só uma cópia do banco não dá para testar os
+    poucos milhares de PINs possíveis.
+    """
+    caminho = caminho_chave_pin(db_path)
+    if not os.path.exists(caminho):
+        # Grava em um arquivo temporário e publica com link: outro terminal
+        # criando a chave ao mesmo tempo nunca lê um arquivo pela metade
+        temporario = f"{caminho}.{os.getpid()}"
+        descritor = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(os.urandom(32))
+        try:
+            os.link(temporario, caminho)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temporario)
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read()
+
 
 class Usuario:
+    __slots__ = ('id', 'nome_usuario', 'senha_hash', 'nome_empresa')
+
     def __init__(self, id: int, nome_usuario: str, senha_hash: str, nome_empresa: str):
         self.id = id
         self.nome_usuario = nome_usuario
@@ -32,116 +120,238 @@ class Usuario:
 
 
 class SistemaAutenticacao:
-    def __init__(self):
-        self.db_path = 'bar_system.db'
-        self.usuarios: Dict[int, Usuario] = {}
-        self.proximo_id_usuario = 1
-        self.carregar_dados()
+    """Cadastro e login de usuários.
+
+    Nenhuma tabela de usuários é mantida em memória: cada consulta vai ao
+    banco pelo índice único de `nome_usuario`, que também impede nomes
+    repetidos.
+
+    O bcrypt roda nas threads de _pool(): os métodos *_async devolvem um
+    Future na hora, sem bloquear quem chamou (terminal, janela Qt ou
+    servidor); as versões sem _async esperam o resultado. Cada thread usa
+    a sua conexão do gerenciador.
+
+    Para a troca de turno há o PIN (definir_pin/autenticar_pin): curto,
+    conferido com HMAC em microssegundos e com bloqueio após erros seguidos.
+    """
+
+    def __init__(self, db_path: str = 'bar_system.db'):
+        self.db_path = db_path
+        self.gerenciador = obter_gerenciador(db_path)
+        self._custo: Optional[int] = None
+        self._chave_pin: Optional[bytes] = None
 
     def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+        return self.gerenciador.conexao()
+
+    def custo_bcrypt(self) -> int:
+        """Custo configurado na instalação (veja calibrar), ou CUSTO_PADRAO."""
+        if self._custo is None:
+            try:
+                row = self._get_connection().execute(
+                    'SELECT valor FROM configuracoes WHERE nome = ?', ('custo_bcrypt',)).fetchone()
+                self._custo = int(row[0]) if row else CUSTO_PADRAO
+            except sqlite3.Error as e:
+                print(f"Erro ao ler o custo do bcrypt: {e}")
+                return CUSTO_PADRAO
+        return self._custo
+
+    def calibrar(self, alvo_ms: float = ALVO_CALIBRACAO_MS) -> Optional[int]:
+        """Mede esta máquina e grava o custo do bcrypt que atinge `alvo_ms`.
+
+        Hashes antigos com outro custo são refeitos no próximo login.
+        """
+        custo = calibrar_custo(alvo_ms)
+        try:
+            with self._get_connection() as conn:
+                conn.execute('INSERT OR REPLACE INTO configuracoes (nome, valor) VALUES (?, ?)',
+                             ('custo_bcrypt', str(custo)))
+            self._custo = custo
+            return custo
+
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar o custo do bcrypt: {e}")
+            return None
     
     def _hash_senha(self, senha: str) -> str:
         """Gera um hash da senha usando bcrypt."""
-        salt = bcrypt.gensalt()
+        import bcrypt  # importado só quando necessário, para não pesar na inicialização
+
+        salt = bcrypt.gensalt(self.custo_bcrypt())
         return bcrypt.hashpw(senha.encode('utf-8'), salt).decode('utf-8')
     
     def _verificar_senha(self, senha: str, senha_hash: str) -> bool:
         """Verifica se a senha corresponde ao hash."""
+        import bcrypt
+
         return bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8'))
-    
-    def carregar_dados(self):
-        """Carrega os dados de usuários a partir do banco de dados."""
+
+    def obter_usuario(self, nome_usuario: str) -> Optional[Usuario]:
+        """Busca um usuário pelo nome (consulta pelo índice único)."""
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
+            cursor = self._get_connection().execute('''
+                SELECT id, nome_usuario, senha_hash, nome_empresa
+                FROM usuarios
+                WHERE nome_usuario = ?
+            ''', (nome_usuario,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return Usuario(id=row[0], nome_usuario=row[1], senha_hash=row[2], nome_empresa=row[3])
 
-                # Carregar usuarios
-                cursor.execute('SELECT id, nome_usuario, senha_hash, nome_empresa FROM usuarios')
-                for row in cursor.fetchall():
-                    usuario = Usuario(id=row[0], nome_usuario=row[1], senha_hash=row[2], nome_empresa=row[3])
-                    self.usuarios[usuario.id] = usuario
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar usuário: {e}")
+            return None
 
-                # Carregar contador
-                cursor.execute('SELECT valor FROM contadores WHERE nome = ?', ('proximo_id_usuario',))
-                result = cursor.fetchone()
-                if result:
-                    self.proximo_id_usuario = result[0]
+    def cadastrar_usuario_async(self, nome_usuario: str, senha: str, nome_empresa: str) -> 'Future[Optional[Usuario]]':
+        return _pool().submit(self._cadastrar, nome_usuario, senha, nome_empresa)
 
-        except sqlite3.Error as e:
-            print(f"Erro ao carregar dados de usuários: {e}")
-            print("Iniciando com dados vazios.")
-    
-    def salvar_dados(self):
-        """Salva o contador de usuários no banco SQLite."""
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO contadores (nome, valor)
-                    VALUES (?, ?)
-                ''', ('proximo_id_usuario', self.proximo_id_usuario))
-                conn.commit()
-        
-        except sqlite3.Error as e:
-            print(f"Erro ao salvar dados: {e}")
-    
     def cadastrar_usuario(self, nome_usuario: str, senha: str, nome_empresa: str) -> Optional[Usuario]:
-        """Cadastra um novo usuário no sistema."""
-        # Verifica se o nome de usuário já existe
-        for usuario in self.usuarios.values():
-            if usuario.nome_usuario == nome_usuario:
-                return None
+        """Cadastra um novo usuário no sistema. Retorna None se o nome já existir."""
+        return self.cadastrar_usuario_async(nome_usuario, senha, nome_empresa).result()
+    
+    def _cadastrar(self, nome_usuario: str, senha: str, nome_empresa: str) -> Optional[Usuario]:
+        # Nome repetido é descartado antes de pagar o custo do bcrypt
+        if self.obter_usuario(nome_usuario) is not None:
+            return None
         
-        # Gera o hash da senha
         senha_hash = self._hash_senha(senha)
         
-        # Cria um novo usuário
-        usuario = Usuario(
-            id=self.proximo_id_usuario,
-            nome_usuario=nome_usuario,
-            senha_hash=senha_hash,
-            nome_empresa=nome_empresa
-        )
-        
         try:
             with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO usuarios (id, nome_usuario, senha_hash, nome_empresa)
-                    VALUES (?, ?, ?, ?)
-                ''', (usuario.id, usuario.nome_usuario, usuario.senha_hash, usuario.nome_empresa))
-                conn.commit()
-                
-                self.usuarios[usuario.id] = usuario
-                self.proximo_id_usuario += 1
-                self.salvar_dados()
-                return usuario
-        
+                # O índice único decide se outro terminal cadastrou o mesmo nome nesse meio tempo
+                cursor = conn.execute('''
+                    INSERT INTO usuarios (nome_usuario, senha_hash, nome_empresa)
+                    VALUES (?, ?, ?)
+                ''', (nome_usuario, senha_hash, nome_empresa))
+                usuario_id = cursor.lastrowid
+                conn.execute('UPDATE contadores SET valor = MAX(valor, ?) WHERE nome = ?',
+                             (usuario_id + 1, 'proximo_id_usuario'))
+            return Usuario(id=usuario_id, nome_usuario=nome_usuario, senha_hash=senha_hash, nome_empresa=nome_empresa)
+
+        except sqlite3.IntegrityError:
+            return None
         except sqlite3.Error as e:
             print(f"Erro ao cadastrar usuário: {e}")
             return None
+
+    def autenticar_async(self, nome_usuario: str, senha: str) -> 'Future[Optional[Usuario]]':
+        return _pool().submit(self._autenticar, nome_usuario, senha)
         
     def autenticar(self, nome_usuario: str, senha: str) -> Optional[Usuario]:
         """Autentica um usuário com base no nome de usuário e senha."""
+        return self.autenticar_async(nome_usuario, senha).result()
+
+    def _autenticar(self, nome_usuario: str, senha: str) -> Optional[Usuario]:
+        usuario = self.obter_usuario(nome_usuario)
+        if usuario is None or not self._verificar_senha(senha, usuario.senha_hash):
+            return None
+
+        # Hash com custo diferente do calibrado: refaz agora que a senha é conhecida
+        if custo_do_hash(usuario.senha_hash) != self.custo_bcrypt():
+            novo_hash = self._hash_senha(senha)
+            try:
+                with self._get_connection() as conn:
+                    conn.execute('UPDATE usuarios SET senha_hash = ? WHERE id = ? AND senha_hash = ?',
+                                 (novo_hash, usuario.id, usuario.senha_hash))
+                usuario.senha_hash = novo_hash
+            except sqlite3.Error as e:
+                # O login vale mesmo assim; a troca é tentada de novo no próximo
+                print(f"Erro ao atualizar o hash da senha: {e}")
         try:
             with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, nome_usuario, senha_hash, nome_empresa
-                    FROM usuarios
-                    WHERE nome_usuario = ?
-                ''', (nome_usuario,))
-                row = cursor.fetchone()
-                
-                if row and self._verificar_senha(senha, row[2]):
-                    return Usuario(id=row[0], nome_usuario=row[1], senha_hash=row[2], nome_empresa=row[3])
+                conn.execute('UPDATE usuarios SET pin_falhas = 0, pin_bloqueado_ate = NULL '
+                             'WHERE id = ? AND pin_falhas > 0', (usuario.id,))
+        except sqlite3.Error as e:
+            print(f"Erro ao liberar o PIN: {e}")
+        return usuario
+
+    def _hash_pin(self, usuario_id: int, pin: str) -> str:
+        if self._chave_pin is None:
+            self._chave_pin = _ler_chave_pin(self.db_path)
+        return hmac.new(self._chave_pin, f"{usuario_id}:{pin}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def definir_pin(self, usuario_id: int, pin: str) -> bool:
+        """Define o PIN de troca rápida do usuário (de PIN_MIN a PIN_MAX dígitos)."""
+        if not (pin.isdigit() and PIN_MIN <= len(pin) <= PIN_MAX):
+            return False
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute('UPDATE usuarios SET pin_hash = ? WHERE id = ?',
+                                      (self._hash_pin(usuario_id, pin), usuario_id))
+            return cursor.rowcount > 0
+
+        except (sqlite3.Error, OSError) as e:
+            print(f"Erro ao definir PIN: {e}")
+            return False
+
+    def bloqueio_pin(self, nome_usuario: str) -> float:
+        """Segundos que ainda faltam para o usuário poder tentar o PIN de novo (0 se liberado)."""
+        try:
+            row = self._get_connection().execute('SELECT pin_bloqueado_ate FROM usuarios WHERE nome_usuario = ?',
+                                                 (nome_usuario,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Erro ao consultar bloqueio do PIN: {e}")
+            return 0.0
+        return max(0.0, (row[0] or 0.0) - time.time()) if row else 0.0
+
+    def autenticar_pin(self, nome_usuario: str, pin: str) -> Optional[Usuario]:
+        """Troca rápida de usuário: confere o PIN com HMAC-SHA256 (microssegundos).
+
+        Depois de TENTATIVAS_PIN erros seguidos o PIN do usuário fica
+        bloqueado por BLOQUEIO_PIN_SEGUNDOS, tempo que dobra a cada nova
+        rodada de erros; o login com senha libera o bloqueio. Os erros e o
+        bloqueio ficam no banco: reiniciar o programa não os zera, e
+        terminais diferentes contam juntos.
+        """
+        usuario = self.obter_usuario(nome_usuario)
+        try:
+            calculado = self._hash_pin(usuario.id if usuario is not None else 0, pin)
+        except OSError as e:
+            print(f"Erro ao ler a chave do PIN: {e}")
+            return None
+        if usuario is None:
+            return None
+
+        conn = self._get_connection()
+        try:
+            if conn.in_transaction:
+                conn.commit()
+            # Consulta e contagem de erros na mesma transação de escrita: tentativas
+            # simultâneas (de outros terminais) não escapam do limite
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT pin_hash, pin_falhas, pin_bloqueado_ate FROM usuarios WHERE id = ?',
+                                   (usuario.id,)).fetchone()
+                if row is None or (row[2] or 0.0) > time.time():
+                    conn.rollback()
+                    return None
+                pin_hash, falhas, _ = row
+                if pin_hash is not None and hmac.compare_digest(calculado, pin_hash):
+                    if falhas:
+                        conn.execute('UPDATE usuarios SET pin_falhas = 0, pin_bloqueado_ate = NULL WHERE id = ?',
+                                     (usuario.id,))
+                    conn.commit()
+                    return usuario
+
+                falhas += 1
+                bloqueado_ate = None
+                if falhas % TENTATIVAS_PIN == 0:
+                    rodada = falhas // TENTATIVAS_PIN
+                    bloqueado_ate = time.time() + BLOQUEIO_PIN_SEGUNDOS * 2 ** (rodada - 1)
+                conn.execute('UPDATE usuarios SET pin_falhas = ?, pin_bloqueado_ate = ? WHERE id = ?',
+                             (falhas, bloqueado_ate, usuario.id))
+                conn.commit()
                 return None
-        
+            except BaseException:
+                conn.rollback()
+                raise
+
         except sqlite3.Error as e:
-            print(f"Erro ao autenticar usuário: {e}")
+            print(f"Erro ao conferir o PIN: {e}")
             return None
 
+
 class AuthInterface:
     def __init__(self):
         self.sistema = SistemaAutenticacao()
@@ -174,6 +384,7 @@ class AuthInterface:
         self.imprimir_titulo("SISTEMA DE AUTENTICAÇÃO")
         print("1. Login")
         print("2. Cadastrar Novo Usuário")
+        print("3. Entrar com PIN")
         print("0. Sair")
         print(self.linha_separadora())
         
@@ -183,6 +394,8 @@ class AuthInterface:
             self.login()
         elif opcao == "2":
             self.cadastrar_usuario()
+        elif opcao == "3":
+            self.login_pin()
         elif opcao == "0":
             self.running = False
         else:
@@ -210,6 +423,29 @@ class AuthInterface:
             print("Nome de usuário ou senha incorretos.")
         input("Pressione Enter para continuar...")
     
+    def login_pin(self):
+        self.limpar_tela()
+        self.imprimir_titulo("ENTRAR COM PIN")
+        print("Digite 'c' ou 'cancelar' para voltar.")
+
+        nome_usuario = input("Nome de usuário: ")
+        if nome_usuario.lower() in ['c', 'cancelar']:
+            return
+
+        espera = self.sistema.bloqueio_pin(nome_usuario)
+        if espera > 0:
+            print(f"PIN bloqueado por erros seguidos. Tente em {espera:.0f} s ou entre com a senha.")
+            input("Pressione Enter para continuar...")
+            return
+
+        usuario = self.sistema.autenticar_pin(nome_usuario, input("PIN: "))
+        if usuario:
+            self.usuario_logado = usuario
+            self.running = False
+            return
+        print("Nome de usuário ou PIN incorretos.")
+        input("Pressione Enter para continuar...")
+
     def cadastrar_usuario(self):
         self.limpar_tela()
         self.imprimir_titulo("CADASTRO DE USUÁRIO")
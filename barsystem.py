@@ -1,27 +1,65 @@
 import os
-import json
+import sys
 import sqlite3
 import datetime
 import shutil
-import pandas as pd
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional, Set, Tuple
+from database import obter_gerenciador
+from escrita import FilaEscrita, recuperar_diarios
+from busca import IndiceBusca, IndiceCategorias
+from estoque import ESTOQUE_MINIMO_PADRAO, AlertasEstoque
+import resumos
+from exportacao import exportar_relatorios
+
+# Datas são gravadas em ISO-8601, que ordena corretamente como texto
+FORMATO_DATA_HORA = "%Y-%m-%d %H:%M:%S"
+
+# Linhas mantidas no registro de alterações lido por SistemaBar.atualizar();
+# um terminal que ficar mais atrasado que isso recarrega tudo
+LIMITE_ALTERACOES = 10000
+
+# Acima disso as telas de lançamento não listam o catálogo inteiro: o operador busca pelo nome
+LIMITE_LISTAGEM = 30
+
+# Valores em dinheiro são guardados em centavos (int), no banco e na memória,
+# para que somas e totais sejam exatos. As propriedades em reais (preco,
+# preco_unitario, subtotal, calcular_total) servem apenas para exibição.
+def reais_para_centavos(valor) -> int:
+    """Converte um valor em reais (float, str ou Decimal) para centavos, arredondando."""
+    centavos = (Decimal(str(valor)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+    return int(centavos)
+
+
+# Os modelos usam __slots__ (sem __dict__ por instância) e internam os textos
+# repetidos (nomes de produto, categorias, status), para que milhares de itens
+# carregados do banco compartilhem a mesma string em vez de uma cópia cada.
 
 class Produto:
-    def __init__(self, id: int, nome: str, preco: float, categoria: str, estoque: int):
+    __slots__ = ('id', 'nome', 'preco_centavos', 'categoria', 'estoque', 'estoque_minimo')
+
+    def __init__(self, id: int, nome: str, preco_centavos: int, categoria: str, estoque: int,
+                 estoque_minimo: int = ESTOQUE_MINIMO_PADRAO):
         self.id = id
-        self.nome = nome
-        self.preco = preco
-        self.categoria = categoria
+        self.nome = sys.intern(nome)
+        self.preco_centavos = preco_centavos
+        self.categoria = sys.intern(categoria)
         self.estoque = estoque
+        self.estoque_minimo = estoque_minimo
+
+    @property
+    def preco(self) -> float:
+        return self.preco_centavos / 100
     
     def to_dict(self):
         return {
             "id": self.id,
             "nome": self.nome,
-            "preco": self.preco,
+            "preco_centavos": self.preco_centavos,
             "categoria": self.categoria,
-            "estoque": self.estoque
+            "estoque": self.estoque,
+            "estoque_minimo": self.estoque_minimo
         }
     
     @classmethod
@@ -29,27 +67,38 @@ class Produto:
         return cls(
             id=data["id"],
             nome=data["nome"],
-            preco=data["preco"],
+            preco_centavos=data["preco_centavos"],
             categoria=data["categoria"],
-            estoque=data["estoque"]
+            estoque=data["estoque"],
+            estoque_minimo=data.get("estoque_minimo", ESTOQUE_MINIMO_PADRAO)
         )
 
 
 class ItemComanda:
-    def __init__(self, produto_id: int, quantidade: int, nome_produto: str, preco_unitario: float):
+    __slots__ = ('produto_id', 'quantidade', 'nome_produto', 'preco_unitario_centavos', 'subtotal_centavos')
+
+    def __init__(self, produto_id: int, quantidade: int, nome_produto: str, preco_unitario_centavos: int):
         self.produto_id = produto_id
         self.quantidade = quantidade
-        self.nome_produto = nome_produto
-        self.preco_unitario = preco_unitario
-        self.subtotal = quantidade * preco_unitario
+        self.nome_produto = sys.intern(nome_produto)
+        self.preco_unitario_centavos = preco_unitario_centavos
+        self.subtotal_centavos = quantidade * preco_unitario_centavos
+
+    @property
+    def preco_unitario(self) -> float:
+        return self.preco_unitario_centavos / 100
+
+    @property
+    def subtotal(self) -> float:
+        return self.subtotal_centavos / 100
         
     def to_dict(self):
         return {
             "produto_id": self.produto_id,
             "quantidade": self.quantidade,
             "nome_produto": self.nome_produto,
-            "preco_unitario": self.preco_unitario,
-            "subtotal": self.subtotal
+            "preco_unitario_centavos": self.preco_unitario_centavos,
+            "subtotal_centavos": self.subtotal_centavos
         }
     
     @classmethod
@@ -58,51 +107,93 @@ class ItemComanda:
             produto_id=data["produto_id"],
             quantidade=data["quantidade"],
             nome_produto=data["nome_produto"],
-            preco_unitario=data["preco_unitario"]
+            preco_unitario_centavos=data["preco_unitario_centavos"]
         )
 
 
-class Comanda:
+class ColecaoItens:
+    """Itens de uma comanda ou venda, indexados por produto_id.
+
+    O dicionário preserva a ordem de inserção e o total é atualizado a cada
+    alteração, então adicionar, remover e totalizar não percorrem os itens.
+    """
+    __slots__ = ('_itens', '_total_centavos')
+
+    def __init__(self):
+        self._itens: Dict[int, ItemComanda] = {}
+        self._total_centavos = 0
+
+    @property
+    def itens(self) -> List[ItemComanda]:
+        return list(self._itens.values())
+
+    def obter_item(self, produto_id: int) -> Optional[ItemComanda]:
+        return self._itens.get(produto_id)
+
+    def adicionar_item(self, item: ItemComanda):
+        item_existente = self._itens.get(item.produto_id)
+        if item_existente is None:
+            # Se o item não existir, adiciona ao índice
+            self._itens[item.produto_id] = item
+            self._total_centavos += item.subtotal_centavos
+            return
+
+        # Atualiza a quantidade do item existente
+        subtotal_anterior = item_existente.subtotal_centavos
+        item_existente.quantidade += item.quantidade
+        item_existente.subtotal_centavos = item_existente.quantidade * item_existente.preco_unitario_centavos
+        self._total_centavos += item_existente.subtotal_centavos - subtotal_anterior
+
+    def remover_item(self, produto_id: int, quantidade: int = 1):
+        item = self._itens.get(produto_id)
+        if item is None:
+            return False
+
+        subtotal_anterior = item.subtotal_centavos
+        if item.quantidade <= quantidade:
+            # Remove o item completamente
+            del self._itens[produto_id]
+            self._total_centavos -= subtotal_anterior
+        else:
+            # Reduz a quantidade
+            item.quantidade -= quantidade
+            item.subtotal_centavos = item.quantidade * item.preco_unitario_centavos
+            self._total_centavos += item.subtotal_centavos - subtotal_anterior
+        return True
+
+    def calcular_total_centavos(self) -> int:
+        return self._total_centavos
+
+    def calcular_total(self) -> float:
+        return self._total_centavos / 100
+
+
+class Comanda(ColecaoItens):
+    __slots__ = ('id', 'mesa', 'status', 'hora_abertura', 'hora_fechamento', 'nome_cliente')
+
     def __init__(self, id: int, mesa: int, status: str = "aberta", hora_abertura: Optional[str] = None):
+        super().__init__()
         self.id = id
         self.mesa = mesa
-        self.status = status
-        self.hora_abertura = hora_abertura or datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        self.status = sys.intern(status)
+        self.hora_abertura = hora_abertura or datetime.now().strftime(FORMATO_DATA_HORA)
         self.hora_fechamento = None
-        self.itens: List[ItemComanda] = []
         self.nome_cliente: Optional[str] = None
     
-    def adicionar_item(self, item: ItemComanda):
-        # Verifica se o item já existe na comanda
-        for i, item_existente in enumerate(self.itens):
-            if item_existente.produto_id == item.produto_id:
-                # Atualiza a quantidade do item existente
-                self.itens[i].quantidade += item.quantidade
-                self.itens[i].subtotal = self.itens[i].quantidade * self.itens[i].preco_unitario
-                return
-        
-        # Se o item não existir, adiciona à lista
-        self.itens.append(item)
-    
-    def remover_item(self, produto_id: int, quantidade: int = 1):
-        for i, item in enumerate(self.itens):
-            if item.produto_id == produto_id:
-                if item.quantidade <= quantidade:
-                    # Remove o item completamente
-                    self.itens.pop(i)
-                else:
-                    # Reduz a quantidade
-                    self.itens[i].quantidade -= quantidade
-                    self.itens[i].subtotal = self.itens[i].quantidade * self.itens[i].preco_unitario
-                return True
-        return False
-    
-    def calcular_total(self):
-        return sum(item.subtotal for item in self.itens)
-    
+    def copiar_de(self, outra: 'Comanda'):
+        """Substitui o conteúdo desta comanda pelo de `outra` (recarregada do banco),
+        mantendo o objeto: quem já tem uma referência a ela vê os dados novos."""
+        self.mesa = outra.mesa
+        self.status = outra.status
+        self.hora_abertura = outra.hora_abertura
+        self.hora_fechamento = outra.hora_fechamento
+        self.nome_cliente = outra.nome_cliente
+        self._itens = outra._itens
+        self._total_centavos = outra._total_centavos
+
     def fechar_comanda(self):
         self.status = "fechada"
-        self.hora_fechamento = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        self.hora_fechamento = datetime.now().strftime(FORMATO_DATA_HORA)
     
     def to_dict(self):
         return {
@@ -127,91 +218,158 @@ class Comanda:
         comanda.nome_cliente = data.get("nome_cliente")
         for item_data in data.get("itens", []):
             item = ItemComanda.from_dict(item_data)
-            comanda.itens.append(item)
+            comanda.adicionar_item(item)
         return comanda
 
 
-class VendaRapida:
+class VendaRapida(ColecaoItens):
+    __slots__ = ('hora_venda',)
+
     def __init__(self):
-        self.itens: List[ItemComanda] = []
-        self.hora_venda = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    
-    def adicionar_item(self, item: ItemComanda):
-        # Verifica se o item já existe na venda
-        for i, item_existente in enumerate(self.itens):
-            if item_existente.produto_id == item.produto_id:
-                # Atualiza a quantidade do item existente
-                self.itens[i].quantidade += item.quantidade
-                self.itens[i].subtotal = self.itens[i].quantidade * self.itens[i].preco_unitario
-                return
-        
-        # Se o item não existir, adiciona à lista
-        self.itens.append(item)
-    
-    def remover_item(self, produto_id: int, quantidade: int = 1):
-        for i, item in enumerate(self.itens):
-            if item.produto_id == produto_id:
-                if item.quantidade <= quantidade:
-                    # Remove o item completamente
-                    self.itens.pop(i)
-                else:
-                    # Reduz a quantidade
-                    self.itens[i].quantidade -= quantidade
-                    self.itens[i].subtotal = self.itens[i].quantidade * self.itens[i].preco_unitario
-                return True
-        return False
-    
-    def calcular_total(self):
-        return sum(item.subtotal for item in self.itens)
+        super().__init__()
+        self.hora_venda = datetime.now().strftime(FORMATO_DATA_HORA)
 
 
 class SistemaBar:
-    def __init__(self):
-        self.db_path = 'bar_system.db'
+    def __init__(self, db_path: str = 'bar_system.db', carregar_historico: bool = False,
+                 escrita_adiada: bool = False):
+        """`escrita_adiada` liga a gravação em grupo dos itens lançados (veja escrita.py)."""
+        self.db_path = db_path
+        self.gerenciador = obter_gerenciador(db_path)
+        self.fila: Optional[FilaEscrita] = None
         self.produtos: Dict[int, Produto] = {}
-        self.comandas: Dict[int, Comanda] = {}
+        self.indice = IndiceBusca()  # busca por nome/categoria sobre self.produtos
+        self.categorias = IndiceCategorias()  # categoria -> produtos, com contagem e estoque total
+        self.alertas_estoque = AlertasEstoque()  # produtos ordenados pela folga até o estoque mínimo
+        self.comandas: Dict[int, Comanda] = {}  # comandas abertas (e o histórico, se carregar_historico)
         self.mesas: Dict[int, Optional[int]] = {}  # mesa_id -> comanda_id (None se mesa livre)
+        self.mesas_livres: Set[int] = set()
+        self.mesas_ocupadas: Set[int] = set()
         self.proximo_id_produto = 1
         self.proximo_id_comanda = 1
+        self.carregar_historico = carregar_historico
+        self._versao_dados = None  # PRAGMA data_version na última leitura
+        self._ultima_alteracao = 0  # último id lido da tabela alteracoes
+        self._iniciar_escrita(escrita_adiada)
         self.carregar_dados()
-        
-        # Inicializa o sistema com algumas mesas
-        for i in range(1, 11):
-            self.mesas[i] = None
 
     def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+        return self.gerenciador.conexao()
+
+    def _marcar_alteracoes_proprias(self, conn):
+        """Anota os ids de `alteracoes` criados por esta conexão.
+
+        A thread gravadora da fila usa outra conexão, então as gravações dela
+        mudam o PRAGMA data_version desta. Com os ids anotados aqui e os que a
+        fila gravou, atualizar() separa o que é deste terminal do que veio de
+        outros. Tabela e gatilho temporários só existem nesta conexão;
+        a criação é idempotente.
+        """
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS alteracoes_proprias (id INTEGER PRIMARY KEY)')
+        conn.execute('''
+            CREATE TEMP TRIGGER IF NOT EXISTS trg_alteracoes_proprias AFTER INSERT ON main.alteracoes
+            BEGIN
+                INSERT INTO alteracoes_proprias (id) VALUES (NEW.id);
+            END
+        ''')
+
+    def _iniciar_escrita(self, escrita_adiada: bool):
+        """Reaplica alterações não gravadas de uma execução anterior e, se pedido, liga a fila."""
+        try:
+            conn = self._get_connection()
+            if escrita_adiada:
+                self.fila = FilaEscrita(self.db_path)
+                self._marcar_alteracoes_proprias(conn)
+                # As reservas de estoque continuam imediatas; sem fsync a cada
+                # commit elas têm a mesma garantia do diário da fila (resistem
+                # à queda do processo). fechar_comanda volta a FULL.
+                conn.execute('PRAGMA synchronous = NORMAL')
+            else:
+                recuperar_diarios(conn, self.db_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Erro ao recuperar escritas pendentes: {e}")
+
+    def sincronizar(self) -> bool:
+        """Garante que as alterações enfileiradas estejam gravadas no banco."""
+        if self.fila is None:
+            return True
+        return self.fila.sincronizar()
+
+    def _carregar_comandas(self, cursor, filtro: str = None, parametros=(), ordem: str = 'id') -> Dict[int, Comanda]:
+        """Monta as comandas (com seus itens) que satisfazem `filtro` em uma única ida ao banco por tabela."""
+        where = f'WHERE {filtro}' if filtro else ''
+        cursor.execute(f'''
+            SELECT id, mesa, status, hora_abertura, hora_fechamento, nome_cliente
+            FROM comandas
+            {where}
+            ORDER BY {ordem}
+        ''', parametros)
+
+        comandas = {}
+        for row in cursor.fetchall():
+            comanda = Comanda(id=row[0], mesa=row[1], status=row[2], hora_abertura=row[3])
+            comanda.hora_fechamento = row[4]
+            comanda.nome_cliente = row[5]
+            comandas[comanda.id] = comanda
+
+        if comandas:
+            filtro_itens = f'WHERE comanda_id IN (SELECT id FROM comandas {where})' if filtro else ''
+            cursor.execute(f'''
+                SELECT comanda_id, produto_id, quantidade, nome_produto, preco_unitario_centavos
+                FROM itens_comanda
+                {filtro_itens}
+                ORDER BY id
+            ''', parametros)
+            for row in cursor.fetchall():
+                if row[0] in comandas:
+                    item = ItemComanda(produto_id=row[1], quantidade=row[2], nome_produto=row[3], preco_unitario_centavos=row[4])
+                    comandas[row[0]].adicionar_item(item)
+
+        return comandas
     
     def carregar_dados(self):
+        """Carrega o catálogo, as mesas e as comandas abertas.
+
+        Comandas fechadas ficam no banco e são buscadas sob demanda
+        (obter_comanda, buscar_comandas_periodo), exceto se o sistema foi
+        criado com carregar_historico=True.
+        """
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
 
+                # Ponto de partida para atualizar() acompanhar outros terminais
+                self._versao_dados = cursor.execute('PRAGMA data_version').fetchone()[0]
+                self._ultima_alteracao = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM alteracoes').fetchone()[0]
+
                 # Carregar produtos
-                cursor.execute('SELECT id, nome, preco, categoria, estoque FROM produtos')
+                cursor.execute('SELECT id, nome, preco_centavos, categoria, estoque, estoque_minimo FROM produtos')
                 for row in cursor.fetchall():
-                    produto = Produto(id=row[0], nome=row[1], preco=row[2], categoria=row[3], estoque=row[4])
+                    produto = Produto(id=row[0], nome=row[1], preco_centavos=row[2], categoria=row[3], estoque=row[4],
+                                      estoque_minimo=row[5])
                     self.produtos[produto.id] = produto
+                self.reindexar_produtos()
                 
-                # Carregar comandas
-                cursor.execute('SELECT id, mesa, status, hora_abertura, hora_fechamento, nome_cliente FROM comandas')
-                for row in cursor.fetchall():
-                    comanda = Comanda(id=row[0], mesa=row[1], status=row[2], hora_abertura=row[3])
-                    comanda.hora_fechamento = row[4]
-                    comanda.nome_cliente = row[5]
-                    self.comandas[comanda.id] = comanda
-                
-                # Carregar itens das comandas
-                cursor.execute('SELECT comanda_id, produto_id, quantidade, nome_produto, preco_unitario, subtotal FROM itens_comanda')
-                for row in cursor.fetchall():
-                    item = ItemComanda(produto_id=row[1], quantidade=row[2], nome_produto=row[3], preco_unitario=row[4])
-                    if row[0] in self.comandas:
-                        self.comandas[row[0]].itens.append(item)
+                # Carregar comandas (e seus itens)
+                if self.carregar_historico:
+                    self.comandas.update(self._carregar_comandas(cursor))
+                else:
+                    self.comandas.update(self._carregar_comandas(cursor, 'status = ?', ("aberta",)))
                 
-                # Carregar mesas
+                # Carregar mesas; a ocupação vem das comandas abertas
                 cursor.execute('SELECT id, comanda_id FROM mesas')
-                for row in cursor.fetchall():
-                    self.mesas[row[0]] = row[1]
+                gravadas = dict(cursor.fetchall())
+                cursor.execute("SELECT mesa, id FROM comandas WHERE status = 'aberta'")
+                ocupacao = {mesa: comanda_id for mesa, comanda_id in cursor.fetchall() if mesa in gravadas}
+                for mesa in gravadas:
+                    self._definir_mesa(mesa, ocupacao.get(mesa))
+                # Corrige a tabela de mesas se ela divergir das comandas abertas
+                # (condicional: não sobrescreve o que outro terminal gravou nesse meio tempo)
+                divergentes = [(ocupacao.get(mesa), mesa, comanda_id) for mesa, comanda_id in gravadas.items()
+                               if comanda_id != ocupacao.get(mesa)]
+                if divergentes:
+                    cursor.executemany('UPDATE mesas SET comanda_id = ? WHERE id = ? AND comanda_id IS ?', divergentes)
+                    conn.commit()
                 
                 # Carregar contadores
                 cursor.execute('SELECT nome, valor FROM contadores')
@@ -220,18 +378,143 @@ class SistemaBar:
                         self.proximo_id_produto = row[1]
                     elif row[0] == 'proximo_id_comanda':
                         self.proximo_id_comanda = row[1]
-                
-                # Inicializar mesas se não existirem
-                if not self.mesas:
-                    for i in range(1, 11):
-                        self.mesas[i] = None
-                        cursor.execute('INSERT OR IGNORE INTO mesas (id, comanda_id) VALUES (?, ?)', (i, None))
-                    conn.commit()
+
+            # Inicializar mesas se não existirem
+            if not self.mesas:
+                self.adicionar_mesas(1, 10)
         
         except sqlite3.Error as e:
             print(f"Erro ao carregar dados: {e}")
             print("Iniciando com dados vazios.")
 
+    def atualizar(self) -> bool:
+        """Traz para a memória o que outros processos alteraram no banco.
+
+        PRAGMA data_version só muda quando outra conexão grava, então a
+        verificação sem alterações não lê nenhuma tabela. Havendo mudanças,
+        apenas as linhas registradas em `alteracoes` desde a última leitura
+        são recarregadas. As gravações da própria fila de escrita (feitas
+        por outra conexão) não contam como mudança. Retorna True se algo mudou.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                versao = cursor.execute('PRAGMA data_version').fetchone()[0]
+                if versao == self._versao_dados:
+                    return False
+
+                ultima = cursor.execute('SELECT MAX(id) FROM alteracoes').fetchone()[0]
+                if ultima is None or ultima <= self._ultima_alteracao:
+                    self._versao_dados = versao
+                    return False
+                if self.fila is not None:
+                    # O que não foi gravado por esta conexão nem pela fila veio de outro terminal
+                    self._marcar_alteracoes_proprias(conn)
+                    cursor.execute('SELECT id FROM alteracoes WHERE id > ? AND id <= ? '
+                                   'AND id NOT IN (SELECT id FROM temp.alteracoes_proprias)',
+                                   (self._ultima_alteracao, ultima))
+                    if self.fila.somente_proprias(self._ultima_alteracao, [row[0] for row in cursor.fetchall()]):
+                        cursor.execute('DELETE FROM temp.alteracoes_proprias WHERE id <= ?', (ultima,))
+                        self._versao_dados = versao
+                        self._ultima_alteracao = ultima
+                        return False
+
+                # Itens ainda na fila seriam sobrescritos pelo estado do banco
+                if not self.sincronizar():
+                    return False
+                self._versao_dados = cursor.execute('PRAGMA data_version').fetchone()[0]
+
+                primeira, ultima = cursor.execute('SELECT MIN(id), MAX(id) FROM alteracoes').fetchone()
+                if primeira > self._ultima_alteracao + 1:
+                    # O registro já foi podado além do que este terminal leu
+                    self.recarregar()
+                    return True
+
+                cursor.execute('SELECT DISTINCT tabela, chave FROM alteracoes WHERE id > ? AND id <= ?',
+                               (self._ultima_alteracao, ultima))
+                alteradas: Dict[str, List[int]] = {}
+                for tabela, chave in cursor.fetchall():
+                    alteradas.setdefault(tabela, []).append(chave)
+                filtro = 'id IN (SELECT chave FROM alteracoes WHERE tabela = ? AND id > ? AND id <= ?)'
+
+                if 'produtos' in alteradas:
+                    cursor.execute(f'SELECT id, nome, preco_centavos, categoria, estoque, estoque_minimo FROM produtos WHERE {filtro}',
+                                   ('produtos', self._ultima_alteracao, ultima))
+                    recarregados = set()
+                    for row in cursor.fetchall():
+                        produto = Produto(id=row[0], nome=row[1], preco_centavos=row[2], categoria=row[3], estoque=row[4],
+                                          estoque_minimo=row[5])
+                        self.produtos[produto.id] = produto
+                        self._indexar(produto)
+                        recarregados.add(produto.id)
+                    # Os que não voltaram na consulta foram removidos por outro terminal
+                    for produto_id in set(alteradas['produtos']) - recarregados:
+                        self.produtos.pop(produto_id, None)
+                        self._desindexar(produto_id)
+
+                if 'comandas' in alteradas:
+                    recarregadas = self._carregar_comandas(cursor, filtro, ('comandas', self._ultima_alteracao, ultima))
+                    for comanda_id in alteradas['comandas']:
+                        comanda = recarregadas.get(comanda_id)
+                        if comanda is not None and (self.carregar_historico or comanda.status == "aberta"):
+                            if comanda_id in self.comandas:
+                                self.comandas[comanda_id].copiar_de(comanda)
+                            else:
+                                self.comandas[comanda_id] = comanda
+                        else:
+                            self.comandas.pop(comanda_id, None)
+
+                if 'mesas' in alteradas:
+                    cursor.execute(f'SELECT id, comanda_id FROM mesas WHERE {filtro}',
+                                   ('mesas', self._ultima_alteracao, ultima))
+                    recarregadas = dict(cursor.fetchall())
+                    for mesa in alteradas['mesas']:
+                        if mesa in recarregadas:
+                            self._definir_mesa(mesa, recarregadas[mesa])
+                        else:
+                            self._descartar_mesa(mesa)
+
+                cursor.execute('SELECT nome, valor FROM contadores')
+                for nome, valor in cursor.fetchall():
+                    if nome == 'proximo_id_produto':
+                        self.proximo_id_produto = max(self.proximo_id_produto, valor)
+                    elif nome == 'proximo_id_comanda':
+                        self.proximo_id_comanda = max(self.proximo_id_comanda, valor)
+
+                self._ultima_alteracao = ultima
+                if self.fila is not None:
+                    cursor.execute('DELETE FROM temp.alteracoes_proprias WHERE id <= ?', (ultima,))
+                if ultima - primeira > 2 * LIMITE_ALTERACOES:
+                    cursor.execute('DELETE FROM alteracoes WHERE id <= ?', (ultima - LIMITE_ALTERACOES,))
+                return True
+
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar dados: {e}")
+            return False
+
+    def recarregar(self):
+        """Descarta o estado em memória e recarrega tudo do banco."""
+        self.produtos.clear()
+        self.comandas.clear()
+        self.mesas.clear()
+        self.mesas_livres.clear()
+        self.mesas_ocupadas.clear()
+        self.carregar_dados()
+
+    def obter_comanda(self, comanda_id: int) -> Optional[Comanda]:
+        """Retorna uma comanda da memória ou, se já estiver fechada, do banco."""
+        comanda = self.comandas.get(comanda_id)
+        if comanda is not None:
+            return comanda
+
+        try:
+            with self._get_connection() as conn:
+                return self._carregar_comandas(conn.cursor(), 'id = ?', (comanda_id,)).get(comanda_id)
+
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar comanda: {e}")
+            return None
+
     def salvar_dados(self):
         try:
             with self._get_connection() as conn:
@@ -252,7 +535,9 @@ class SistemaBar:
         except sqlite3.Error as e:
             print(f"Erro ao salvar dados: {e}")
     
-    def adicionar_produto(self, nome: str, preco: float, categoria: str, estoque: int) -> Produto:
+    def adicionar_produto(self, nome: str, preco: float, categoria: str, estoque: int,
+                          estoque_minimo: int = ESTOQUE_MINIMO_PADRAO) -> Produto:
+        """Cadastra um produto. `preco` é informado em reais e guardado em centavos."""
         id_disponivel = self.proximo_id_produto
         while id_disponivel in self.produtos:
             id_disponivel += 1
@@ -260,21 +545,24 @@ class SistemaBar:
         produto = Produto(
             id=id_disponivel,
             nome=nome,
-            preco=preco,
+            preco_centavos=reais_para_centavos(preco),
             categoria=categoria,
-            estoque=estoque
+            estoque=estoque,
+            estoque_minimo=estoque_minimo
         )
         
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO produtos (id, nome, preco, categoria, estoque)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (produto.id, produto.nome, produto.preco, produto.categoria, produto.estoque))
+                    INSERT INTO produtos (id, nome, preco_centavos, categoria, estoque, estoque_minimo)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (produto.id, produto.nome, produto.preco_centavos, produto.categoria, produto.estoque,
+                      produto.estoque_minimo))
                 conn.commit()
                 
                 self.produtos[produto.id] = produto
+                self._indexar(produto)
                 self.proximo_id_produto = max(self.proximo_id_produto, id_disponivel + 1)
                 self.salvar_dados()
                 return produto
@@ -284,29 +572,37 @@ class SistemaBar:
             return None
     
     def editar_produto(self, id: int, nome: str = None, preco: float = None, 
-                     categoria: str = None, estoque: int = None) -> bool:
-        """Edita um produto existente."""
+                     categoria: str = None, estoque: int = None, estoque_minimo: int = None) -> bool:
+        """Edita um produto existente (`preco` em reais)."""
         if id not in self.produtos:
             return False
+        # Baixas de estoque ainda na fila não podem ser aplicadas depois de um valor absoluto
+        if estoque is not None and not self.sincronizar():
+            return False
         
         produto = self.produtos[id]
         updates = {}
         
         if nome is not None:
-            produto.nome = nome
+            produto.nome = sys.intern(nome)
             updates['nome'] = nome
         
         if preco is not None:
-            produto.preco = preco
-            updates['preco'] = preco
+            produto.preco_centavos = reais_para_centavos(preco)
+            updates['preco_centavos'] = produto.preco_centavos
         
         if categoria is not None:
-            produto.categoria = categoria
+            produto.categoria = sys.intern(categoria)
             updates['categoria'] = categoria
         
         if estoque is not None:
-            produto.estoque = estoque
             updates['estoque'] = estoque
+
+        if estoque_minimo is not None:
+            updates['estoque_minimo'] = estoque_minimo
+
+        if not updates:
+            return True
         
         try:
             with self._get_connection() as conn:
@@ -314,12 +610,20 @@ class SistemaBar:
                 query = 'UPDATE produtos SET ' + ', '.join(f'{k} = ?' for k in updates) + ' WHERE id = ?'
                 cursor.execute(query, list(updates.values()) + [id])
                 conn.commit()
+                if nome is not None or categoria is not None:
+                    self._indexar(produto)
+                if estoque is not None or estoque_minimo is not None:
+                    self._definir_estoque(produto, produto.estoque if estoque is None else estoque, estoque_minimo)
                 return True
         
         except sqlite3.Error as e:
             print(f"Erro ao editar produto: {e}")
             return False
     
+    def atualizar_estoque(self, produto_id: int, estoque: int = None, estoque_minimo: int = None) -> bool:
+        """Define o estoque e/ou o estoque mínimo de um produto."""
+        return self.editar_produto(produto_id, estoque=estoque, estoque_minimo=estoque_minimo)
+
     def remover_produto(self, id: int) -> bool:
         """Remove um produto do sistema."""
         if id not in self.produtos:
@@ -331,6 +635,7 @@ class SistemaBar:
                 cursor.execute('DELETE FROM produtos WHERE id = ?', (id,))
                 conn.commit()
                 del self.produtos[id]
+                self._desindexar(id)
                 return True
         
         except sqlite3.Error as e:
@@ -342,22 +647,35 @@ class SistemaBar:
         if mesa not in self.mesas or self.mesas[mesa] is not None:
             return None
         
-        comanda = Comanda(id=self.proximo_id_comanda, mesa=mesa)
+        comanda = Comanda(id=None, mesa=mesa)
         comanda.nome_cliente = nome_cliente
 
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
+                # O id é atribuído pelo SQLite dentro da transação de escrita,
+                # então dois terminais nunca abrem comandas com o mesmo id
                 cursor.execute('''
-                    INSERT INTO comandas (id, mesa, status, hora_abertura, nome_cliente)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (comanda.id, comanda.mesa, comanda.status, comanda.hora_abertura, comanda.nome_cliente))
-                cursor.execute('UPDATE mesas SET comanda_id = ? WHERE id = ?', (comanda.id, mesa))
+                    INSERT INTO comandas (mesa, status, hora_abertura, nome_cliente)
+                    VALUES (?, ?, ?, ?)
+                ''', (comanda.mesa, comanda.status, comanda.hora_abertura, comanda.nome_cliente))
+                comanda.id = cursor.lastrowid
+                # Ocupa a mesa só se ainda estiver livre no banco: outro terminal pode ter chegado antes
+                cursor.execute('UPDATE mesas SET comanda_id = ? WHERE id = ? AND comanda_id IS NULL', (comanda.id, mesa))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    cursor.execute('SELECT comanda_id FROM mesas WHERE id = ?', (mesa,))
+                    ocupante = cursor.fetchone()
+                    if ocupante is None:
+                        self._descartar_mesa(mesa)
+                    else:
+                        self._definir_mesa(mesa, ocupante[0])
+                    return None
                 conn.commit()
                 
                 self.comandas[comanda.id] = comanda
-                self.mesas[mesa] = comanda.id
-                self.proximo_id_comanda += 1
+                self._definir_mesa(mesa, comanda.id)
+                self.proximo_id_comanda = max(self.proximo_id_comanda, comanda.id + 1)
                 self.salvar_dados()
                 return comanda
         
@@ -365,112 +683,306 @@ class SistemaBar:
             print(f"Erro ao abrir comanda: {e}")
             return None
     
+    def _indexar(self, produto: Produto):
+        """Inclui (ou reposiciona) o produto nos índices de busca e de categorias."""
+        self.indice.adicionar(produto)
+        self.categorias.adicionar(produto)
+        self.alertas_estoque.atualizar(produto)
+
+    def _desindexar(self, produto_id: int):
+        self.indice.remover(produto_id)
+        self.categorias.remover(produto_id)
+        self.alertas_estoque.remover(produto_id)
+
+    def reindexar_produtos(self):
+        """Reconstrói os índices a partir de self.produtos (após carga ou importação em massa)."""
+        self.indice.reconstruir(self.produtos.values())
+        self.categorias.reconstruir(self.produtos.values())
+        self.alertas_estoque.reconstruir(self.produtos.values())
+
+    def _definir_estoque(self, produto: Produto, estoque: int, estoque_minimo: int = None):
+        """Único ponto que altera o estoque em memória, mantendo os totais por
+        categoria e os alertas de estoque mínimo."""
+        produto.estoque = estoque
+        if estoque_minimo is not None:
+            produto.estoque_minimo = estoque_minimo
+        self.categorias.atualizar_estoque(produto)
+        self.alertas_estoque.atualizar(produto)
+
+    def _baixar_estoque(self, cursor, itens) -> bool:
+        """Baixa o estoque de cada (produto_id, quantidade) somente se houver saldo.
+
+        Deve ser chamada dentro de uma transação. Cada UPDATE condicional é
+        atômico no SQLite: se dois terminais disputam as últimas unidades, o
+        segundo não encontra saldo (rowcount 0) em vez de deixar o estoque
+        negativo. Retorna False na primeira falta; quem chamou desfaz a transação.
+        """
+        for produto_id, quantidade in itens:
+            cursor.execute('UPDATE produtos SET estoque = estoque - ? WHERE id = ? AND estoque >= ?',
+                           (quantidade, produto_id, quantidade))
+            if cursor.rowcount == 0:
+                return False
+        return True
+
+    def _sincronizar_estoque(self, cursor, produto_ids):
+        """Copia para a memória o estoque atual dos produtos, conforme o banco."""
+        produto_ids = list(set(produto_ids))
+        if not produto_ids:
+            return
+        marcadores = ', '.join('?' * len(produto_ids))
+        cursor.execute(f'SELECT id, estoque FROM produtos WHERE id IN ({marcadores})', produto_ids)
+        for produto_id, estoque in cursor.fetchall():
+            if produto_id in self.produtos:
+                self._definir_estoque(self.produtos[produto_id], estoque)
+
     def adicionar_item_comanda(self, comanda_id: int, produto_id: int, quantidade: int) -> bool:
-        if comanda_id not in self.comandas or produto_id not in self.produtos:
-            return False
-        
-        comanda = self.comandas[comanda_id]
-        produto = self.produtos[produto_id]
-        
-        if comanda.status != "aberta" or produto.estoque < quantidade:
+        return self.adicionar_itens_comanda(comanda_id, [(produto_id, quantidade)])
+
+    def adicionar_itens_comanda(self, comanda_id: int, itens: List[Tuple[int, int]]) -> bool:
+        """Lança vários (produto_id, quantidade) em uma comanda: todos ou nenhum.
+
+        As linhas são validadas antes, e a reserva de estoque e a gravação dos
+        itens acontecem em uma única transação. Linhas do mesmo produto são somadas.
+        """
+        comanda = self.comandas.get(comanda_id)
+        # O saldo e a situação da comanda são conferidos no banco, não na cópia em memória
+        if comanda is None or comanda.status != "aberta" or not itens:
             return False
-        
-        item = ItemComanda(
-            produto_id=produto_id,
-            quantidade=quantidade,
-            nome_produto=produto.nome,
-            preco_unitario=produto.preco
-        )
-        
+
+        quantidades: Dict[int, int] = {}
+        for produto_id, quantidade in itens:
+            if produto_id not in self.produtos or quantidade <= 0:
+                return False
+            quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+
+        novos = [
+            ItemComanda(
+                produto_id=produto_id,
+                quantidade=quantidade,
+                nome_produto=self.produtos[produto_id].nome,
+                preco_unitario_centavos=self.produtos[produto_id].preco_centavos
+            )
+            for produto_id, quantidade in quantidades.items()
+        ]
+        insercao = '''INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario_centavos, subtotal_centavos)
+                      VALUES (?, ?, ?, ?, ?, ?)'''
+        linhas = [(comanda_id, item.produto_id, item.quantidade, item.nome_produto, item.preco_unitario_centavos, item.subtotal_centavos)
+                  for item in novos]
+
+        enfileirados = False
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario, subtotal)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (comanda_id, item.produto_id, item.quantidade, item.nome_produto, item.preco_unitario, item.subtotal))
-                cursor.execute('UPDATE produtos SET estoque = estoque - ? WHERE id = ?', (quantidade, produto_id))
-                conn.commit()
-                
-                produto.estoque -= quantidade
-                comanda.adicionar_item(item)
-                return True
-        
+                if not self._baixar_estoque(cursor, quantidades.items()):
+                    conn.rollback()
+                    self._sincronizar_estoque(cursor, quantidades)
+                    return False
+                # Conferido depois da primeira escrita: com a transação de escrita aberta,
+                # nenhum outro terminal consegue fechar a comanda até o commit
+                cursor.execute('SELECT status FROM comandas WHERE id = ?', (comanda_id,))
+                row = cursor.fetchone()
+                if row is None or row[0] != "aberta":
+                    conn.rollback()
+                    self._sincronizar_estoque(cursor, quantidades)
+                    self._descartar_comanda(cursor, comanda)
+                    return False
+                if self.fila is None:
+                    cursor.executemany(insercao, linhas)
+                else:
+                    # No modo de escrita adiada só a reserva de estoque é imediata e
+                    # as linhas dos itens seguem pela fila. Elas vão para o diário
+                    # antes do commit da reserva: uma queda entre os dois grava o
+                    # item sem baixar o estoque, em vez de perder um item já reservado
+                    try:
+                        self.fila.enfileirar([(insercao, linha) for linha in linhas])
+                        enfileirados = True
+                    except (OSError, RuntimeError) as e:
+                        conn.rollback()
+                        self._sincronizar_estoque(cursor, quantidades)
+                        print(f"Erro ao enfileirar itens da comanda: {e}")
+                        return False
+                self._sincronizar_estoque(cursor, quantidades)
+
         except sqlite3.Error as e:
-            print(f"Erro ao adicionar item à comanda: {e}")
-            return False
+            if not enfileirados:
+                print(f"Erro ao adicionar itens à comanda: {e}")
+                return False
+            # A reserva foi desfeita depois de os itens entrarem na fila: eles
+            # serão gravados, só a baixa de estoque se perdeu
+            print(f"Erro ao baixar o estoque dos itens lançados: {e}")
+
+        for item in novos:
+            comanda.adicionar_item(item)
+        return True
     
     def remover_item_comanda(self, comanda_id: int, produto_id: int, quantidade: int) -> bool:
         if comanda_id not in self.comandas or produto_id not in self.produtos:
             return False
         
         comanda = self.comandas[comanda_id]
-        if comanda.status != "aberta":
+        if comanda.status != "aberta" or quantidade <= 0:
             return False
-        
-        for item in comanda.itens:
-            if item.produto_id == produto_id:
-                try:
-                    with self._get_connection() as conn:
-                        cursor = conn.cursor()
-                        if item.quantidade <= quantidade:
-                            cursor.execute('DELETE FROM itens_comanda WHERE comanda_id = ? AND produto_id = ?', (comanda_id, produto_id))
-                        else:
-                            cursor.execute('''
-                                UPDATE itens_comanda
-                                SET quantidade = quantidade - ?, subtotal = (quantidade - ?) * preco_unitario
-                                WHERE comanda_id = ? AND produto_id = ?
-                            ''', (quantidade, quantidade, comanda_id, produto_id))
-                        cursor.execute('UPDATE produtos SET estoque = estoque + ? WHERE id = ?', (min(quantidade, item.quantidade), produto_id))
-                        conn.commit()
-                        
-                        self.produtos[produto_id].estoque += min(quantidade, item.quantidade)
-                        return comanda.remover_item(produto_id, quantidade)
-                
-                except sqlite3.Error as e:
-                    print(f"Erro ao remover item da comanda: {e}")
+
+        # A remoção parte do que está gravado: itens ainda na fila precisam chegar ao banco
+        if not self.sincronizar():
+            return False
+
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT status FROM comandas WHERE id = ?', (comanda_id,))
+                row = cursor.fetchone()
+                if row is None or row[0] != "aberta":
+                    conn.rollback()
+                    self._descartar_comanda(cursor, comanda)
                     return False
-        return False
+
+                # O produto pode ter várias linhas (uma por adição, inclusive de outros
+                # terminais): remove só a quantidade pedida, a partir das mais recentes
+                cursor.execute('''
+                    SELECT id, quantidade, preco_unitario_centavos FROM itens_comanda
+                    WHERE comanda_id = ? AND produto_id = ?
+                    ORDER BY id DESC
+                ''', (comanda_id, produto_id))
+                removida = 0
+                for item_id, quantidade_linha, preco_unitario_centavos in cursor.fetchall():
+                    if removida == quantidade:
+                        break
+                    retirar = min(quantidade - removida, quantidade_linha)
+                    if retirar == quantidade_linha:
+                        cursor.execute('DELETE FROM itens_comanda WHERE id = ?', (item_id,))
+                    else:
+                        restante = quantidade_linha - retirar
+                        cursor.execute('UPDATE itens_comanda SET quantidade = ?, subtotal_centavos = ? WHERE id = ?',
+                                       (restante, restante * preco_unitario_centavos, item_id))
+                    removida += retirar
+
+                if removida:
+                    # O estoque volta exatamente o que saiu da comanda
+                    cursor.execute('UPDATE produtos SET estoque = estoque + ? WHERE id = ?', (removida, produto_id))
+                conn.commit()
+                self._sincronizar_estoque(cursor, [produto_id])
+                recarregada = self._carregar_comandas(cursor, 'id = ?', (comanda_id,)).get(comanda_id)
+                if recarregada is not None:
+                    comanda.copiar_de(recarregada)
+                return removida > 0
+        
+        except sqlite3.Error as e:
+            print(f"Erro ao remover item da comanda: {e}")
+            return False
     
     def fechar_comanda(self, comanda_id: int) -> Optional[float]:
         if comanda_id not in self.comandas or self.comandas[comanda_id].status != "aberta":
             return None
         
+        # Fechar a comanda é um ponto de durabilidade: os itens lançados
+        # precisam estar no banco antes do fechamento
+        if not self.sincronizar():
+            return None
+
         comanda = self.comandas[comanda_id]
-        comanda.fechar_comanda()
-        total = comanda.calcular_total()
+        hora_fechamento = datetime.now().strftime(FORMATO_DATA_HORA)
         
         try:
             with self._get_connection() as conn:
+                if self.fila is not None:
+                    conn.execute('PRAGMA synchronous = FULL')
                 cursor = conn.cursor()
+                # Condicional: se outro terminal já fechou a comanda, nada é gravado
                 cursor.execute('''
                     UPDATE comandas
-                    SET status = ?, hora_fechamento = ?
-                    WHERE id = ?
-                ''', (comanda.status, comanda.hora_fechamento, comanda_id))
+                    SET status = 'fechada', hora_fechamento = ?
+                    WHERE id = ? AND status = 'aberta'
+                ''', (hora_fechamento, comanda_id))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    self._descartar_comanda(cursor, comanda)
+                    return None
                 cursor.execute('UPDATE mesas SET comanda_id = NULL WHERE comanda_id = ?', (comanda_id,))
+                # Total e resumos vêm dos itens gravados, não da cópia em memória,
+                # que pode não ter o que outro terminal lançou
+                total_centavos = resumos.registrar_comanda(cursor, comanda_id, hora_fechamento)
                 conn.commit()
+                if self.fila is not None:
+                    conn.execute('PRAGMA synchronous = NORMAL')
                 
-                self.mesas[comanda.mesa] = None
-                return total
+                # Quem guarda a referência (interface, serviço) vê os itens e o total cobrados
+                recarregada = self._carregar_comandas(cursor, 'id = ?', (comanda_id,)).get(comanda_id)
+                if recarregada is not None:
+                    comanda.copiar_de(recarregada)
+                self._definir_mesa(comanda.mesa, None)
+                if not self.carregar_historico:
+                    # Comandas fechadas são buscadas no banco quando necessário
+                    del self.comandas[comanda_id]
+                return total_centavos / 100
         
         except sqlite3.Error as e:
             print(f"Erro ao fechar comanda: {e}")
             return None
+
+    def _descartar_comanda(self, cursor, comanda: Comanda):
+        """A comanda foi fechada (ou removida) por outro terminal: traz o estado do banco para a memória."""
+        recarregada = self._carregar_comandas(cursor, 'id = ?', (comanda.id,)).get(comanda.id)
+        if recarregada is not None and self.carregar_historico:
+            comanda.copiar_de(recarregada)
+        else:
+            self.comandas.pop(comanda.id, None)
+        cursor.execute('SELECT comanda_id FROM mesas WHERE id = ?', (comanda.mesa,))
+        ocupante = cursor.fetchone()
+        if ocupante is None:
+            self._descartar_mesa(comanda.mesa)
+        else:
+            self._definir_mesa(comanda.mesa, ocupante[0])
     
+    def buscar_produtos(self, consulta: str, limite: int = 10) -> List[Produto]:
+        """Produtos cujo nome ou categoria corresponde a `consulta` (prefixo ou aproximado).
+
+        Um número é tratado também como id e, se existir, vem primeiro.
+        """
+        encontrados = [self.produtos[produto_id] for produto_id in self.indice.buscar(consulta, limite)]
+        consulta = consulta.strip()
+        if consulta.isdigit() and int(consulta) in self.produtos:
+            produto = self.produtos[int(consulta)]
+            encontrados = [produto] + [p for p in encontrados if p is not produto][:limite - 1]
+        return encontrados
+
     def consultar_produtos(self, categoria: str = None) -> List[Produto]:
+        """Todos os produtos, ou os da categoria (sem diferenciar maiúsculas e acentos) em ordem de id."""
         if categoria:
-            return [p for p in self.produtos.values() if p.categoria == categoria]
+            return [self.produtos[produto_id] for produto_id in self.categorias.ids(categoria)]
         return list(self.produtos.values())
+
+    def produtos_estoque_baixo(self, margem: int = 0) -> List[Produto]:
+        """Produtos com estoque abaixo do próprio mínimo (+ `margem`), do mais ao menos crítico."""
+        return [self.produtos[produto_id] for produto_id in self.alertas_estoque.abaixo_do_minimo(margem)]
+
+    def listar_categorias(self) -> List[Tuple[str, int, int]]:
+        """(categoria, quantidade de produtos, estoque total) de cada categoria."""
+        return self.categorias.listar()
     
     def listar_comandas_abertas(self) -> List[Comanda]:
         return [c for c in self.comandas.values() if c.status == "aberta"]
     
     def listar_mesas_livres(self) -> List[int]:
-        return [mesa for mesa, comanda_id in self.mesas.items() if comanda_id is None]
+        return sorted(self.mesas_livres)
     
     def listar_mesas_ocupadas(self) -> List[int]:
-        return [mesa for mesa, comanda_id in self.mesas.items() if comanda_id is not None]
+        return sorted(self.mesas_ocupadas)
+
+    def _definir_mesa(self, mesa: int, comanda_id: Optional[int]):
+        """Único ponto que altera a ocupação de uma mesa em memória."""
+        self.mesas[mesa] = comanda_id
+        if comanda_id is None:
+            self.mesas_ocupadas.discard(mesa)
+            self.mesas_livres.add(mesa)
+        else:
+            self.mesas_livres.discard(mesa)
+            self.mesas_ocupadas.add(mesa)
+
+    def _descartar_mesa(self, mesa: int):
+        self.mesas.pop(mesa, None)
+        self.mesas_livres.discard(mesa)
+        self.mesas_ocupadas.discard(mesa)
     
     def obter_comanda_por_mesa(self, mesa: int) -> Optional[Comanda]:
         if mesa not in self.mesas or self.mesas[mesa] is None:
@@ -487,23 +999,55 @@ class SistemaBar:
                 cursor.execute('INSERT INTO mesas (id, comanda_id) VALUES (?, ?)', (numero_mesa, None))
                 conn.commit()
                 
-                self.mesas[numero_mesa] = None
+                self._definir_mesa(numero_mesa, None)
                 return True
         
         except sqlite3.Error as e:
             print(f"Erro ao adicionar mesa: {e}")
             return False
+
+    def adicionar_mesas(self, inicio: int, fim: int) -> Optional[int]:
+        """Cadastra as mesas de `inicio` a `fim` (inclusive) em uma única transação.
+
+        Mesas que já existem são mantidas como estão. Retorna quantas foram
+        criadas, ou None se a gravação falhar.
+        """
+        novas = [mesa for mesa in range(inicio, fim + 1) if mesa not in self.mesas]
+        if not novas:
+            return 0
+        try:
+            with self._get_connection() as conn:
+                conn.executemany('INSERT OR IGNORE INTO mesas (id, comanda_id) VALUES (?, NULL)',
+                                 ((mesa,) for mesa in novas))
+            for mesa in novas:
+                self._definir_mesa(mesa, None)
+            return len(novas)
+
+        except sqlite3.Error as e:
+            print(f"Erro ao adicionar mesas: {e}")
+            return None
     
     def remover_mesa(self, numero_mesa: int) -> bool:
-        if numero_mesa not in self.mesas:
+        """Remove uma mesa livre."""
+        if numero_mesa not in self.mesas or self.mesas[numero_mesa] is not None:
             return False
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('DELETE FROM mesas WHERE id = ?', (numero_mesa,))
+                cursor.execute('DELETE FROM mesas WHERE id = ? AND comanda_id IS NULL', (numero_mesa,))
+                if cursor.rowcount == 0:
+                    # Outro terminal ocupou (ou removeu) a mesa nesse meio tempo
+                    conn.rollback()
+                    cursor.execute('SELECT comanda_id FROM mesas WHERE id = ?', (numero_mesa,))
+                    ocupante = cursor.fetchone()
+                    if ocupante is None:
+                        self._descartar_mesa(numero_mesa)
+                    else:
+                        self._definir_mesa(numero_mesa, ocupante[0])
+                    return False
                 conn.commit()
                 
-                del self.mesas[numero_mesa]
+                self._descartar_mesa(numero_mesa)
                 return True
         
         except sqlite3.Error as e:
@@ -516,30 +1060,32 @@ class SistemaBar:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
+                produtos_venda = [item.produto_id for item in venda.itens]
+
+                # Todos os itens da venda são reservados juntos, ou nenhum
+                if not self._baixar_estoque(cursor, [(item.produto_id, item.quantidade) for item in venda.itens]):
+                    conn.rollback()
+                    self._sincronizar_estoque(cursor, produtos_venda)
+                    return False
+
                 # Cria uma comanda temporária para registrar a venda
-                comanda_id = self.proximo_id_comanda
                 cursor.execute('''
-                    INSERT INTO comandas (id, mesa, status, hora_abertura, hora_fechamento)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (comanda_id, 0, "fechada", venda.hora_venda, venda.hora_venda))
+                    INSERT INTO comandas (mesa, status, hora_abertura, hora_fechamento)
+                    VALUES (?, ?, ?, ?)
+                ''', (0, "fechada", venda.hora_venda, venda.hora_venda))
+                comanda_id = cursor.lastrowid
                 
                 # Registra os itens da venda
-                for item in venda.itens:
-                    cursor.execute('''
-                        INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario, subtotal)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (comanda_id, item.produto_id, item.quantidade, item.nome_produto, item.preco_unitario, item.subtotal))
-                    
-                    # Atualiza o estoque no banco de dados
-                    cursor.execute('UPDATE produtos SET estoque = estoque - ? WHERE id = ?', 
-                                 (item.quantidade, item.produto_id))
-                    
-                    # Atualiza o estoque na memória
-                    if item.produto_id in self.produtos:
-                        self.produtos[item.produto_id].estoque -= item.quantidade
+                cursor.executemany('''
+                    INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario_centavos, subtotal_centavos)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [(comanda_id, item.produto_id, item.quantidade, item.nome_produto, item.preco_unitario_centavos, item.subtotal_centavos)
+                      for item in venda.itens])
                 
+                resumos.registrar_venda(cursor, venda.hora_venda, venda.itens)
+                self._sincronizar_estoque(cursor, produtos_venda)
                 conn.commit()
-                self.proximo_id_comanda += 1
+                self.proximo_id_comanda = max(self.proximo_id_comanda, comanda_id + 1)
                 self.salvar_dados()
                 return True
                 
@@ -549,7 +1095,7 @@ class SistemaBar:
 
     def atualizar_nome_cliente(self, comanda_id: int, nome_cliente: str) -> bool:
         """Atualiza o nome do cliente em uma comanda."""
-        if comanda_id not in self.comandas:
+        if self.obter_comanda(comanda_id) is None:
             return False
         
         try:
@@ -562,13 +1108,92 @@ class SistemaBar:
                 ''', (nome_cliente, comanda_id))
                 conn.commit()
                 
-                self.comandas[comanda_id].nome_cliente = nome_cliente
+                if comanda_id in self.comandas:
+                    self.comandas[comanda_id].nome_cliente = nome_cliente
                 return True
         
         except sqlite3.Error as e:
             print(f"Erro ao atualizar nome do cliente: {e}")
             return False
 
+    def buscar_comandas_periodo(self, inicio: datetime, fim: datetime, campo: str = "hora_abertura",
+                                status: Optional[str] = None) -> List[Comanda]:
+        """Retorna as comandas cujo `campo` está no intervalo [inicio, fim).
+
+        A busca usa o índice da coluna de data no banco, então o custo é
+        proporcional às comandas do período e não ao histórico inteiro.
+        """
+        if campo not in ("hora_abertura", "hora_fechamento"):
+            raise ValueError(f"Campo de data inválido: {campo}")
+
+        filtro = f'{campo} >= ? AND {campo} < ?'
+        parametros = [inicio.strftime(FORMATO_DATA_HORA), fim.strftime(FORMATO_DATA_HORA)]
+        if status is not None:
+            # "+status" impede o SQLite de trocar o índice de data pelo de status
+            filtro += ' AND +status = ?'
+            parametros.append(status)
+
+        try:
+            with self._get_connection() as conn:
+                return list(self._carregar_comandas(conn.cursor(), filtro, parametros, ordem=f'{campo}, id').values())
+
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar comandas: {e}")
+            return []
+
+    def resumo_vendas(self, granularidade: str, inicio: str, fim: str) -> Dict[str, int]:
+        """Totais de vendas dos períodos de `inicio` a `fim` (inclusive) na granularidade dada.
+
+        Os períodos seguem o formato de resumos.periodo: "aaaa-mm-dd hh" para
+        'hora', "aaaa-mm-dd" para 'dia' e "aaaa-mm" para 'mes'. Valores em centavos.
+        """
+        resumo = {"receita_centavos": 0, "comandas": 0, "unidades": 0, "ticket_medio_centavos": 0}
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT COALESCE(SUM(receita_centavos), 0), COALESCE(SUM(comandas), 0), COALESCE(SUM(unidades), 0)
+                    FROM resumo_vendas
+                    WHERE granularidade = ? AND periodo BETWEEN ? AND ?
+                ''', (granularidade, inicio, fim))
+                resumo["receita_centavos"], resumo["comandas"], resumo["unidades"] = cursor.fetchone()
+                if resumo["comandas"]:
+                    # Divisão inteira arredondada para o centavo mais próximo
+                    resumo["ticket_medio_centavos"] = (2 * resumo["receita_centavos"] + resumo["comandas"]) // (2 * resumo["comandas"])
+
+        except sqlite3.Error as e:
+            print(f"Erro ao consultar resumo de vendas: {e}")
+        return resumo
+
+    def produtos_mais_vendidos(self, granularidade: str, inicio: str, fim: str,
+                               limite: Optional[int] = None) -> List[Dict]:
+        """Produtos vendidos no período, do mais vendido (em unidades) para o menos vendido."""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT produto_id, MAX(nome_produto), SUM(unidades), SUM(receita_centavos), SUM(comandas)
+                    FROM resumo_vendas_produto
+                    WHERE granularidade = ? AND periodo BETWEEN ? AND ?
+                    GROUP BY produto_id
+                    ORDER BY SUM(unidades) DESC
+                    LIMIT ?
+                ''', (granularidade, inicio, fim, -1 if limite is None else limite))
+                return [
+                    {"produto_id": row[0], "nome": row[1], "quantidade": row[2], "total_centavos": row[3], "comandas": row[4]}
+                    for row in cursor.fetchall()
+                ]
+
+        except sqlite3.Error as e:
+            print(f"Erro ao consultar produtos mais vendidos: {e}")
+            return []
+
+    def buscar_comandas_dia(self, dia: Optional[datetime] = None, campo: str = "hora_abertura",
+                            status: Optional[str] = None) -> List[Comanda]:
+        """Retorna as comandas de um dia (por padrão, hoje)."""
+        inicio = (dia or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.buscar_comandas_periodo(inicio, inicio + timedelta(days=1), campo, status)
+
 class InterfaceTerminal:
 
     def linha_simples(self):
@@ -605,10 +1230,12 @@ class InterfaceTerminal:
         print("2. Comandas do Dia")
         print("3. Total de Vendas do Dia")
         print("4. Exportar Todos os Relatórios para Excel")
+        print("5. Resumo de Vendas (Semana/Mês)")
         print("0. Voltar")
         print(self.linha_separadora())
 
         opcao = input("Escolha uma opção: ")
+        self.sistema.atualizar()
 
         if opcao == "1":
             self.relatorio_estoque_baixo()
@@ -618,6 +1245,8 @@ class InterfaceTerminal:
             self.relatorio_vendas_dia()
         elif opcao == "4":
             self.exportar_todos_relatorios()
+        elif opcao == "5":
+            self.relatorio_resumo_periodo()
         elif opcao == "0":
             pass
         else:
@@ -633,11 +1262,15 @@ class InterfaceTerminal:
             #Listar mesas atuais
             print("Mesas atuais:", ", ".join(map(str, sorted(self.sistema.mesas.keys()))))
 
-            numero_input = input("\nDigite o número da nova mesa: ")
+            numero_input = input("\nDigite o número da nova mesa (ou uma faixa, ex.: 1-300): ")
             if numero_input.lower() in ['c', 'cancelar']:
                 print("Operação cancelada.")
                 print("Pressione Enter para continuar...")
                 return 
+
+            if '-' in numero_input:
+                self.cadastrar_faixa_mesas(numero_input)
+                return
             
             numero_mesa = int(numero_input)
 
@@ -666,6 +1299,26 @@ class InterfaceTerminal:
             print("Entrada inválida. Por favor, digite um número válido.")
             input("Pressione Enter para continuar...")
 
+    def cadastrar_faixa_mesas(self, faixa: str):
+        inicio, fim = (int(parte) for parte in faixa.split('-', 1))
+        if inicio <= 0 or fim < inicio:
+            print("Faixa inválida. Use números positivos, do menor para o maior (ex.: 1-300).")
+            input("Pressione Enter para continuar...")
+            return
+
+        confirmar = input(f"Confirma a adição das mesas {inicio} a {fim}? (s/n): ")
+        if confirmar.lower() != 's':
+            print("Operacao cancelada.")
+            input("Pressione Enter para continuar...")
+            return
+
+        criadas = self.sistema.adicionar_mesas(inicio, fim)
+        if criadas is None:
+            print("Erro ao adicionar as mesas.")
+        else:
+            print(f"{criadas} mesas adicionadas ({fim - inicio + 1 - criadas} já existiam).")
+        input("Pressione Enter para continuar...")
+
     def remover_mesa(self):
         self.limpar_tela()
         self.imprimir_titulo("REMOVER MESA")
@@ -700,7 +1353,7 @@ class InterfaceTerminal:
             if resultado:
                 print(f"Mesa {numero_mesa} removida com sucesso.")
             else:
-                print(f"Erro, a mesa {numero_mesa} não existe.")
+                print(f"Erro, a mesa {numero_mesa} não existe ou está ocupada.")
             input("Pressione Enter para continuar...")
 
         except ValueError:
@@ -712,22 +1365,20 @@ class InterfaceTerminal:
         self.limpar_tela()
         self.imprimir_titulo("RELATÓRIO DE ESTOQUE BAIXO")
 
-        # Define um limite para estoque baixo (por exemplo, menos de 10 unidades)
-        limite = 10
-
-        produtos_baixo_estoque = [produto for produto in self.sistema.produtos.values() if produto.estoque < limite]
+        # Cada produto tem o seu estoque mínimo; a lista já vem do mais ao menos crítico
+        produtos_baixo_estoque = self.sistema.produtos_estoque_baixo()
 
         if not produtos_baixo_estoque:
-            print(f"Não há produtos com estoque baixo de {limite} unidades.")
+            print("Não há produtos com estoque abaixo do mínimo.")
             input("Pressione Enter para continuar...")
             return
     
-        print(f"Produtos com estoque baixo de {limite} unidades:")
-        print(f"{'ID':<5} {'Nome':<20} {'Categoria':<15} {'Estoque':<10}")
+        print("Produtos com estoque abaixo do mínimo:")
+        print(f"{'ID':<5} {'Nome':<20} {'Categoria':<15} {'Estoque':<10} {'Mínimo':<10}")
         print(self.linha_separadora())
 
         for produto in produtos_baixo_estoque:
-            print(f"{produto.id:<15} {produto.nome:<20} {produto.categoria:<15} {produto.estoque:<10}")
+            print(f"{produto.id:<5} {produto.nome:<20} {produto.categoria:<15} {produto.estoque:<10} {produto.estoque_minimo:<10}")
 
         print(self.linha_separadora())
         input("Pressione Enter para continuar...")
@@ -740,16 +1391,8 @@ class InterfaceTerminal:
         hoje = datetime.now().strftime("%d/%m/%y")
         print(f"Data de hoje: {hoje}")
 
-        # Debug - Mostrar todas as comandas e suas datas
-        print("Comandas registradas:")
-        for comanda_id, comanda in self.sistema.comandas.items():
-            print(f"ID: {comanda_id}, Data: {comanda.hora_abertura}, Status: {comanda.status}")
-
-        # Filtra as comandas do dia - criterio mais simples
-        Comandas_dia = []
-        for comanda in self.sistema.comandas.values():
-            if hoje[:5] in comanda.hora_abertura:
-                Comandas_dia.append(comanda)
+        # Busca no banco apenas as comandas abertas hoje
+        Comandas_dia = self.sistema.buscar_comandas_dia()
 
         if not Comandas_dia:
             print(f"Não há comandas registradas hoje ({hoje}).")
@@ -780,60 +1423,55 @@ class InterfaceTerminal:
         hoje = datetime.now().strftime("%d/%m/%y")
         print(f"Data de hoje: {hoje}")
 
-        #Degub - Mostrar todas as vendas e suas datas
-        print("Todas as comandas fechadas:")
-        for comanda_id, comanda in self.sistema.comandas.items():
-            print(f"ID: {comanda_id}, Data: {comanda.hora_fechamento}, Status: {comanda.status}")
+        # Lê os totais já agregados na tabela de resumo do dia
+        periodo = resumos.periodo("dia", datetime.now().strftime(FORMATO_DATA_HORA))
+        resumo = self.sistema.resumo_vendas("dia", periodo, periodo)
 
-        # Filtra as comandas fechada do dia 
-        comandas_fechadas = []
-        for comanda in self.sistema.comandas.values():
-            if comanda.status == "fechada" and comanda.hora_fechamento and hoje[:5] in comanda.hora_fechamento:
-                comandas_fechadas.append(comanda)
-
-        if not comandas_fechadas:
+        if not resumo["comandas"]:
             print(f"Não há comandas fechadas registradas hoje ({hoje}).")
             input("Pressione Enter para continuar...")
             return
     
-        # Calcula o total de vendas do dia
-        total_vendas = sum(comanda.calcular_total() for c in comandas_fechadas)
-        quantidade_comandas = len(comandas_fechadas)
-        ticket_medio = total_vendas / quantidade_comandas if quantidade_comandas > 0 else 0
-
         print(f"Data: {hoje}")
-        print(f"Quantidade de comandas fechadas: {quantidade_comandas}")
-        print(f"Total de vendas ({hoje}): R${total_vendas:.2f}")
-        print(f"Ticket médio ({hoje}): R${ticket_medio:.2f}")
+        print(f"Quantidade de comandas fechadas: {resumo['comandas']}")
+        print(f"Total de vendas ({hoje}): R${resumo['receita_centavos'] / 100:.2f}")
+        print(f"Ticket médio ({hoje}): R${resumo['ticket_medio_centavos'] / 100:.2f}")
 
         # Lista as produtos mais vendidos
-        produtos_vendidos = {}
-        for comanda in comandas_fechadas:
-            for item in comanda.itens:
-                if item.produto_id not in produtos_vendidos:
-                    produtos_vendidos[item.produto_id] = {
-                        "nome": item.nome_produto,
-                        "quantidade": 0,
-                        "total": 0
-                    }
-
-                produtos_vendidos[item.produto_id]["quantidade"] += item.quantidade
-                produtos_vendidos[item.produto_id]["total"] += item.subtotal
+        produtos_vendidos = self.sistema.produtos_mais_vendidos("dia", periodo, periodo)
 
         if produtos_vendidos:
             print("\nProdutos mais vendidos:")
             print(f"{'Nome':<20} {'Quantidade':<10} {'Total':<10}")
             print(self.linha_separadora())
 
-            # Oderna por quantidade
-            produtos_odernados = sorted(
-                produtos_vendidos.items(),
-                key=lambda x: x[1]["quantidade"],
-                reverse=True
-            )
+            for produto in produtos_vendidos:
+                print(f"{produto['nome']:<20}{produto['quantidade']:<10} R${produto['total_centavos'] / 100:<8.2f}")
+
+        print(self.linha_separadora())
+        input("Pressione Enter para continuar...")
+
+    def relatorio_resumo_periodo(self):
+        self.limpar_tela()
+        self.imprimir_titulo("RESUMO DE VENDAS POR PERÍODO")
+
+        agora = datetime.now()
+        hoje = resumos.periodo("dia", agora.strftime(FORMATO_DATA_HORA))
+        inicio_semana = resumos.periodo("dia", (agora - timedelta(days=6)).strftime(FORMATO_DATA_HORA))
+        mes = resumos.periodo("mes", agora.strftime(FORMATO_DATA_HORA))
 
-            for _, produto in produtos_odernados:
-                print(f"{produto['nome']:<20}{produto['quantidade']:<10} R${produto['total']:<8.2f}")
+        periodos = [
+            ("Hoje", "dia", hoje, hoje),
+            ("Últimos 7 dias", "dia", inicio_semana, hoje),
+            ("Mês atual", "mes", mes, mes),
+        ]
+
+        print(f"{'Período':<20} {'Comandas':<10} {'Itens':<10} {'Total':<15} {'Ticket Médio':<15}")
+        print(self.linha_separadora())
+        for nome, granularidade, inicio, fim in periodos:
+            resumo = self.sistema.resumo_vendas(granularidade, inicio, fim)
+            print(f"{nome:<20} {resumo['comandas']:<10} {resumo['unidades']:<10} "
+                  f"R${resumo['receita_centavos'] / 100:<13.2f} R${resumo['ticket_medio_centavos'] / 100:<13.2f}")
 
         print(self.linha_separadora())
         input("Pressione Enter para continuar...")
@@ -882,6 +1520,13 @@ class InterfaceTerminal:
                 input("Pressione Enter para continuar...")
                 return
 
+            minimo_input = input(f"Estoque mínimo (Enter mantém {produto.estoque_minimo}): ")
+            novo_minimo = int(minimo_input) if minimo_input else None
+            if novo_minimo is not None and novo_minimo < 0:
+                print("O estoque mínimo não pode ser negativo.")
+                input("Pressione Enter para continuar...")
+                return
+
             confirmar = input(f"Confirma a atualização do estoque de {produto.estoque} para {novo_estoque}? (s/n): ")
 
             if confirmar.lower() != "s":
@@ -889,7 +1534,7 @@ class InterfaceTerminal:
                 input("Pressione Enter para continuar...")
                 return
 
-            resultado = self.sistema.atualizar_estoque(produto_id, estoque=novo_estoque)
+            resultado = self.sistema.atualizar_estoque(produto_id, estoque=novo_estoque, estoque_minimo=novo_minimo)
 
             if resultado:
                 print(f"Estoque atualizado para {novo_estoque} unidades.")
@@ -1053,17 +1698,62 @@ class InterfaceTerminal:
         while self.running:
             self.menu_principal()
 
-    def __init__(self):
-        self.sistema = SistemaBar()
+    def __init__(self, sistema: Optional[SistemaBar] = None):
+        self.sistema = sistema if sistema is not None else SistemaBar()
         self.running = True
         self.venda_atual = None
+        self.avisos_estoque: List[str] = []
+        self.sistema.alertas_estoque.inscrever(self.avisar_estoque)
+
+    def avisar_estoque(self, produto, abaixo):
+        if abaixo:
+            self.avisos_estoque.append(f"{produto.nome} abaixo do mínimo: {produto.estoque} de {produto.estoque_minimo}")
+        else:
+            self.avisos_estoque.append(f"{produto.nome} reposto: {produto.estoque} (mínimo {produto.estoque_minimo})")
+
+    def mostrar_avisos_estoque(self):
+        """Mostra (uma vez) os avisos de estoque mínimo acumulados desde a última tela principal."""
+        for aviso in self.avisos_estoque:
+            print(f"Aviso de estoque: {aviso}")
+        if self.avisos_estoque:
+            print(self.linha_simples())
+        self.avisos_estoque.clear()
 
     def limpar_tela(self):
         os.system('cls' if os.name == 'nt' else 'clear')
+
+    def imprimir_produtos(self, produtos):
+        print("-" * 50)
+        print(f"{'ID':<5} {'Nome':<20} {'Preço':<10} {'Categoria':<15} {'Estoque':<10}")
+        print("-" * 50)
+        for produto in produtos:
+            print(f"{produto.id:<5} {produto.nome:<20} R${produto.preco:<8.2f} {produto.categoria:<15} {produto.estoque:<10}")
+        print("-" * 50)
+
+    def listar_produtos_disponiveis(self, produtos):
+        """Lista o catálogo, ou só orienta a busca se ele for grande demais para a tela."""
+        if len(produtos) > LIMITE_LISTAGEM:
+            print(f"\n{len(produtos)} produtos cadastrados. Digite parte do nome ou da categoria para buscar.")
+            return
+        print("\nProdutos disponíveis:")
+        self.imprimir_produtos(produtos)
+
+    def ler_produto(self, mensagem: str) -> str:
+        """Lê o id de um produto. Texto que não é número é usado como busca e os resultados são exibidos."""
+        while True:
+            entrada = input(mensagem).strip()
+            if not entrada or entrada.isdigit() or entrada.lower() in ['c', 'cancelar']:
+                return entrada
+            encontrados = self.sistema.buscar_produtos(entrada)
+            if encontrados:
+                self.imprimir_produtos(encontrados)
+            else:
+                print("Nenhum produto encontrado.")
     
     def menu_principal(self):
         self.limpar_tela()
         self.imprimir_titulo("SISTEMA DE BAR")
+        self.mostrar_avisos_estoque()
         print("1. Gestão de Mesas")
         print("2. Gestão de Produtos e Estoque")
         print("3. Relatórios")
@@ -1072,6 +1762,7 @@ class InterfaceTerminal:
         print(self.linha_separadora())
         
         opcao = input("Escolha uma opção: ")
+        self.sistema.atualizar()  # traz alterações feitas por outros terminais
         
         if opcao == "1":
             self.menu_mesas()
@@ -1090,6 +1781,7 @@ class InterfaceTerminal:
         while True:
             self.limpar_tela()
             self.imprimir_titulo("GESTÃO DE MESAS")
+            self.sistema.atualizar()
             
             # Lista mesas livres e ocupadas
             mesas_livres = self.sistema.listar_mesas_livres()
@@ -1108,6 +1800,7 @@ class InterfaceTerminal:
             print(self.linha_separadora())
             
             opcao = input("Escolha uma opção: ")
+            self.sistema.atualizar()
             
             if opcao == "1":
                 self.abrir_comanda()
@@ -1214,22 +1907,19 @@ class InterfaceTerminal:
             input("Não há produtos cadastrados. Pressione Enter para continuar...")
             return
         
-        print("\nProdutos disponíveis:")
-        print("-" * 50)
-        print(f"{'ID':<5} {'Nome':<20} {'Preço':<10} {'Categoria':<15} {'Estoque':<10}")
-        print("-" * 50)
-        
-        for produto in produtos:
-            print(f"{produto.id:<5} {produto.nome:<20} R${produto.preco:<8.2f} {produto.categoria:<15} {produto.estoque:<10}")
-        
-        print("-" * 50)
+        self.listar_produtos_disponiveis(produtos)
         
-        # Adicionar produtos à comanda
+        # Os itens são reunidos em um pedido e lançados juntos ao finalizar
+        pedido = []
         while True:
-            produto_id = input("\nDigite o ID do produto (ou 0 para finalizar): ")
+            produto_id = self.ler_produto("\nDigite o ID ou parte do nome do produto (0 para finalizar, 'c' para cancelar): ").lower()
             
             if produto_id == "0":
                 break
+            if produto_id in ['c', 'cancelar']:
+                pedido = []
+                print("Pedido cancelado.")
+                break
             
             try:
                 produto_id = int(produto_id)
@@ -1244,20 +1934,30 @@ class InterfaceTerminal:
                     print("Quantidade deve ser maior que zero.")
                     continue
                 
-                if self.sistema.produtos[produto_id].estoque < quantidade:
+                no_pedido = sum(q for p, q in pedido if p == produto_id)
+                if self.sistema.produtos[produto_id].estoque < no_pedido + quantidade:
                     print("Estoque insuficiente.")
                     continue
                 
-                resultado = self.sistema.adicionar_item_comanda(comanda.id, produto_id, quantidade)
-                
-                if resultado:
-                    print(f"{quantidade}x {self.sistema.produtos[produto_id].nome} adicionado(s) à comanda.")
-                else:
-                    print("Erro ao adicionar item à comanda.")
+                pedido.append((produto_id, quantidade))
+                print(f"{quantidade}x {self.sistema.produtos[produto_id].nome} no pedido.")
             
             except ValueError:
                 print("Valor inválido.")
         
+        if pedido:
+            if self.sistema.adicionar_itens_comanda(comanda.id, pedido):
+                for produto_id, quantidade in pedido:
+                    print(f"{quantidade}x {self.sistema.produtos[produto_id].nome} adicionado(s) à comanda.")
+            else:
+                # Outro terminal pode ter vendido as unidades entre a consulta e a reserva
+                faltando = [self.sistema.produtos[produto_id].nome for produto_id in {p for p, _ in pedido}
+                            if self.sistema.produtos[produto_id].estoque < sum(q for p, q in pedido if p == produto_id)]
+                if faltando:
+                    print("Nenhum item lançado. Estoque insuficiente: " + ", ".join(faltando))
+                else:
+                    print("Erro ao adicionar itens à comanda.")
+        
         input("Pressione Enter para continuar...")
     
     def visualizar_comanda(self):
@@ -1393,10 +2093,12 @@ class InterfaceTerminal:
             print("3. Editar Produto")
             print("4. Atualizar Estoque")
             print("5. Remover Produto")
+            print("6. Importar Produtos (CSV)")
             print("0. Voltar")
             print(self.linha_separadora())
             
             opcao = input("Escolha uma opção: ")
+            self.sistema.atualizar()
             
             if opcao == "1":
                 self.cadastrar_produto()
@@ -1408,11 +2110,37 @@ class InterfaceTerminal:
                 self.atualizar_estoque()
             elif opcao == "5":
                 self.remover_produto()
+            elif opcao == "6":
+                self.importar_produtos()
             elif opcao == "0":
                 break
             else:
                 input("Opção inválida. Pressione Enter para continuar...")
     
+    def importar_produtos(self):
+        from importacao import importar_produtos
+
+        self.limpar_tela()
+        self.imprimir_titulo("IMPORTAR PRODUTOS")
+        print("Colunas do CSV: id (opcional), nome, preco, categoria, estoque")
+        caminho = input("Caminho do arquivo (ou 'c' para cancelar): ").strip()
+        if caminho.lower() in ["c", "cancelar", ""]:
+            return
+
+        try:
+            resultado = importar_produtos(self.sistema, caminho)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler o arquivo: {e}")
+            input("Pressione Enter para continuar...")
+            return
+
+        if resultado is not None:
+            print(f"{resultado['importados']} produtos importados de {resultado['linhas']} linhas "
+                  f"({resultado['linhas_por_segundo']:.0f} linhas/s).")
+            for numero, motivo in resultado['rejeitadas']:
+                print(f"  linha {numero} rejeitada: {motivo}")
+        input("Pressione Enter para continuar...")
+
     def cadastrar_produto(self):
         self.limpar_tela()
         self.imprimir_titulo("CADASTRO DE PRODUTO")
@@ -1446,8 +2174,15 @@ class InterfaceTerminal:
                 print("Estoque não pode ser negativo.")
                 input("Pressione Enter para continuar...")
                 return
+
+            minimo_str = input(f"Estoque mínimo [{ESTOQUE_MINIMO_PADRAO}]: ")
+            estoque_minimo = int(minimo_str) if minimo_str else ESTOQUE_MINIMO_PADRAO
+            if estoque_minimo < 0:
+                print("Estoque mínimo não pode ser negativo.")
+                input("Pressione Enter para continuar...")
+                return
             
-            produto = self.sistema.adicionar_produto(nome, preco, categoria, estoque)
+            produto = self.sistema.adicionar_produto(nome, preco, categoria, estoque, estoque_minimo)
             
             print(f"Produto '{produto.nome}' cadastrado com ID {produto.id}.")
             input("Pressione Enter para continuar...")
@@ -1460,10 +2195,19 @@ class InterfaceTerminal:
         self.limpar_tela()
         self.imprimir_titulo("LISTAGEM DE PRODUTOS")
         
-        # Pedir categoria opcional
-        categoria = input("Filtrar por categoria (deixe em branco para listar todos): ")
-        
-        produtos = self.sistema.consultar_produtos(categoria if categoria else None)
+        busca = input("Buscar por nome (deixe em branco para filtrar por categoria): ").strip()
+        if busca:
+            produtos = self.sistema.buscar_produtos(busca, limite=50)
+        else:
+            categorias = self.sistema.listar_categorias()
+            if categorias:
+                print(f"\n{'Categoria':<20} {'Produtos':<10} {'Estoque':<10}")
+                for nome, quantidade, estoque in categorias:
+                    print(f"{nome:<20} {quantidade:<10} {estoque:<10}")
+                print()
+            # Pedir categoria opcional
+            categoria = input("Filtrar por categoria (deixe em branco para listar todos): ")
+            produtos = self.sistema.consultar_produtos(categoria if categoria else None)
         
         if not produtos:
             print("Nenhum produto encontrado.")
@@ -1559,8 +2303,11 @@ class InterfaceTerminal:
             
             estoque_str = input(f"Novo estoque [{produto.estoque}]: ")
             estoque = int(estoque_str) if estoque_str else None
+
+            minimo_str = input(f"Novo estoque mínimo [{produto.estoque_minimo}]: ")
+            estoque_minimo = int(minimo_str) if minimo_str else None
             
-            resultado = self.sistema.editar_produto(produto_id, nome, preco, categoria, estoque)   
+            resultado = self.sistema.editar_produto(produto_id, nome, preco, categoria, estoque, estoque_minimo)   
             
             if resultado:
                 print("Produto editado com sucesso.")
@@ -1578,142 +2325,20 @@ class InterfaceTerminal:
         self.imprimir_titulo("EXPORTAR TODOS RELATÓRIOS")
 
         try:
-            # Verificar se o pandas está disponível
             data_atual = datetime.now().strftime("%d-%m-%y")
             nome_arquivo = f"relatorios_bar_{data_atual}.xlsx"
 
-            # Cria um objeto ExcelWriter para salvar múltiplas planilhas
-            with pd.ExcelWriter(nome_arquivo) as writer:
-                # 1. Relatório de Estoque Baixo
-                limite = 10
-                produtos_baixo_estoque = []
-                for produto in self.sistema.produtos.values():
-                    if produto.estoque < limite:
-                        produto_dict = {
-                            "ID": produto.id,
-                            "Nome": produto.nome,
-                            "Categoria": produto.categoria,
-                            "Preço": f"R$ {produto.preco:.2f}",
-                            "Estoque": produto.estoque
-                        }
-                        produtos_baixo_estoque.append(produto_dict)
-
-                if produtos_baixo_estoque:
-                    df_estoque_baixo = pd.DataFrame(produtos_baixo_estoque)
-                    df_estoque_baixo.to_excel(writer, sheet_name='Estoque Baixo', index=False)
-                else:
-                    df_estoque = pd.DataFrame({"Mensagem": [f"Não há produtos com estoque abaixo de {limite} unidades."]})
-                    df_estoque.to_excel(writer, sheet_name='Estoque Baixo', index=False)
-
-                # 2. Relatório de comandas do dia
-                hoje = datetime.now().strftime("%d/%m/%y")
-                comandas_dia = []
-                for comanda in self.sistema.comandas.values():
-                    if hoje[:5] in comanda.hora_abertura:
-                        comanda_dict = {
-                            "ID": comanda.id,
-                            "Mesa": comanda.mesa,
-                            "Status": comanda.status,
-                            "Hora Abertura": comanda.hora_abertura,
-                            "Hora Fechamento": comanda.hora_fechamento,
-                            "Total": f"R$ {comanda.calcular_total():.2f}"
-                        }
-                        comandas_dia.append(comanda_dict)
-
-                if comandas_dia:
-                    df_comandas = pd.DataFrame(comandas_dia)
-                    df_comandas.to_excel(writer, sheet_name='Comandas do Dia', index=False)
-
-                    # 2.1 Itens das comandas do dia
-                    itens_comandas = []
-                    for comanda in self.sistema.comandas.values():
-                        if hoje[:5] in comanda.hora_abertura:
-                            for item in comanda.itens:
-                                item_dict = {
-                                    "Comanda ID": comanda.id,
-                                    "Mesa": comanda.mesa,
-                                    "Produto": item.nome_produto,
-                                    "Quantidade": item.quantidade,
-                                    "Preço Unitário": f"R$ {item.preco_unitario:.2f}",
-                                    "Subtotal": f"R$ {item.subtotal:.2f}"
-                                }
-                                itens_comandas.append(item_dict)
-
-                    if itens_comandas:
-                        df_itens = pd.DataFrame(itens_comandas)
-                        df_itens.to_excel(writer, sheet_name='Itens das Comandas', index=False)
-                else:
-                    df_comandas = pd.DataFrame({"Mensagem": [f"Não há comandas registradas hoje ({hoje})."]})
-                    df_comandas.to_excel(writer, sheet_name='Comandas do Dia', index=False)
-
-                # 3. Relatório de vendas do dia
-                comandas_fechadas = []
-                for comanda in self.sistema.comandas.values():
-                    if comanda.status == "fechada" and comanda.hora_fechamento and hoje[:5] in comanda.hora_fechamento:
-                        comanda_dict = {
-                            "ID": comanda.id,
-                            "Mesa": comanda.mesa,
-                            "Hora Abertura": comanda.hora_abertura,
-                            "Hora Fechamento": comanda.hora_fechamento,
-                            "Total": f"R$ {comanda.calcular_total():.2f}"
-                        }
-                        comandas_fechadas.append(comanda_dict)
-
-                if comandas_fechadas:
-                    df_vendas = pd.DataFrame(comandas_fechadas)
-                    df_vendas.to_excel(writer, sheet_name='Vendas do Dia', index=False)
-
-                    # 3.1 Resumo de vendas
-                    total_vendas = sum(comanda.calcular_total() for comanda in self.sistema.comandas.values()
-                                     if comanda.status == "fechada" and comanda.hora_fechamento and hoje[:5] in comanda.hora_fechamento)
-                    quantidade_comandas = len(comandas_fechadas)
-                    ticket_medio = total_vendas / quantidade_comandas if quantidade_comandas > 0 else 0
-
-                    df_resumo = pd.DataFrame({
-                        "Métrica": ["Total de Vendas", "Quantidade de Comandas", "Ticket Médio"],
-                        "Valor": [f"R$ {total_vendas:.2f}", quantidade_comandas, f"R$ {ticket_medio:.2f}"]
-                    })
-                    df_resumo.to_excel(writer, sheet_name='Resumo de Vendas', index=False)
-
-                    # 3.2 Produtos mais vendidos
-                    produtos_vendidos = {}
-                    for comanda in self.sistema.comandas.values():
-                        if comanda.status == "fechada" and comanda.hora_fechamento and hoje[:5] in comanda.hora_fechamento:
-                            for item in comanda.itens:
-                                if item.produto_id not in produtos_vendidos:
-                                    produtos_vendidos[item.produto_id] = {
-                                        "nome": item.nome_produto,
-                                        "quantidade": 0,
-                                        "total": 0
-                                    }
-                                produtos_vendidos[item.produto_id]["quantidade"] += item.quantidade
-                                produtos_vendidos[item.produto_id]["total"] += item.subtotal
-
-                    if produtos_vendidos:
-                        produtos_lista = []
-                        for pid, p in produtos_vendidos.items():
-                            produtos_lista.append({
-                                "ID": pid,
-                                "Produto": p["nome"],
-                                "Quantidade": p["quantidade"],
-                                "Total": f"R$ {p['total']:.2f}"
-                            })
-
-                        df_produtos = pd.DataFrame(produtos_lista)
-                        df_produtos = df_produtos.sort_values(by="Quantidade", ascending=False)
-                        df_produtos.to_excel(writer, sheet_name='Produtos Vendidos', index=False)
-                else:
-                    df_vendas = pd.DataFrame({"Mensagem": [f"Não há comandas fechadas registradas hoje ({hoje})."]})
-                    df_vendas.to_excel(writer, sheet_name='Vendas do Dia', index=False)
-                    df_resumo = pd.DataFrame({"Mensagem": ["Sem dados de venda para hoje."]})
-                    df_resumo.to_excel(writer, sheet_name='Resumo de Vendas', index=False)
+            # Grava as planilhas em streaming, lendo o banco em lotes
+            estatisticas = exportar_relatorios(self.sistema, nome_arquivo)
 
             print(f"Relatórios exportados com sucesso para o arquivo: {nome_arquivo}")
             print(f"Local do arquivo: {os.path.abspath(nome_arquivo)}")
+            print(f"{estatisticas['linhas']} linhas em {estatisticas['segundos']:.2f}s "
+                  f"({estatisticas['linhas_por_segundo']:.0f} linhas/s)")
 
         except ImportError:
-            print("Erro: A biblioteca pandas não está instalada.")
-            print("Por favor, instale-a usando o comando: pip install pandas")
+            print("Erro: A biblioteca openpyxl não está instalada.")
+            print("Por favor, instale-a usando o comando: pip install openpyxl")
         except Exception as e:
             print(f"Erro ao exportar relatórios: {e}")
 
@@ -1779,18 +2404,10 @@ class InterfaceTerminal:
             input("Não há produtos cadastrados. Pressione Enter para continuar...")
             return
         
-        print("\nProdutos disponíveis:")
-        print("-" * 50)
-        print(f"{'ID':<5} {'Nome':<20} {'Preço':<10} {'Categoria':<15} {'Estoque':<10}")
-        print("-" * 50)
-        
-        for produto in produtos:
-            print(f"{produto.id:<5} {produto.nome:<20} R${produto.preco:<8.2f} {produto.categoria:<15} {produto.estoque:<10}")
-        
-        print("-" * 50)
+        self.listar_produtos_disponiveis(produtos)
         
         try:
-            produto_id = int(input("\nDigite o ID do produto: "))
+            produto_id = int(self.ler_produto("\nDigite o ID ou parte do nome do produto: "))
             
             if produto_id not in self.sistema.produtos:
                 print("Produto não encontrado.")
@@ -1814,7 +2431,7 @@ class InterfaceTerminal:
                 produto_id=produto_id,
                 quantidade=quantidade,
                 nome_produto=produto.nome,
-                preco_unitario=produto.preco
+                preco_unitario_centavos=produto.preco_centavos
             )
             
             self.venda_atual.adicionar_item(item)
@@ -1898,7 +2515,13 @@ class InterfaceTerminal:
             if self.sistema.registrar_venda_rapida(self.venda_atual):
                 print(f"Venda finalizada com sucesso! Total: R${self.venda_atual.calcular_total():.2f}")
             else:
-                print("Erro ao finalizar venda.")
+                faltando = [item.nome_produto for item in self.venda_atual.itens
+                            if item.produto_id in self.sistema.produtos
+                            and self.sistema.produtos[item.produto_id].estoque < item.quantidade]
+                if faltando:
+                    print("Venda não finalizada. Estoque insuficiente: " + ", ".join(faltando))
+                else:
+                    print("Erro ao finalizar venda.")
         else:
             print("Venda cancelada.")
         
@@ -0,0 +1,79 @@
+"""Mede o índice de busca de produtos (busca.py).
+
+Indexa um catálogo sintético de bebidas e petiscos e mede, em microssegundos,
+a reconstrução do índice, a inclusão/remoção de um produto e a busca a cada
+tecla digitada (prefixos crescentes, com acentos e com erros de digitação).
+
+Uso: python benchmarks/bench_busca.py [--produtos 2000] [--repeticoes 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barsystem import Produto
+from busca import IndiceBusca
+
+BASES = ["Cerveja", "Chopp", "Caipirinha", "Caipiroska", "Suco", "Refrigerante", "Água", "Vinho",
+         "Porção", "Pastel", "Batata", "Açaí", "Whisky", "Vodka", "Gin Tônica", "Drink"]
+SABORES = ["Original", "Limão", "Maracujá", "Morango", "Laranja", "Uva", "Calabresa", "Frango",
+           "Queijo", "Tônica", "Gelada", "Artesanal", "Pilsen", "IPA", "Tinto", "Branco"]
+TAMANHOS = ["300ml", "600ml", "Long Neck", "Lata", "Garrafa", "Meia", "Inteira", "Dose"]
+CATEGORIAS = ["Bebidas", "Drinks", "Petiscos", "Destilados"]
+
+CONSULTAS = ["Cerveja Original", "acai", "caipirinha limao", "porcao frango", "cervja", "marakuja"]
+
+
+def percentis(tempos):
+    tempos = sorted(tempos)
+    return tempos[len(tempos) // 2], tempos[int(len(tempos) * 0.99) - 1], tempos[-1]
+
+
+def mostrar(rotulo, tempos):
+    mediana, p99, maximo = (t * 1e6 for t in percentis(tempos))
+    print(f"{rotulo:<28} mediana {mediana:8.1f} µs   p99 {p99:8.1f} µs   máx {maximo:8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--produtos', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(1)
+    produtos = [Produto(i, f"{aleatorio.choice(BASES)} {aleatorio.choice(SABORES)} {aleatorio.choice(TAMANHOS)}",
+                        1000, aleatorio.choice(CATEGORIAS), 10)
+                for i in range(1, args.produtos + 1)]
+
+    indice = IndiceBusca()
+    inicio = time.perf_counter()
+    indice.reconstruir(produtos)
+    print(f"{args.produtos} produtos indexados em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    tempos = []
+    for i in range(args.repeticoes):
+        produto = Produto(args.produtos + 1 + i, "Cerveja Especial da Casa", 1500, "Bebidas", 10)
+        inicio = time.perf_counter()
+        indice.adicionar(produto)
+        indice.remover(produto.id)
+        tempos.append(time.perf_counter() - inicio)
+    mostrar("adicionar + remover", tempos)
+
+    for consulta in CONSULTAS:
+        tempos = []
+        for _ in range(args.repeticoes):
+            # Uma busca por tecla digitada, como na tela de lançamento
+            for fim in range(1, len(consulta) + 1):
+                inicio = time.perf_counter()
+                indice.buscar(consulta[:fim])
+                tempos.append(time.perf_counter() - inicio)
+        primeiros = [produtos[produto_id - 1].nome for produto_id in indice.buscar(consulta, 3)]
+        mostrar(f"'{consulta}' por tecla", tempos)
+        print(f"{'':<28} -> {primeiros}")
+
+
+if __name__ == '__main__':
+    main()
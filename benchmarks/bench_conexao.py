@@ -0,0 +1,62 @@
+"""Compara a latência por operação do SistemaBar abrindo uma conexão SQLite
+por chamada (comportamento antigo) com a conexão compartilhada do
+GerenciadorConexao.
+
+Uso: python benchmarks/bench_conexao.py [--operacoes N]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barsystem import SistemaBar
+from database import fechar_conexoes
+from init_db import create_database
+
+
+class SistemaBarSemPool(SistemaBar):
+    """Reproduz o comportamento anterior: uma conexão nova a cada operação."""
+
+    def _get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+
+def medir(sistema, operacoes):
+    produto = sistema.adicionar_produto("Cerveja", 10.0, "Bebidas", operacoes * 10)
+    comanda = sistema.abrir_comanda(1, "Benchmark")
+    tempos = []
+    for _ in range(operacoes):
+        inicio = time.perf_counter()
+        sistema.adicionar_item_comanda(comanda.id, produto.id, 1)
+        tempos.append(time.perf_counter() - inicio)
+    sistema.fechar_comanda(comanda.id)
+    return tempos
+
+
+def resumo(nome, tempos):
+    tempos_ms = sorted(t * 1000 for t in tempos)
+    p95 = tempos_ms[int(len(tempos_ms) * 0.95) - 1]
+    print(f"{nome:<25} mediana {statistics.median(tempos_ms):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operacoes', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome, classe in (("conexão por operação", SistemaBarSemPool), ("conexão compartilhada", SistemaBar)):
+            db_path = os.path.join(pasta, f"{classe.__name__}.db")
+            create_database(db_path)
+            tempos = medir(classe(db_path), args.operacoes)
+            resumo(nome, tempos)
+        fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
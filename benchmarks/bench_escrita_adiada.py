@@ -0,0 +1,95 @@
+"""Compara a latência de lançamento de itens com gravação imediata e com a
+escrita adiada (fila + gravação em grupo, veja escrita.py).
+
+Também verifica a recuperação: um processo lança itens no modo adiado e
+morre (os._exit) antes da gravação; ao reabrir o banco, todos os itens
+devem estar lá, sem duplicatas.
+
+Uso: python benchmarks/bench_escrita_adiada.py [--operacoes 2000]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from barsystem import SistemaBar
+from database import fechar_conexoes
+
+# Executado em um processo separado, que termina sem gravar a fila
+SCRIPT_QUEDA = '''
+import os, sys
+sys.path.insert(0, {raiz!r})
+from barsystem import SistemaBar
+sistema = SistemaBar({db!r}, escrita_adiada=True)
+sistema.fila.intervalo = 3600  # nada é gravado antes da queda
+produto = sistema.produtos[1]
+comanda = sistema.listar_comandas_abertas()[0]
+for _ in range({itens}):
+    sistema.adicionar_item_comanda(comanda.id, produto.id, 1)
+os._exit(0)
+'''
+
+
+def medir(db_path, operacoes, escrita_adiada):
+    sistema = SistemaBar(db_path, escrita_adiada=escrita_adiada)
+    produto = sistema.adicionar_produto("Cerveja", 10.0, "Bebidas", operacoes * 10)
+    comanda = sistema.abrir_comanda(1, "Benchmark")
+    tempos = []
+    for _ in range(operacoes):
+        inicio = time.perf_counter()
+        sistema.adicionar_item_comanda(comanda.id, produto.id, 1)
+        tempos.append(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    sistema.fechar_comanda(comanda.id)
+    fechamento = time.perf_counter() - inicio
+    if sistema.fila is not None:
+        sistema.fila.fechar()
+    return tempos, fechamento
+
+
+def verificar_recuperacao(pasta, itens):
+    db_path = os.path.join(pasta, 'queda.db')
+    sistema = SistemaBar(db_path)
+    sistema.adicionar_produto("Cerveja", 10.0, "Bebidas", itens * 10)
+    sistema.abrir_comanda(1, "Queda")
+    fechar_conexoes()
+
+    subprocess.run([sys.executable, '-c', SCRIPT_QUEDA.format(raiz=RAIZ, db=db_path, itens=itens)], check=True)
+
+    antes = sqlite3.connect(db_path).execute('SELECT COUNT(*) FROM itens_comanda').fetchone()[0]
+    SistemaBar(db_path)  # a inicialização reaplica o diário
+    SistemaBar(db_path)  # e uma segunda vez não pode duplicar nada
+    depois = sqlite3.connect(db_path).execute('SELECT COUNT(*) FROM itens_comanda').fetchone()[0]
+    fechar_conexoes()
+    return antes, depois
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--operacoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome, adiada in (("imediata", False), ("adiada", True)):
+            tempos, fechamento = medir(os.path.join(pasta, f'{nome}.db'), args.operacoes, adiada)
+            tempos_us = sorted(t * 1e6 for t in tempos)
+            print(f"{nome:<10} mediana {statistics.median(tempos_us):9.1f} µs   "
+                  f"p99 {tempos_us[int(len(tempos_us) * 0.99) - 1]:9.1f} µs   "
+                  f"fechamento {fechamento * 1000:7.1f} ms")
+            fechar_conexoes()
+
+        antes, depois = verificar_recuperacao(pasta, 100)
+        print(f"recuperação: {antes} itens no banco após a queda, {depois} após reabrir (esperado 100)")
+        if depois != 100:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
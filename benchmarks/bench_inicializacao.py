@@ -0,0 +1,84 @@
+"""Mede o tempo de criação do SistemaBar sobre um banco com muito histórico.
+
+Gera um banco temporário com N linhas em itens_comanda (todas em comandas
+fechadas, mais algumas comandas abertas) e compara a carga completa do
+histórico com a carga padrão, que traz apenas catálogo, mesas e comandas
+abertas. Sai com código 1 se a carga padrão passar do orçamento.
+
+Uso: python benchmarks/bench_inicializacao.py [--itens 1000000] [--orcamento-ms 500]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barsystem import SistemaBar
+from database import fechar_conexoes
+from init_db import create_database
+
+ITENS_POR_COMANDA = 5
+
+
+def popular(db_path, total_itens, produtos=200, comandas_abertas=10):
+    create_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO produtos (id, nome, preco_centavos, categoria, estoque) VALUES (?, ?, ?, ?, ?)',
+        ((i, f"Produto {i}", 1000, "Bebidas", 1000) for i in range(1, produtos + 1))
+    )
+    total_comandas = total_itens // ITENS_POR_COMANDA
+    conn.executemany(
+        'INSERT INTO comandas (id, mesa, status, hora_abertura, hora_fechamento) VALUES (?, ?, ?, ?, ?)',
+        ((i, 1 + i % 10, "fechada", "2024-01-01 10:00:00", "2024-01-01 11:00:00") for i in range(1, total_comandas + 1))
+    )
+    conn.executemany(
+        'INSERT INTO comandas (id, mesa, status, hora_abertura) VALUES (?, ?, ?, ?)',
+        ((total_comandas + i, i, "aberta", "2024-01-02 10:00:00") for i in range(1, comandas_abertas + 1))
+    )
+    conn.executemany(
+        'INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario_centavos, subtotal_centavos) VALUES (?, ?, ?, ?, ?, ?)',
+        ((1 + i // ITENS_POR_COMANDA, 1 + i % produtos, 1, f"Produto {1 + i % produtos}", 1000, 1000) for i in range(total_itens))
+    )
+    conn.execute("UPDATE contadores SET valor = ? WHERE nome = 'proximo_id_comanda'", (total_comandas + comandas_abertas + 1,))
+    conn.commit()
+    conn.close()
+
+
+def medir(db_path, carregar_historico):
+    inicio = time.perf_counter()
+    sistema = SistemaBar(db_path, carregar_historico=carregar_historico)
+    decorrido = time.perf_counter() - inicio
+    return decorrido * 1000, len(sistema.comandas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--itens', type=int, default=1_000_000)
+    parser.add_argument('--orcamento-ms', type=float, default=500.0)
+    parser.add_argument('--sem-historico-completo', action='store_true',
+                        help="não mede a carga completa do histórico (mais lenta)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'bench.db')
+        print(f"Gerando banco com {args.itens} itens...")
+        popular(db_path, args.itens)
+
+        if not args.sem_historico_completo:
+            ms, comandas = medir(db_path, carregar_historico=True)
+            print(f"{'histórico completo':<20} {ms:10.1f} ms   {comandas} comandas em memória")
+        ms, comandas = medir(db_path, carregar_historico=False)
+        print(f"{'somente abertas':<20} {ms:10.1f} ms   {comandas} comandas em memória")
+        fechar_conexoes()
+
+    if ms > args.orcamento_ms:
+        print(f"Orçamento de {args.orcamento_ms:.0f} ms excedido.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Vazão de login com vários logins simultâneos.
+
+Cadastra N usuários em um banco temporário e compara:
+- sequencial: um login depois do outro, o bcrypt na thread de quem chama
+  (como era antes);
+- simultâneo: N chamadas a autenticar_async de uma vez, com o bcrypt nas
+  threads de trabalho. Também mede quanto tempo quem chama fica bloqueado
+  para disparar os N logins (deve ser praticamente zero).
+
+O ganho do modo simultâneo depende do número de núcleos da máquina.
+
+Uso: python benchmarks/bench_login.py [--usuarios 16] [--custo 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_system import SistemaAutenticacao
+from database import fechar_conexoes
+
+
+def mostrar(rotulo, segundos, tempos):
+    tempos = sorted(t * 1000 for t in tempos)
+    print(f"{rotulo:<12} {len(tempos) / segundos:8.1f} logins/s   "
+          f"mediana {tempos[len(tempos) // 2]:7.1f} ms   máx {tempos[-1]:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--usuarios', type=int, default=16)
+    parser.add_argument('--custo', type=int, default=10, help="custo do bcrypt (padrão 10, para o teste ser rápido)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        auth = SistemaAutenticacao(os.path.join(pasta, 'login.db'))
+        auth._custo = args.custo
+        nomes = [f"usuario{i}" for i in range(args.usuarios)]
+        for cadastro in [auth.cadastrar_usuario_async(nome, 'senha123', 'Bar') for nome in nomes]:
+            assert cadastro.result() is not None
+
+        print(f"{args.usuarios} usuários, custo {args.custo}, {os.cpu_count()} núcleo(s)")
+
+        tempos = []
+        inicio = time.perf_counter()
+        for nome in nomes:
+            t = time.perf_counter()
+            assert auth._autenticar(nome, 'senha123') is not None
+            tempos.append(time.perf_counter() - t)
+        mostrar("sequencial", time.perf_counter() - inicio, tempos)
+
+        inicio = time.perf_counter()
+        futuros = [auth.autenticar_async(nome, 'senha123') for nome in nomes]
+        bloqueado = time.perf_counter() - inicio
+        tempos = []
+        for futuro in futuros:
+            assert futuro.result() is not None
+            tempos.append(time.perf_counter() - inicio)
+        mostrar("simultâneo", time.perf_counter() - inicio, tempos)
+        print(f"quem chamou ficou bloqueado {bloqueado * 1000:.2f} ms para disparar {args.usuarios} logins")
+        fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Mede a memória ocupada por itens de comanda em memória.
+
+Monta um conjunto sintético de comandas (5 itens cada, nomes vindos de um
+catálogo de 200 produtos, como se lidos do SQLite: uma string nova por
+linha) e mede com tracemalloc os bytes por item com os modelos antigos
+(classes com __dict__, sem internar textos) e com os atuais.
+
+Uso: python benchmarks/bench_memoria.py [--itens 500000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barsystem import Comanda, ItemComanda
+
+ITENS_POR_COMANDA = 5
+PRODUTOS = 200
+
+
+class ItemComandaAntigo:
+    def __init__(self, produto_id, quantidade, nome_produto, preco_unitario):
+        self.produto_id = produto_id
+        self.quantidade = quantidade
+        self.nome_produto = nome_produto
+        self.preco_unitario = preco_unitario
+        self.subtotal = quantidade * preco_unitario
+
+
+class ComandaAntiga:
+    def __init__(self, id, mesa, status, hora_abertura):
+        self.id = id
+        self.mesa = mesa
+        self.status = status
+        self.hora_abertura = hora_abertura
+        self.hora_fechamento = None
+        self.itens = []
+        self.nome_cliente = None
+
+
+def linhas(total_itens):
+    """Simula as linhas lidas do banco: cada texto é um objeto str novo."""
+    for i in range(total_itens):
+        produto_id = i % PRODUTOS + 1
+        yield i // ITENS_POR_COMANDA, produto_id, "".join(["Produto ", str(produto_id)]), 1000
+
+
+def carregar_antigo(total_itens):
+    comandas = {}
+    for comanda_id, produto_id, nome, preco in linhas(total_itens):
+        comanda = comandas.get(comanda_id)
+        if comanda is None:
+            comanda = comandas[comanda_id] = ComandaAntiga(comanda_id, 1, "".join(["fech", "ada"]), "2024-01-01 10:00:00")
+        comanda.itens.append(ItemComandaAntigo(produto_id, 1, nome, preco / 100))
+    return comandas
+
+
+def carregar_atual(total_itens):
+    comandas = {}
+    for comanda_id, produto_id, nome, preco in linhas(total_itens):
+        comanda = comandas.get(comanda_id)
+        if comanda is None:
+            comanda = comandas[comanda_id] = Comanda(comanda_id, 1, "".join(["fech", "ada"]), "2024-01-01 10:00:00")
+        comanda.adicionar_item(ItemComanda(produto_id, 1, nome, preco))
+    return comandas
+
+
+def medir(carregar, total_itens):
+    gc.collect()
+    tracemalloc.start()
+    dados = carregar(total_itens)
+    usado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del dados
+    return usado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--itens', type=int, default=500_000)
+    args = parser.parse_args()
+
+    antes = medir(carregar_antigo, args.itens)
+    depois = medir(carregar_atual, args.itens)
+    print(f"{args.itens} itens em {args.itens // ITENS_POR_COMANDA} comandas")
+    print(f"{'antes':<8} {antes / 1e6:8.1f} MB  {antes / args.itens:6.0f} bytes/item")
+    print(f"{'depois':<8} {depois / 1e6:8.1f} MB  {depois / args.itens:6.0f} bytes/item")
+    print(f"redução: {100 * (1 - depois / antes):.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Mede a migração dos arquivos JSON antigos (init_db.migrate_data).
+
+Gera uma pasta dados/ temporária no formato da versão antiga, com N
+comandas fechadas e alguns usuários, e mede a migração para um banco novo.
+Em seguida roda a migração de novo para conferir que ela é retomável: os
+arquivos já migrados são pulados e nenhum item é duplicado.
+
+Uso: python benchmarks/bench_migracao.py [--comandas 100000] [--usuarios 16] [--custo 4]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from init_db import create_database, migrate_data
+
+ITENS_POR_COMANDA = 5
+
+
+def gerar_dados(pasta, comandas, usuarios, produtos=200):
+    os.makedirs(pasta)
+
+    def gravar(nome, dados):
+        with open(os.path.join(pasta, nome), 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, ensure_ascii=False)
+
+    gravar('produtos.json', {str(i): {"nome": f"Produto {i}", "preco": 12.5, "categoria": "Bebidas", "estoque": 100}
+                             for i in range(1, produtos + 1)})
+    gravar('usuarios.json', {str(i): {"nome_usuario": f"usuario{i}", "senha": f"senha{i}", "nome_empresa": "Bar"}
+                             for i in range(1, usuarios + 1)})
+    gravar('mesas.json', {str(i): None for i in range(1, 11)})
+    gravar('comandas.json', {
+        str(i): {
+            "mesa": 1 + i % 10, "status": "fechada", "nome_cliente": f"Cliente {i}",
+            "hora_abertura": "01/01/2024 10:00:00", "hora_fechamento": "01/01/2024 11:00:00",
+            "itens": [{"produto_id": 1 + (i + j) % produtos, "nome_produto": f"Produto {1 + (i + j) % produtos}",
+                       "quantidade": 1, "preco_unitario": 12.5} for j in range(ITENS_POR_COMANDA)],
+        } for i in range(1, comandas + 1)
+    })
+    gravar('contadores.json', {"proximo_id_produto": produtos + 1, "proximo_id_comanda": comandas + 1})
+    gravar('contador_usuario.json', {"proximo_id_usuario": usuarios + 1})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comandas', type=int, default=100000)
+    parser.add_argument('--usuarios', type=int, default=16)
+    parser.add_argument('--custo', type=int, default=4, help="custo bcrypt dos usuários migrados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta = os.path.join(temporario, 'dados')
+        db_path = os.path.join(temporario, 'migracao.db')
+        gerar_dados(pasta, args.comandas, args.usuarios)
+        create_database(db_path)
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO configuracoes (nome, valor) VALUES ('custo_bcrypt', ?)", (str(args.custo),))
+        conn.close()
+
+        inicio = time.perf_counter()
+        migrate_data(db_path, pasta)
+        primeira = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        migrate_data(db_path, pasta)
+        segunda = time.perf_counter() - inicio
+
+        conn = sqlite3.connect(db_path)
+        itens = conn.execute('SELECT COUNT(*) FROM itens_comanda').fetchone()[0]
+        usuarios = conn.execute('SELECT COUNT(*) FROM usuarios').fetchone()[0]
+        indices = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchone()[0]
+        conn.close()
+
+    print(f"{args.comandas} comandas ({itens} itens) e {usuarios} usuários migrados em {primeira:.2f} s "
+          f"({itens / primeira:.0f} itens/s)")
+    print(f"segunda execução (retomada, nada a fazer): {segunda * 1000:.1f} ms")
+    if itens != args.comandas * ITENS_POR_COMANDA or usuarios != args.usuarios or not indices:
+        print("FALHOU: contagens ou índices não conferem depois de migrar duas vezes.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
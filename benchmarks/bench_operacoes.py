@@ -0,0 +1,195 @@
+"""Latência e vazão das operações do SistemaBar em vários tamanhos de histórico.
+
+Para cada tamanho (quantidade de comandas fechadas no histórico, 100 por
+dia) monta um banco novo, temporário ou em memória (--memoria), com o
+catálogo, as mesas e os resumos de vendas, e mede cada operação separadamente:
+abrir_comanda, adicionar_item_comanda, remover_item_comanda, fechar_comanda,
+registrar_venda_rapida, recarregar (carregar_dados) e os relatórios.
+
+Mostra a mediana, p90, p99, o máximo e a vazão de cada operação. Com --json
+os resultados (e o commit, a versão do Python e do SQLite) são gravados em
+um arquivo; --comparar mostra a variação da mediana em relação a um arquivo
+gravado antes, para comparar commits.
+
+Uso: python benchmarks/bench_operacoes.py [--tamanhos 1000,10000,100000] [--repeticoes 200]
+                                          [--memoria] [--json resultados.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import resumos
+from barsystem import ItemComanda, SistemaBar, VendaRapida
+from database import fechar_conexoes, obter_gerenciador
+
+PRODUTOS = 200
+VENDIDOS = 180  # os demais ficam abaixo do estoque mínimo, para o relatório de estoque baixo
+ITENS_POR_COMANDA = 5
+COMANDAS_POR_DIA = 100
+INICIO_HISTORICO = datetime(2024, 1, 1)
+DIA_HISTORICO = "2024-01-01"
+
+
+def popular(db_path, comandas, mesas):
+    """Grava catálogo, mesas e `comandas` comandas fechadas pela conexão que o SistemaBar vai usar
+    (num banco em memória, outra conexão veria um banco vazio)."""
+    conn = obter_gerenciador(db_path).conexao()
+    with conn:
+        conn.executemany(
+            'INSERT INTO produtos (id, nome, preco_centavos, categoria, estoque) VALUES (?, ?, ?, ?, ?)',
+            ((i, f"Produto {i}", 1000 + i, "Bebidas" if i % 2 else "Petiscos", 10 ** 9 if i <= VENDIDOS else 5)
+             for i in range(1, PRODUTOS + 1))
+        )
+        conn.executemany('INSERT INTO mesas (id, comanda_id) VALUES (?, NULL)', ((i,) for i in range(1, mesas + 1)))
+
+        def historico():
+            for i in range(1, comandas + 1):
+                abertura = INICIO_HISTORICO + timedelta(days=i // COMANDAS_POR_DIA, hours=i % 24)
+                yield (i, 1 + i % mesas, "fechada", abertura.strftime("%Y-%m-%d %H:%M:%S"),
+                       (abertura + timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S"))
+
+        conn.executemany('INSERT INTO comandas (id, mesa, status, hora_abertura, hora_fechamento) VALUES (?, ?, ?, ?, ?)',
+                         historico())
+        conn.executemany(
+            'INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario_centavos, subtotal_centavos) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            ((i, produto, 1, f"Produto {produto}", 1000 + produto, 1000 + produto)
+             for i in range(1, comandas + 1)
+             for produto in (1 + (i * 7 + j) % VENDIDOS for j in range(ITENS_POR_COMANDA)))
+        )
+        conn.execute("INSERT OR REPLACE INTO contadores (nome, valor) VALUES ('proximo_id_comanda', ?)", (comandas + 1,))
+        conn.execute("INSERT OR REPLACE INTO contadores (nome, valor) VALUES ('proximo_id_produto', ?)", (PRODUTOS + 1,))
+    resumos.reconstruir(conn)
+
+
+def medir(tempos, operacao, funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    tempos.setdefault(operacao, []).append(time.perf_counter() - inicio)
+    if resultado is None or resultado is False:
+        raise RuntimeError(f"{operacao} falhou")
+    return resultado
+
+
+def percentil(ordenados, fracao):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+
+def estatisticas(tempos):
+    ordenados = sorted(t * 1000 for t in tempos)
+    return {
+        "amostras": len(ordenados),
+        "media_ms": statistics.fmean(ordenados),
+        "p50_ms": percentil(ordenados, 0.50),
+        "p90_ms": percentil(ordenados, 0.90),
+        "p99_ms": percentil(ordenados, 0.99),
+        "max_ms": ordenados[-1],
+        "ops_por_segundo": len(ordenados) / (sum(ordenados) / 1000) if sum(ordenados) else 0.0,
+    }
+
+
+def executar(db_path, comandas, repeticoes):
+    """Mede as operações sobre um banco com `comandas` comandas no histórico."""
+    popular(db_path, comandas, mesas=repeticoes)
+    sistema = SistemaBar(db_path)
+    tempos = {}
+
+    for rodada in range(repeticoes):
+        mesa = 1 + rodada
+        comanda = medir(tempos, "abrir_comanda", sistema.abrir_comanda, mesa, f"Cliente {rodada}")
+        for j in range(ITENS_POR_COMANDA):
+            medir(tempos, "adicionar_item_comanda", sistema.adicionar_item_comanda, comanda.id, 1 + (rodada + j) % VENDIDOS, 2)
+        medir(tempos, "remover_item_comanda", sistema.remover_item_comanda, comanda.id, 1 + rodada % VENDIDOS, 1)
+        medir(tempos, "fechar_comanda", sistema.fechar_comanda, comanda.id)
+
+        venda = VendaRapida()
+        for j in range(3):
+            produto = sistema.produtos[1 + (rodada * 3 + j) % VENDIDOS]
+            venda.adicionar_item(ItemComanda(produto.id, 1, produto.nome, produto.preco_centavos))
+        medir(tempos, "registrar_venda_rapida", sistema.registrar_venda_rapida, venda)
+
+    for _ in range(max(1, repeticoes // 10)):
+        medir(tempos, "carregar_dados", lambda: sistema.recarregar() or True)
+    for _ in range(repeticoes):
+        medir(tempos, "resumo_vendas", sistema.resumo_vendas, "dia", DIA_HISTORICO, DIA_HISTORICO)
+        medir(tempos, "produtos_mais_vendidos", sistema.produtos_mais_vendidos, "mes", DIA_HISTORICO[:7], DIA_HISTORICO[:7], 10)
+        medir(tempos, "produtos_estoque_baixo", sistema.produtos_estoque_baixo)
+    for _ in range(max(1, repeticoes // 10)):
+        medir(tempos, "buscar_comandas_dia", sistema.buscar_comandas_dia, INICIO_HISTORICO, "hora_fechamento")
+
+    sistema.sincronizar()
+    return {operacao: estatisticas(amostras) for operacao, amostras in tempos.items()}
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', default='1000,10000,100000',
+                        help="comandas fechadas no histórico, separadas por vírgula")
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--memoria', action='store_true', help="usa um banco em memória em vez de um arquivo temporário")
+    parser.add_argument('--json', help="grava os resultados neste arquivo")
+    parser.add_argument('--comparar', help="resultados gravados antes com --json, para comparar a mediana")
+    args = parser.parse_args()
+
+    tamanhos = [int(tamanho) for tamanho in args.tamanhos.split(',')]
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)["resultados"]
+
+    resultados = {}
+    for tamanho in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db_path = ':memory:' if args.memoria else os.path.join(pasta, 'operacoes.db')
+            try:
+                resultados[str(tamanho)] = executar(db_path, tamanho, args.repeticoes)
+            finally:
+                # Conexões fechadas antes de apagar a pasta; em memória, o próximo tamanho começa de um banco vazio
+                fechar_conexoes()
+
+        print(f"\nHistórico de {tamanho} comandas ({args.repeticoes} repetições, banco {'em memória' if args.memoria else 'em arquivo'})")
+        print(f"{'operação':<24} {'mediana':>9} {'p90':>9} {'p99':>9} {'máx':>9} {'ops/s':>9}" + ("  vs. anterior" if anterior else ""))
+        for operacao, medida in resultados[str(tamanho)].items():
+            linha = (f"{operacao:<24} {medida['p50_ms']:>9.3f} {medida['p90_ms']:>9.3f} {medida['p99_ms']:>9.3f} "
+                     f"{medida['max_ms']:>9.3f} {medida['ops_por_segundo']:>9.0f}")
+            antes = (anterior or {}).get(str(tamanho), {}).get(operacao)
+            if antes and antes['p50_ms']:
+                linha += f"  {(medida['p50_ms'] / antes['p50_ms'] - 1) * 100:+.0f}%"
+            print(linha)
+    print("\n(tempos em ms)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                "commit": commit_atual(),
+                "data": datetime.now().isoformat(timespec='seconds'),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "banco": "memoria" if args.memoria else "arquivo",
+                "repeticoes": args.repeticoes,
+                "resultados": resultados,
+            }, arquivo, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
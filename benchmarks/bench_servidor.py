@@ -0,0 +1,111 @@
+"""Carga no serviço local (servidor.py) com muitos clientes simultâneos.
+
+Sobe o serviço em um processo separado sobre um banco temporário e abre N
+clientes asyncio; cada um abre uma comanda em sua mesa, lança itens (uma
+requisição por item, com keep-alive) e fecha a comanda. Mostra a vazão e as
+latências por requisição.
+
+Uso: python benchmarks/bench_servidor.py [--clientes 50] [--itens 100] [--escrita-adiada]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from barsystem import SistemaBar
+from database import fechar_conexoes
+
+
+async def requisicao(reader, writer, metodo, caminho, dados=None):
+    corpo = json.dumps(dados).encode() if dados is not None else b''
+    writer.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    tamanho = 0
+    while True:
+        linha = await reader.readline()
+        if linha == b'\r\n':
+            break
+        if linha.lower().startswith(b'content-length:'):
+            tamanho = int(linha.split(b':')[1])
+    return status, json.loads(await reader.readexactly(tamanho))
+
+
+async def cliente(porta, mesa, itens, tempos):
+    reader, writer = await asyncio.open_connection('127.0.0.1', porta)
+    status, comanda = await requisicao(reader, writer, 'POST', '/comandas/abrir', {"mesa": mesa, "nome_cliente": f"Cliente {mesa}"})
+    assert status == 200, comanda
+    for _ in range(itens):
+        inicio = time.perf_counter()
+        status, resposta = await requisicao(reader, writer, 'POST', '/comandas/itens',
+                                            {"comanda_id": comanda["id"], "produto_id": 1, "quantidade": 1})
+        tempos.append(time.perf_counter() - inicio)
+        assert status == 200, resposta
+    status, resposta = await requisicao(reader, writer, 'POST', '/comandas/fechar', {"comanda_id": comanda["id"]})
+    assert status == 200, resposta
+    writer.close()
+    return resposta["total_centavos"]
+
+
+async def executar(porta, clientes, itens):
+    tempos = []
+    inicio = time.perf_counter()
+    totais = await asyncio.gather(*(cliente(porta, 100 + i, itens, tempos) for i in range(clientes)))
+    return time.perf_counter() - inicio, tempos, totais
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--itens', type=int, default=100)
+    parser.add_argument('--escrita-adiada', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'servidor.db')
+        sistema = SistemaBar(db_path)
+        sistema.adicionar_produto("Cerveja", 10.0, "Bebidas", args.clientes * args.itens)
+        for i in range(args.clientes):
+            sistema.adicionar_mesa(100 + i)
+        fechar_conexoes()
+
+        porta = porta_livre()
+        comando = [sys.executable, os.path.join(RAIZ, 'servidor.py'), '--db', db_path, '--porta', str(porta)]
+        if args.escrita_adiada:
+            comando.append('--escrita-adiada')
+        processo = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+        try:
+            processo.stdout.readline()  # "Servindo em ..."
+            segundos, tempos, totais = asyncio.run(executar(porta, args.clientes, args.itens))
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    tempos_ms = sorted(t * 1000 for t in tempos)
+    print(f"{args.clientes} clientes x {args.itens} itens: {len(tempos)} requisições em {segundos:.2f} s "
+          f"({len(tempos) / segundos:.0f} req/s)")
+    print(f"latência mediana {statistics.median(tempos_ms):.2f} ms   "
+          f"p99 {tempos_ms[int(len(tempos_ms) * 0.99) - 1]:.2f} ms")
+    esperado = args.itens * 1000
+    if any(total != esperado for total in totais):
+        print("FALHOU: total de alguma comanda não confere.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Relatório de tempo de inicialização do aplicativo de terminal.
+
+Mostra o detalhamento de `python -X importtime -c "import main"` (módulos
+mais caros) e o tempo até o primeiro menu: processo novo, importação,
+tela de login e construção da interface do bar sobre um banco vazio.
+Os valores são comparados com benchmarks/orcamento_inicializacao.json;
+o script sai com código 1 se algum orçamento for excedido ou se um módulo
+pesado (pandas, openpyxl, bcrypt...) for importado antes do primeiro menu.
+
+Uso: python benchmarks/bench_tempo_menu.py [--repeticoes 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ORCAMENTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'orcamento_inicializacao.json')
+
+# Executado em um processo novo, dentro de uma pasta temporária (banco vazio)
+SCRIPT_PRIMEIRO_MENU = '''
+import builtins, io, json, os, sys
+sys.path.insert(0, {raiz!r})
+os.system = lambda comando: 0
+builtins.input = lambda mensagem="": "0"
+sys.stdout = io.StringIO()
+
+from main import InterfaceBarPersonalizada
+from auth_system import AuthInterface
+
+AuthInterface()
+interface = InterfaceBarPersonalizada()
+interface.menu_principal()
+
+sys.stdout = sys.__stdout__
+print(json.dumps(sorted(sys.modules)))
+'''
+
+
+def medir_importacao(repeticoes):
+    """Retorna (tempo total de `import main` em ms, {módulo: cumulativo em ms}) da melhor execução."""
+    melhor = None
+    for _ in range(repeticoes):
+        resultado = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import main'],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+        modulos = {}
+        for linha in resultado.stderr.splitlines():
+            if not linha.startswith('import time:') or 'cumulative' in linha:
+                continue
+            _, cumulativo, nome = linha[len('import time:'):].split('|')
+            modulos[nome.strip()] = int(cumulativo) / 1000
+        if melhor is None or modulos['main'] < melhor[0]:
+            melhor = (modulos['main'], modulos)
+    return melhor
+
+
+def medir_primeiro_menu(repeticoes):
+    """Retorna (mediana em ms, módulos carregados) até o primeiro menu ser exibido."""
+    tempos = []
+    modulos = []
+    for _ in range(repeticoes):
+        with tempfile.TemporaryDirectory() as pasta:
+            inicio = time.perf_counter()
+            resultado = subprocess.run(
+                [sys.executable, '-c', SCRIPT_PRIMEIRO_MENU.format(raiz=RAIZ)],
+                cwd=pasta, capture_output=True, text=True, check=True
+            )
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            modulos = json.loads(resultado.stdout.strip().splitlines()[-1])
+    return statistics.median(tempos), modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    with open(ORCAMENTO, encoding='utf-8') as f:
+        orcamento = json.load(f)
+
+    total_importacao, modulos = medir_importacao(args.repeticoes)
+    print(f"Módulos mais caros em 'import main' (cumulativo, melhor de {args.repeticoes}):")
+    for nome, ms in sorted(modulos.items(), key=lambda m: m[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.2f} ms  {nome}")
+
+    primeiro_menu, carregados = medir_primeiro_menu(args.repeticoes)
+    proibidos = [m for m in orcamento['modulos_proibidos'] if m in carregados]
+
+    print()
+    print(f"{'import main':<30} {total_importacao:8.1f} ms  (orçamento {orcamento['importacao_ms']} ms)")
+    print(f"{'tempo até o primeiro menu':<30} {primeiro_menu:8.1f} ms  (orçamento {orcamento['primeiro_menu_ms']} ms)")
+
+    falhas = []
+    if total_importacao > orcamento['importacao_ms']:
+        falhas.append("importação acima do orçamento")
+    if primeiro_menu > orcamento['primeiro_menu_ms']:
+        falhas.append("primeiro menu acima do orçamento")
+    if proibidos:
+        falhas.append("módulos pesados carregados na inicialização: " + ", ".join(proibidos))
+
+    if falhas:
+        print("\nFALHOU: " + "; ".join(falhas))
+        sys.exit(1)
+    print("\nDentro do orçamento.")
+
+
+if __name__ == '__main__':
+    main()
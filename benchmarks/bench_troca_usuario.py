@@ -0,0 +1,73 @@
+"""Tempo para trocar o usuário do terminal no meio do turno.
+
+Compara, sobre um banco com catálogo e comandas abertas:
+- login completo: senha conferida com bcrypt e um SistemaBar novo (carga
+  de todo o catálogo, mesas e comandas abertas), como o logout fazia;
+- troca por PIN: PIN conferido com HMAC e o mesmo SistemaBar reaproveitado,
+  só com atualizar() para trazer o que outros terminais mudaram.
+
+Uso: python benchmarks/bench_troca_usuario.py [--produtos 2000] [--trocas 50] [--custo 12]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_system import SistemaAutenticacao
+from barsystem import SistemaBar
+from database import fechar_conexoes
+
+
+def mostrar(rotulo, tempos):
+    tempos = sorted(t * 1000 for t in tempos)
+    print(f"{rotulo:<16} mediana {tempos[len(tempos) // 2]:8.2f} ms   máx {tempos[-1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--produtos', type=int, default=2000)
+    parser.add_argument('--trocas', type=int, default=50)
+    parser.add_argument('--custo', type=int, default=12, help="custo do bcrypt do login completo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'turno.db')
+        sistema = SistemaBar(db_path)
+        for i in range(args.produtos):
+            sistema.adicionar_produto(f"Produto {i}", 10.0, "Bebidas", 100)
+        sistema.adicionar_mesas(1, 100)
+        for mesa in range(1, 101):
+            comanda = sistema.abrir_comanda(mesa, f"Cliente {mesa}")
+            sistema.adicionar_itens_comanda(comanda.id, [(1 + (mesa * 7 + j) % args.produtos, 1) for j in range(5)])
+
+        autenticacao = SistemaAutenticacao(db_path)
+        autenticacao._custo = args.custo
+        garcons = [autenticacao.cadastrar_usuario(f"garcom{i}", 'senha123', 'Bar') for i in range(4)]
+        for garcom in garcons:
+            autenticacao.definir_pin(garcom.id, '1234')
+
+        print(f"{args.produtos} produtos, 100 comandas abertas, bcrypt custo {args.custo}")
+        tempos = []
+        for i in range(max(3, args.trocas // 10)):
+            inicio = time.perf_counter()
+            assert autenticacao.autenticar(garcons[i % 4].nome_usuario, 'senha123') is not None
+            SistemaBar(db_path)
+            tempos.append(time.perf_counter() - inicio)
+        mostrar("login completo", tempos)
+
+        sistema.atualizar()  # o terminal em uso já está em dia (os menus chamam atualizar)
+        tempos = []
+        for i in range(args.trocas):
+            inicio = time.perf_counter()
+            assert autenticacao.autenticar_pin(garcons[i % 4].nome_usuario, '1234') is not None
+            sistema.atualizar()
+            tempos.append(time.perf_counter() - inicio)
+        mostrar("troca por PIN", tempos)
+        fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Teste de estresse: vários terminais disputando o mesmo estoque.
+
+Cada processo cria seu próprio SistemaBar sobre o mesmo banco e, até o
+estoque acabar, alterna entre lançar itens na sua comanda e registrar
+vendas rápidas com dois produtos. No fim verifica que o estoque nunca ficou
+negativo e que estoque restante + unidades vendidas = estoque inicial.
+Sai com código 1 se alguma verificação falhar.
+
+Uso: python benchmarks/stress_estoque.py [--processos 8] [--estoque 500]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barsystem import ItemComanda, SistemaBar, VendaRapida
+from database import fechar_conexoes
+
+PRODUTOS = (1, 2)
+
+
+def terminal(db_path, mesa, barreira, semente):
+    aleatorio = random.Random(semente)
+    sistema = SistemaBar(db_path)
+    comanda = sistema.abrir_comanda(mesa, f"Terminal {mesa}")
+    barreira.wait()
+
+    vendidas = 0
+    falhas_seguidas = 0
+    while falhas_seguidas < 20:
+        quantidade = aleatorio.randint(1, 3)
+        if aleatorio.random() < 0.5:
+            ok = sistema.adicionar_item_comanda(comanda.id, aleatorio.choice(PRODUTOS), quantidade)
+            unidades = quantidade
+        else:
+            venda = VendaRapida()
+            for produto_id in PRODUTOS:
+                produto = sistema.produtos[produto_id]
+                venda.adicionar_item(ItemComanda(produto_id, quantidade, produto.nome, produto.preco_centavos))
+            ok = sistema.registrar_venda_rapida(venda)
+            unidades = quantidade * len(PRODUTOS)
+        if ok:
+            vendidas += unidades
+            falhas_seguidas = 0
+        else:
+            falhas_seguidas += 1
+    sistema.fechar_comanda(comanda.id)
+    fechar_conexoes()
+    return vendidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processos', type=int, default=8)
+    parser.add_argument('--estoque', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'estresse.db')
+        sistema = SistemaBar(db_path)
+        for produto_id in PRODUTOS:
+            sistema.adicionar_produto(f"Produto {produto_id}", 10.0, "Bebidas", args.estoque)
+        for mesa in range(1, args.processos + 1):
+            sistema.adicionar_mesa(100 + mesa)
+        fechar_conexoes()
+
+        with multiprocessing.Manager() as gerente:
+            barreira = gerente.Barrier(args.processos)
+            with multiprocessing.Pool(args.processos) as pool:
+                vendidas = pool.starmap(terminal, [(db_path, 100 + i, barreira, i) for i in range(1, args.processos + 1)])
+
+        conn = sqlite3.connect(db_path)
+        estoques = dict(conn.execute('SELECT id, estoque FROM produtos').fetchall())
+        vendidas_banco = dict(conn.execute('SELECT produto_id, SUM(quantidade) FROM itens_comanda GROUP BY produto_id').fetchall())
+        conn.close()
+
+    inicial = args.estoque * len(PRODUTOS)
+    print(f"{args.processos} processos, estoque inicial {inicial} unidades")
+    print(f"vendidas (segundo os terminais): {sum(vendidas)}")
+    falhas = []
+    for produto_id in PRODUTOS:
+        restante = estoques[produto_id]
+        vendido = vendidas_banco.get(produto_id, 0)
+        print(f"produto {produto_id}: restante {restante}, vendido {vendido}")
+        if restante < 0:
+            falhas.append(f"estoque negativo no produto {produto_id}")
+        if restante + vendido != args.estoque:
+            falhas.append(f"estoque do produto {produto_id} não confere")
+    if sum(vendidas) != sum(vendidas_banco.values()):
+        falhas.append("vendas confirmadas aos terminais diferem das gravadas")
+
+    if falhas:
+        print("FALHOU: " + "; ".join(falhas))
+        sys.exit(1)
+    print("OK: estoque nunca negativo e sem venda acima do disponível.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Índice em memória para busca de produtos por nome e categoria.
+
+A busca ignora acentos e maiúsculas ("acai" encontra "Açaí") e combina:
+- prefixo: cada palavra digitada precisa ser o começo de uma palavra do
+  produto ("cer ori" encontra "Cerveja Original"); as palavras ficam em uma
+  lista ordenada e cada prefixo é localizado por busca binária;
+- trigramas: se o prefixo não achar o bastante, produtos que compartilham
+  trigramas (trechos de 3 letras) com o texto são aceitos por semelhança,
+  o que tolera erros de digitação ("cervja").
+
+O índice é atualizado produto a produto (adicionar/remover), sem reconstrução.
+
+IndiceCategorias agrupa os produtos por categoria com a mesma normalização
+("cerveja" encontra "Cerveja"), mantendo a contagem e o estoque total de cada
+uma, para navegar por categoria sem percorrer o catálogo.
+"""
+import heapq
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+SEMELHANCA_MINIMA = 0.5
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos e converte para minúsculas."""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def palavras(texto: str) -> List[str]:
+    return ''.join(c if c.isalnum() else ' ' for c in normalizar(texto)).split()
+
+
+def trigramas(termos: Iterable[str]) -> Set[str]:
+    resultado = set()
+    for termo in termos:
+        termo = f"  {termo} "
+        resultado.update(termo[i:i + 3] for i in range(len(termo) - 2))
+    return resultado
+
+
+class IndiceBusca:
+    """Índice de busca sobre nome e categoria dos produtos."""
+
+    def __init__(self):
+        self._palavras: List[Tuple[str, int]] = []  # (palavra, produto_id), ordenada
+        self._trigramas: Dict[str, Set[int]] = {}
+        self._documentos: Dict[int, Tuple[FrozenSet[str], Set[str], str]] = {}  # id -> (palavras, trigramas, nome normalizado)
+
+    def __len__(self):
+        return len(self._documentos)
+
+    def _indexar(self, produto) -> FrozenSet[str]:
+        termos = frozenset(palavras(produto.nome)) | frozenset(palavras(produto.categoria))
+        grams = trigramas(palavras(produto.nome))
+        self._documentos[produto.id] = (termos, grams, normalizar(produto.nome))
+        for gram in grams:
+            self._trigramas.setdefault(gram, set()).add(produto.id)
+        return termos
+
+    def adicionar(self, produto):
+        """Indexa (ou reindexa) um produto."""
+        self.remover(produto.id)
+        for termo in self._indexar(produto):
+            insort(self._palavras, (termo, produto.id))
+
+    def remover(self, produto_id: int):
+        documento = self._documentos.pop(produto_id, None)
+        if documento is None:
+            return
+        termos, grams, _ = documento
+        for termo in termos:
+            posicao = bisect_left(self._palavras, (termo, produto_id))
+            if posicao < len(self._palavras) and self._palavras[posicao] == (termo, produto_id):
+                del self._palavras[posicao]
+        for gram in grams:
+            ids = self._trigramas.get(gram)
+            if ids is not None:
+                ids.discard(produto_id)
+                if not ids:
+                    del self._trigramas[gram]
+
+    def reconstruir(self, produtos: Iterable):
+        """Indexa todos os produtos de uma vez, ordenando as palavras uma única vez no fim."""
+        self._palavras.clear()
+        self._trigramas.clear()
+        self._documentos.clear()
+        for produto in produtos:
+            self._palavras.extend((termo, produto.id) for termo in self._indexar(produto))
+        self._palavras.sort()
+
+    def _com_prefixo(self, prefixo: str) -> Set[int]:
+        # Todas as palavras que começam com o prefixo ficam entre (prefixo,) e (prefixo + maior caractere,)
+        inicio = bisect_left(self._palavras, (prefixo,))
+        fim = bisect_left(self._palavras, (prefixo + '\U0010ffff',), inicio)
+        return {produto_id for _, produto_id in self._palavras[inicio:fim]}
+
+    def buscar(self, consulta: str, limite: int = 10) -> List[int]:
+        """Ids dos produtos que correspondem à consulta, do mais ao menos relevante."""
+        termos = palavras(consulta)
+        if not termos:
+            return []
+        texto = ' '.join(termos)
+
+        # Prefixo: todas as palavras digitadas precisam casar
+        encontrados = self._com_prefixo(termos[0])
+        for termo in termos[1:]:
+            if not encontrados:
+                break
+            encontrados &= self._com_prefixo(termo)
+
+        # Ordenação: (-pontos, nome, id); prefixo vale 2, +1 se o nome começa pelo texto, +0,25 por palavra completa
+        pedidos = frozenset(termos)
+        documentos = self._documentos
+        candidatos = []
+        for produto_id in encontrados:
+            termos_produto, _, nome = documentos[produto_id]
+            pontos = 2.0 + nome.startswith(texto) + 0.25 * len(pedidos & termos_produto)
+            candidatos.append((-pontos, nome, produto_id))
+
+        # Trigramas: completa o resultado tolerando erros de digitação
+        if len(candidatos) < limite:
+            grams = trigramas(termos)
+            contagem = Counter(chain.from_iterable(self._trigramas.get(gram, ()) for gram in grams))
+            for produto_id, comuns in contagem.items():
+                # Fração dos trigramas digitados presentes no nome do produto
+                semelhanca = comuns / len(grams)
+                if semelhanca >= SEMELHANCA_MINIMA and produto_id not in encontrados:
+                    candidatos.append((-semelhanca, documentos[produto_id][2], produto_id))
+
+        return [produto_id for _, _, produto_id in heapq.nsmallest(limite, candidatos)]
+
+
+class _Categoria:
+    __slots__ = ('nome', 'ids', 'estoque')
+
+    def __init__(self, nome: str):
+        self.nome = nome  # grafia do primeiro produto cadastrado na categoria
+        self.ids: List[int] = []  # ordenada
+        self.estoque = 0
+
+
+class IndiceCategorias:
+    """Produtos agrupados por categoria (sem diferenciar maiúsculas e acentos),
+    com a quantidade de produtos e o estoque total de cada uma."""
+
+    def __init__(self):
+        self._categorias: Dict[str, _Categoria] = {}
+        self._produtos: Dict[int, Tuple[str, int]] = {}  # id -> (categoria normalizada, estoque contado)
+
+    def adicionar(self, produto):
+        """Inclui (ou reposiciona) um produto na sua categoria."""
+        self.remover(produto.id)
+        chave = normalizar(produto.categoria.strip())
+        categoria = self._categorias.get(chave)
+        if categoria is None:
+            categoria = self._categorias[chave] = _Categoria(produto.categoria.strip())
+        insort(categoria.ids, produto.id)
+        categoria.estoque += produto.estoque
+        self._produtos[produto.id] = (chave, produto.estoque)
+
+    def remover(self, produto_id: int):
+        registro = self._produtos.pop(produto_id, None)
+        if registro is None:
+            return
+        chave, estoque = registro
+        categoria = self._categorias[chave]
+        del categoria.ids[bisect_left(categoria.ids, produto_id)]
+        categoria.estoque -= estoque
+        if not categoria.ids:
+            del self._categorias[chave]
+
+    def atualizar_estoque(self, produto):
+        """Acerta o estoque total da categoria depois de mudar o estoque do produto."""
+        registro = self._produtos.get(produto.id)
+        if registro is None:
+            return
+        chave, estoque = registro
+        self._categorias[chave].estoque += produto.estoque - estoque
+        self._produtos[produto.id] = (chave, produto.estoque)
+
+    def reconstruir(self, produtos: Iterable):
+        self._categorias.clear()
+        self._produtos.clear()
+        for produto in produtos:
+            self.adicionar(produto)
+
+    def ids(self, categoria: str) -> List[int]:
+        """Ids dos produtos da categoria, em ordem crescente."""
+        encontrada = self._categorias.get(normalizar(categoria.strip()))
+        return list(encontrada.ids) if encontrada else []
+
+    def listar(self) -> List[Tuple[str, int, int]]:
+        """(categoria, quantidade de produtos, estoque total) de cada categoria, em ordem alfabética."""
+        return [(categoria.nome, len(categoria.ids), categoria.estoque)
+                for _, categoria in sorted(self._categorias.items())]
@@ -0,0 +1,86 @@
+import atexit
+import sqlite3
+import threading
+from typing import Dict, List
+
+from migrations import aplicar_migracoes
+
+# Quantidade de comandos SQL preparados mantidos em cache por conexão
+TAMANHO_CACHE_COMANDOS = 256
+
+
+class GerenciadorConexao:
+    """Mantém conexões SQLite de longa duração, uma por thread.
+
+    O módulo sqlite3 guarda em cada conexão um cache de comandos preparados
+    (indexado pelo texto do SQL). Reaproveitando a mesma conexão, o custo de
+    abrir o arquivo e de preparar os comandos é pago uma única vez.
+    """
+
+    def __init__(self, db_path: str, cached_statements: int = TAMANHO_CACHE_COMANDOS):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._conexoes: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._esquema_verificado = False
+
+    def _abrir(self) -> sqlite3.Connection:
+        # Cada conexão só é usada pela sua thread, mas fechar() pode ser chamado
+        # de outra (na saída do programa, para as conexões de threads de trabalho)
+        conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements, timeout=30,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode = WAL')
+        if not self._esquema_verificado:
+            aplicar_migracoes(conn)
+            self._esquema_verificado = True
+        return conn
+
+    def conexao(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, abrindo-a na primeira chamada."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._abrir()
+            self._local.conn = conn
+            with self._lock:
+                self._conexoes.append(conn)
+        return conn
+
+    def fechar(self):
+        """Confirma transações pendentes e fecha todas as conexões abertas."""
+        with self._lock:
+            conexoes, self._conexoes = self._conexoes, []
+        for conn in conexoes:
+            try:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Erro ao fechar conexão: {e}")
+        self._local = threading.local()
+
+
+_gerenciadores: Dict[str, GerenciadorConexao] = {}
+_gerenciadores_lock = threading.Lock()
+
+
+def obter_gerenciador(db_path: str = 'bar_system.db') -> GerenciadorConexao:
+    """Retorna o gerenciador compartilhado para o banco informado."""
+    with _gerenciadores_lock:
+        gerenciador = _gerenciadores.get(db_path)
+        if gerenciador is None:
+            gerenciador = GerenciadorConexao(db_path)
+            _gerenciadores[db_path] = gerenciador
+        return gerenciador
+
+
+def fechar_conexoes():
+    """Fecha as conexões de todos os gerenciadores (chamado na saída do programa)."""
+    with _gerenciadores_lock:
+        gerenciadores = list(_gerenciadores.values())
+        _gerenciadores.clear()
+    for gerenciador in gerenciadores:
+        gerenciador.fechar()
+
+
+atexit.register(fechar_conexoes)
@@ -0,0 +1,364 @@
+"""Escrita adiada (write-behind) com gravação em grupo.
+
+No modo de escrita adiada, as alterações de lançamento de itens não são
+gravadas no banco na hora: cada alteração (uma lista de comandos SQL que
+devem ser aplicados juntos) é anotada em um diário em disco e colocada em
+uma fila em memória. Uma thread gravadora esvazia a fila em uma única
+transação a cada `intervalo` segundos, ou antes disso se a fila passar de
+`tamanho_lote` alterações, pagando o custo do commit uma vez por grupo.
+
+Durabilidade:
+- sincronizar() bloqueia até que tudo o que foi enfileirado esteja no banco
+  (é chamado, por exemplo, ao fechar uma comanda);
+- o diário é gravado antes de a alteração entrar na fila, então um processo
+  que morre antes da gravação não perde o trabalho: recuperar_diarios()
+  reaplica o que faltou na próxima inicialização. Cada alteração tem um
+  número de sequência, e o último número aplicado é gravado na mesma
+  transação (um contador por diário), de modo que a reaplicação nunca
+  duplica alterações.
+
+Cada fila tem o seu diário ("<banco>-fila-<pid>-<n>"), travado com um lock
+exclusivo enquanto o processo dono estiver vivo: só são reaplicados os
+diários cujo lock pode ser obtido, ou seja, de processos que já terminaram.
+
+Uma alteração que continua falhando depois de TENTATIVAS_LOTE tentativas
+(um comando inválido, por exemplo) é separada das demais, guardada em
+"<banco>-rejeitadas" e informada, para não bloquear as gravações seguintes.
+
+O diário é descarregado para o sistema operacional a cada alteração, mas sem
+fsync: sobrevive à queda do processo, não à queda de energia da máquina.
+"""
+import atexit
+import glob
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+Operacao = Tuple[str, Sequence]
+
+INTERVALO_PADRAO = 0.05  # segundos entre gravações em grupo
+TAMANHO_LOTE_PADRAO = 200  # alterações que disparam uma gravação imediata
+TENTATIVAS_LOTE = 3  # falhas seguidas de um lote antes de separar a alteração com problema
+CONTADOR_APLICADO = 'ultima_escrita_aplicada'
+
+_numero_fila = itertools.count(1)
+
+
+def caminho_diario(db_path: str, identificador: str = '') -> str:
+    """Diário de uma fila; sem identificador, o diário único das versões anteriores."""
+    return f"{db_path}-fila-{identificador}" if identificador else f"{db_path}-fila"
+
+
+def caminho_rejeitadas(db_path: str) -> str:
+    return db_path + '-rejeitadas'
+
+
+def _contador(db_path: str, caminho: str) -> str:
+    """Nome do contador da última sequência aplicada do diário em `caminho`."""
+    return CONTADOR_APLICADO + caminho[len(caminho_diario(db_path)):]
+
+
+def _travar(arquivo) -> bool:
+    """Tenta o lock exclusivo do arquivo, sem esperar; é liberado quando o arquivo é fechado
+    (ou o processo termina)."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _apagar(caminho: str):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def _ultima_aplicada(conn: sqlite3.Connection, contador: str) -> int:
+    row = conn.execute('SELECT valor FROM contadores WHERE nome = ?', (contador,)).fetchone()
+    return row[0] if row else 0
+
+
+def _ultima_alteracao(conn: sqlite3.Connection) -> int:
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM alteracoes').fetchone()[0]
+
+
+def _aplicar(conn: sqlite3.Connection, contador: str,
+             alteracoes: List[Tuple[int, List[Operacao]]]) -> Tuple[int, int]:
+    """Aplica as alterações e registra a última sequência em uma única transação.
+
+    As de sequência já registrada no contador são ignoradas. Retorna o
+    intervalo (primeira, última] dos ids de `alteracoes` criados pela transação.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        aplicada = _ultima_aplicada(conn, contador)
+        antes = _ultima_alteracao(conn)
+        novas = [(seq, operacoes) for seq, operacoes in alteracoes if seq > aplicada]
+        for _, operacoes in novas:
+            for sql, parametros in operacoes:
+                conn.execute(sql, parametros)
+        if novas:
+            conn.execute('INSERT OR REPLACE INTO contadores (nome, valor) VALUES (?, ?)', (contador, novas[-1][0]))
+        intervalo = (antes, _ultima_alteracao(conn))
+        conn.commit()
+        return intervalo
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _transitorio(erro: sqlite3.Error) -> bool:
+    """Banco ocupado por outro processo: vale tentar de novo, a alteração não tem culpa."""
+    return isinstance(erro, sqlite3.OperationalError) and ('locked' in str(erro) or 'busy' in str(erro))
+
+
+def _recuperar(conn: sqlite3.Connection, db_path: str, caminho: str) -> int:
+    try:
+        arquivo = open(caminho, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return 0
+    with arquivo:
+        # Lock ocupado: o dono está vivo e as alterações ainda estão na fila dele
+        if not _travar(arquivo):
+            return 0
+        try:
+            if os.stat(caminho).st_ino != os.fstat(arquivo.fileno()).st_ino:
+                return 0  # já recuperado e apagado por outro processo
+        except FileNotFoundError:
+            return 0
+
+        pendentes = []
+        for linha in arquivo:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                break
+            pendentes.append((registro['seq'], registro['ops']))
+        if pendentes:
+            _aplicar(conn, _contador(db_path, caminho), pendentes)
+        # Ainda com o lock; o contador só sai depois do arquivo, para uma
+        # queda entre os dois nunca deixar um diário sem o seu contador
+        if fcntl is not None:
+            _apagar(caminho)
+    if fcntl is None:
+        _apagar(caminho)  # o Windows não apaga arquivos abertos
+    with conn:
+        conn.execute('DELETE FROM contadores WHERE nome = ?', (_contador(db_path, caminho),))
+    return len(pendentes)
+
+
+def recuperar_diarios(conn: sqlite3.Connection, db_path: str) -> int:
+    """Reaplica as alterações dos diários de processos que terminaram sem gravá-las.
+
+    Retorna quantas alterações foram lidas dos diários recuperados, que são
+    apagados em seguida. Uma última linha incompleta (gravação interrompida)
+    é ignorada. Diários de processos vivos não são tocados.
+    """
+    caminhos = [caminho_diario(db_path)] + glob.glob(glob.escape(caminho_diario(db_path)) + '-*')
+    return sum(_recuperar(conn, db_path, caminho) for caminho in caminhos)
+
+
+class FilaEscrita:
+    """Fila de alterações gravadas em grupo por uma thread em segundo plano."""
+
+    def __init__(self, db_path: str, intervalo: float = INTERVALO_PADRAO,
+                 tamanho_lote: int = TAMANHO_LOTE_PADRAO):
+        self.db_path = db_path
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.rejeitadas: List[Tuple[int, str]] = []  # (sequência, erro) das alterações descartadas
+        self._pendentes: deque = deque()
+        self._proprias: List[Tuple[int, int]] = []  # intervalos de ids de `alteracoes` gravados por esta fila
+        self._condicao = threading.Condition()
+        self._urgente = False
+        self._parar = False
+        self._erro: Optional[Exception] = None
+
+        self._caminho = caminho_diario(db_path, f"{os.getpid()}-{next(_numero_fila)}")
+        self._contador = _contador(db_path, self._caminho)
+        self._diario = open(self._caminho, 'a', encoding='utf-8')
+        if not _travar(self._diario):
+            self._diario.close()
+            raise RuntimeError(f"Diário da fila de escrita em uso: {self._caminho}")
+
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            recuperar_diarios(conn, db_path)
+            # Um contador que sobrou (pid reaproveitado) só pode fazer a sequência começar mais alto
+            self._seq = self._aplicada = _ultima_aplicada(conn, self._contador)
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._executar, name='fila-escrita', daemon=True)
+        self._thread.start()
+        _filas.add(self)
+
+    def enfileirar(self, operacoes: List[Operacao]) -> int:
+        """Anota no diário e enfileira uma alteração; retorna sua sequência.
+
+        Levanta RuntimeError se a fila já foi encerrada e OSError se o diário
+        não puder ser gravado; nos dois casos a alteração não foi enfileirada.
+        """
+        with self._condicao:
+            if self._parar:
+                raise RuntimeError("Fila de escrita encerrada")
+            posicao = os.fstat(self._diario.fileno()).st_size  # o diário é descarregado a cada alteração
+            try:
+                self._diario.write(json.dumps({'seq': self._seq + 1, 'ops': operacoes}) + '\n')
+                self._diario.flush()
+            except OSError:
+                # Não deixa uma linha pela metade (ou inteira) de uma alteração recusada
+                try:
+                    self._diario.truncate(posicao)
+                except OSError:
+                    pass
+                raise
+            self._seq += 1
+            self._pendentes.append((self._seq, operacoes))
+            if len(self._pendentes) >= self.tamanho_lote:
+                self._urgente = True
+                self._condicao.notify_all()
+            elif len(self._pendentes) == 1:
+                self._condicao.notify_all()
+            return self._seq
+
+    def sincronizar(self, timeout: Optional[float] = 30.0) -> bool:
+        """Aguarda até que tudo o que foi enfileirado esteja gravado no banco."""
+        with self._condicao:
+            alvo = self._seq
+            self._urgente = True
+            self._condicao.notify_all()
+            concluido = self._condicao.wait_for(lambda: self._aplicada >= alvo or self._erro is not None, timeout)
+            if self._erro is not None:
+                print(f"Erro na gravação em segundo plano: {self._erro}")
+                self._erro = None
+                return False
+            return concluido
+
+    def somente_proprias(self, desde: int, ids: Sequence[int]) -> bool:
+        """True se todos os `ids` de `alteracoes` foram gravados por esta fila.
+
+        Intervalos até `desde` são descartados: quem chama já os leu.
+        """
+        with self._condicao:
+            self._proprias = [(primeira, ultima) for primeira, ultima in self._proprias if ultima > desde]
+            return all(any(primeira < alteracao_id <= ultima for primeira, ultima in self._proprias)
+                       for alteracao_id in ids)
+
+    def fechar(self):
+        """Grava as alterações pendentes e encerra a thread gravadora."""
+        with self._condicao:
+            if self._parar:
+                return
+            self._parar = True
+            self._condicao.notify_all()
+        self._thread.join()
+        _filas.discard(self)
+
+        with self._condicao:
+            # Fechar libera o lock; o que sobrou será reaplicado por outro processo
+            if not self._pendentes and fcntl is not None:
+                _apagar(self._caminho)
+            self._diario.close()
+            if not self._pendentes and fcntl is None:
+                _apagar(self._caminho)
+
+    def _rejeitar(self, conn: sqlite3.Connection, lote):
+        """Aplica as alterações do lote uma a uma, separando as que falham."""
+        for seq, operacoes in lote:
+            try:
+                intervalo = _aplicar(conn, self._contador, [(seq, operacoes)])
+            except sqlite3.Error as e:
+                if _transitorio(e):
+                    raise
+                with open(caminho_rejeitadas(self.db_path), 'a', encoding='utf-8') as arquivo:
+                    arquivo.write(json.dumps({'seq': seq, 'ops': operacoes, 'erro': str(e)}) + '\n')
+                with conn:
+                    conn.execute('INSERT OR REPLACE INTO contadores (nome, valor) VALUES (?, ?)', (self._contador, seq))
+                print(f"Alteração {seq} descartada após {TENTATIVAS_LOTE} tentativas ({e}); "
+                      f"guardada em {caminho_rejeitadas(self.db_path)}")
+                with self._condicao:
+                    self.rejeitadas.append((seq, str(e)))
+                    self._erro = e
+            else:
+                with self._condicao:
+                    self._proprias.append(intervalo)
+
+    def _executar(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        tentativas = 0
+        try:
+            while True:
+                with self._condicao:
+                    self._condicao.wait_for(lambda: self._pendentes or self._parar)
+                    if not self._pendentes:
+                        break
+                    # Espera o intervalo para agrupar mais alterações, salvo urgência
+                    self._condicao.wait_for(lambda: self._urgente or self._parar, self.intervalo)
+                    self._urgente = False
+                    lote = list(self._pendentes)
+
+                try:
+                    if tentativas >= TENTATIVAS_LOTE:
+                        self._rejeitar(conn, lote)
+                    else:
+                        intervalo = _aplicar(conn, self._contador, lote)
+                        with self._condicao:
+                            self._proprias.append(intervalo)
+                except sqlite3.Error as e:
+                    tentativas = 0 if _transitorio(e) else tentativas + 1
+                    with self._condicao:
+                        self._erro = e
+                        self._condicao.notify_all()
+                        if self._parar and _transitorio(e):
+                            # As alterações continuam no diário e serão reaplicadas
+                            break
+                        self._condicao.wait(self.intervalo)
+                    continue
+                tentativas = 0
+
+                with self._condicao:
+                    for _ in lote:
+                        self._pendentes.popleft()
+                    self._aplicada = lote[-1][0]
+                    if not self._pendentes:
+                        self._diario.truncate(0)
+                    self._condicao.notify_all()
+
+            if not self._pendentes:
+                # Diário vazio: o contador deste diário não é mais necessário
+                try:
+                    with conn:
+                        conn.execute('DELETE FROM contadores WHERE nome = ?', (self._contador,))
+                except sqlite3.Error:
+                    pass  # sem diário, um contador que sobrou não é lido por ninguém
+        finally:
+            conn.close()
+
+
+_filas = set()
+
+
+def fechar_filas():
+    """Grava e encerra todas as filas abertas (chamado na saída do programa)."""
+    for fila in list(_filas):
+        fila.fechar()
+
+
+atexit.register(fechar_filas)
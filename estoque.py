@@ -0,0 +1,53 @@
+"""Acompanhamento do estoque mínimo de cada produto.
+
+Cada produto tem o seu estoque mínimo (um barril e um limão não têm o mesmo
+ponto de reposição). AlertasEstoque mantém todos os produtos em uma lista
+ordenada pela folga (estoque - estoque mínimo): os que estão abaixo do
+mínimo ficam no começo e são obtidos por busca binária, sem percorrer o
+catálogo. Quando uma alteração de estoque faz um produto cruzar o mínimo,
+para baixo ou de volta para cima, os avisos inscritos são chamados.
+"""
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Tuple
+
+ESTOQUE_MINIMO_PADRAO = 10
+
+
+class AlertasEstoque:
+    def __init__(self):
+        self._folgas: List[Tuple[int, int]] = []  # (estoque - estoque_minimo, produto_id), ordenada
+        self._folga_de: Dict[int, int] = {}
+        self._avisos: List[Callable] = []
+
+    def inscrever(self, aviso: Callable):
+        """`aviso(produto, abaixo)` é chamado quando o produto cruza o mínimo;
+        `abaixo` é True ao ficar abaixo dele e False ao ser reposto."""
+        self._avisos.append(aviso)
+
+    def atualizar(self, produto):
+        """Reposiciona o produto depois de mudar o estoque ou o mínimo, avisando se cruzou o mínimo."""
+        anterior = self._folga_de.get(produto.id)
+        folga = produto.estoque - produto.estoque_minimo
+        if anterior == folga:
+            return
+        if anterior is not None:
+            del self._folgas[bisect_left(self._folgas, (anterior, produto.id))]
+        insort(self._folgas, (folga, produto.id))
+        self._folga_de[produto.id] = folga
+        if anterior is not None and (anterior < 0) != (folga < 0):
+            for aviso in self._avisos:
+                aviso(produto, folga < 0)
+
+    def remover(self, produto_id: int):
+        folga = self._folga_de.pop(produto_id, None)
+        if folga is not None:
+            del self._folgas[bisect_left(self._folgas, (folga, produto_id))]
+
+    def reconstruir(self, produtos: Iterable):
+        """Recalcula tudo sem avisar (carga inicial ou importação em massa)."""
+        self._folga_de = {produto.id: produto.estoque - produto.estoque_minimo for produto in produtos}
+        self._folgas = sorted((folga, produto_id) for produto_id, folga in self._folga_de.items())
+
+    def abaixo_do_minimo(self, margem: int = 0) -> List[int]:
+        """Ids dos produtos com estoque abaixo do mínimo + `margem`, do mais ao menos crítico."""
+        return [produto_id for _, produto_id in self._folgas[:bisect_left(self._folgas, (margem,))]]
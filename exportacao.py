@@ -0,0 +1,146 @@
+"""Exportação dos relatórios do dia para Excel em modo streaming.
+
+Todas as planilhas são preenchidas em uma única passada por um cursor SQL
+lido em lotes (fetchmany) e gravadas com uma pasta de trabalho write-only
+do openpyxl, que descarrega as linhas no disco à medida que são
+acrescentadas. O uso de memória fica limitado ao lote corrente e aos totais
+por produto, independentemente de quantas comandas forem exportadas.
+Os valores são somados em centavos (inteiros) e só formatados na gravação.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+TAMANHO_LOTE = 1000
+
+CABECALHOS = {
+    'Estoque Baixo': ["ID", "Nome", "Categoria", "Preço", "Estoque", "Estoque Mínimo"],
+    'Comandas do Dia': ["ID", "Mesa", "Status", "Hora Abertura", "Hora Fechamento", "Total"],
+    'Itens das Comandas': ["Comanda ID", "Mesa", "Produto", "Quantidade", "Preço Unitário", "Subtotal"],
+    'Vendas do Dia': ["ID", "Mesa", "Hora Abertura", "Hora Fechamento", "Total"],
+    'Resumo de Vendas': ["Métrica", "Valor"],
+    'Produtos Vendidos': ["ID", "Produto", "Quantidade", "Total"],
+}
+
+
+def _moeda(centavos: int) -> str:
+    # divmod arredonda para baixo: com o valor negativo, -150 viraria "-2.50"
+    reais, resto = divmod(abs(centavos), 100)
+    return f"R$ {'-' if centavos < 0 else ''}{reais}.{resto:02d}"
+
+
+def exportar_relatorios(sistema, nome_arquivo: str, dia: Optional[datetime] = None,
+                        tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, float]:
+    """Grava os relatórios do dia em `nome_arquivo`.
+
+    Retorna um dicionário com o número de linhas gravadas, o tempo gasto
+    e a vazão em linhas por segundo.
+    """
+    from openpyxl import Workbook
+
+    inicio_exportacao = time.perf_counter()
+    inicio = (dia or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    fim = inicio + timedelta(days=1)
+    inicio_str, fim_str = inicio.strftime("%Y-%m-%d %H:%M:%S"), fim.strftime("%Y-%m-%d %H:%M:%S")
+    hoje = inicio.strftime("%d/%m/%y")
+
+    livro = Workbook(write_only=True)
+    planilhas = {}
+    for nome, cabecalho in CABECALHOS.items():
+        planilhas[nome] = livro.create_sheet(nome)
+        planilhas[nome].append(cabecalho)
+    linhas = {nome: 0 for nome in planilhas}
+
+    def gravar(nome, linha):
+        planilhas[nome].append(linha)
+        linhas[nome] += 1
+
+    # 1. Estoque baixo (índice de estoque mínimo em memória)
+    for produto in sistema.produtos_estoque_baixo():
+        gravar('Estoque Baixo', [produto.id, produto.nome, produto.categoria, _moeda(produto.preco_centavos),
+                                 produto.estoque, produto.estoque_minimo])
+
+    # 2 e 3. Comandas, itens e vendas do dia em uma única passada pelo banco
+    produtos_vendidos: Dict[int, list] = {}
+    total_vendas = 0
+    quantidade_vendas = 0
+
+    def fechar_grupo(comanda, total, itens_vendidos):
+        nonlocal total_vendas, quantidade_vendas
+        comanda_id, mesa, status, hora_abertura, hora_fechamento, aberta_hoje, fechada_hoje = comanda
+        if aberta_hoje:
+            gravar('Comandas do Dia', [comanda_id, mesa, status, hora_abertura, hora_fechamento, _moeda(total)])
+        if fechada_hoje:
+            gravar('Vendas do Dia', [comanda_id, mesa, hora_abertura, hora_fechamento, _moeda(total)])
+            total_vendas += total
+            quantidade_vendas += 1
+            for produto_id, nome, quantidade, subtotal in itens_vendidos:
+                acumulado = produtos_vendidos.setdefault(produto_id, [nome, 0, 0])
+                acumulado[1] += quantidade
+                acumulado[2] += subtotal
+
+    conn = sistema._get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT c.id, c.mesa, c.status, c.hora_abertura, c.hora_fechamento,
+               i.produto_id, i.nome_produto, i.quantidade, i.preco_unitario_centavos, i.subtotal_centavos
+        FROM comandas c
+        LEFT JOIN itens_comanda i ON i.comanda_id = c.id
+        WHERE (c.hora_abertura >= ? AND c.hora_abertura < ?)
+           OR (c.hora_fechamento >= ? AND c.hora_fechamento < ? AND c.status = 'fechada')
+        ORDER BY c.id, i.id
+    ''', (inicio_str, fim_str, inicio_str, fim_str))
+
+    atual = None
+    total = 0
+    itens_vendidos = []
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        for row in lote:
+            if atual is None or atual[0] != row[0]:
+                if atual is not None:
+                    fechar_grupo(atual, total, itens_vendidos)
+                aberta_hoje = inicio_str <= row[3] < fim_str
+                fechada_hoje = row[2] == "fechada" and row[4] is not None and inicio_str <= row[4] < fim_str
+                atual = (row[0], row[1], row[2], row[3], row[4], aberta_hoje, fechada_hoje)
+                total = 0
+                itens_vendidos = []
+
+            if row[5] is None:  # comanda sem itens
+                continue
+            total += row[9]
+            if atual[5]:
+                gravar('Itens das Comandas', [row[0], row[1], row[6], row[7], _moeda(row[8]), _moeda(row[9])])
+            if atual[6]:
+                itens_vendidos.append((row[5], row[6], row[7], row[9]))
+    if atual is not None:
+        fechar_grupo(atual, total, itens_vendidos)
+    cursor.close()
+
+    if not linhas['Estoque Baixo']:
+        gravar('Estoque Baixo', ["Não há produtos com estoque abaixo do mínimo."])
+    if not linhas['Comandas do Dia']:
+        gravar('Comandas do Dia', [f"Não há comandas registradas hoje ({hoje})."])
+    if not linhas['Vendas do Dia']:
+        gravar('Vendas do Dia', [f"Não há comandas fechadas registradas hoje ({hoje})."])
+
+    # 3.1 Resumo e 3.2 produtos vendidos, a partir dos totais acumulados na passada
+    ticket_medio = (2 * total_vendas + quantidade_vendas) // (2 * quantidade_vendas) if quantidade_vendas > 0 else 0
+    gravar('Resumo de Vendas', ["Total de Vendas", _moeda(total_vendas)])
+    gravar('Resumo de Vendas', ["Quantidade de Comandas", quantidade_vendas])
+    gravar('Resumo de Vendas', ["Ticket Médio", _moeda(ticket_medio)])
+
+    for produto_id, (nome, quantidade, subtotal) in sorted(produtos_vendidos.items(), key=lambda p: p[1][1], reverse=True):
+        gravar('Produtos Vendidos', [produto_id, nome, quantidade, _moeda(subtotal)])
+
+    livro.save(nome_arquivo)
+
+    segundos = time.perf_counter() - inicio_exportacao
+    total_linhas = sum(linhas.values())
+    return {
+        "linhas": total_linhas,
+        "segundos": segundos,
+        "linhas_por_segundo": total_linhas / segundos if segundos > 0 else 0.0,
+    }
@@ -0,0 +1,174 @@
+"""Importação em massa do catálogo de produtos a partir de um arquivo CSV.
+
+O arquivo é lido linha a linha e as linhas válidas alimentam um único
+executemany dentro de uma só transação (um commit para o arquivo inteiro,
+em vez de um por produto). O dicionário `produtos` do sistema é atualizado
+em uma passada depois do commit, e os índices de busca e de categorias são reconstruídos uma vez.
+
+Colunas (cabeçalho obrigatório; separador vírgula, ponto e vírgula ou tab):
+    id (opcional), nome, preco, categoria, estoque
+O preço é em reais e aceita "12.50", "12,50" ou "1.234,50". Linhas com id
+atualizam o produto com esse id; sem id, um produto com o mesmo nome é
+atualizado e, se não houver, um novo é criado.
+
+Uso: python importacao.py catalogo.csv [--db bar_system.db]
+"""
+import csv
+import sqlite3
+import time
+from decimal import InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from barsystem import Produto, SistemaBar, reais_para_centavos
+from estoque import ESTOQUE_MINIMO_PADRAO
+
+COLUNAS_OBRIGATORIAS = ('nome', 'preco', 'categoria', 'estoque')
+
+
+def _preco_centavos(texto: str) -> int:
+    texto = texto.strip().replace('R$', '').strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    return reais_para_centavos(texto)
+
+
+def _validar(linha: Dict[str, str]) -> Tuple[Optional[int], str, int, str, int]:
+    """Converte uma linha do CSV; levanta ValueError com o motivo se for inválida."""
+    nome = (linha.get('nome') or '').strip()
+    if not nome:
+        raise ValueError("nome vazio")
+
+    try:
+        preco_centavos = _preco_centavos(linha.get('preco') or '')
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"preço inválido: {linha.get('preco')!r}")
+    if preco_centavos <= 0:
+        raise ValueError("preço deve ser maior que zero")
+
+    try:
+        estoque = int((linha.get('estoque') or '').strip())
+    except ValueError:
+        raise ValueError(f"estoque inválido: {linha.get('estoque')!r}")
+    if estoque < 0:
+        raise ValueError("estoque não pode ser negativo")
+
+    id_texto = (linha.get('id') or '').strip()
+    try:
+        produto_id = int(id_texto) if id_texto else None
+    except ValueError:
+        raise ValueError(f"id inválido: {id_texto!r}")
+
+    return produto_id, nome, preco_centavos, (linha.get('categoria') or '').strip(), estoque
+
+
+def importar_produtos(sistema: SistemaBar, caminho: str, encoding: str = 'utf-8-sig') -> Optional[Dict]:
+    """Importa (insere ou atualiza) os produtos do CSV em `caminho`.
+
+    Retorna um dicionário com o total de linhas lidas, produtos importados,
+    linhas rejeitadas (número da linha, motivo), o tempo gasto e a vazão em
+    linhas por segundo. Se a gravação falhar, nada é importado e o retorno
+    é None. Levanta ValueError se faltar alguma coluna obrigatória.
+    """
+    inicio = time.perf_counter()
+    rejeitadas: List[Tuple[int, str]] = []
+    importados: Dict[int, Tuple] = {}
+    linhas = 0
+
+    # Baixas de estoque ainda na fila não podem ser aplicadas depois do valor importado
+    if not sistema.sincronizar():
+        return None
+
+    por_nome = {produto.nome: produto.id for produto in sistema.produtos.values()}
+    proximo_id = max([sistema.proximo_id_produto] + [produto_id + 1 for produto_id in sistema.produtos])
+
+    with open(caminho, newline='', encoding=encoding) as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+        except csv.Error:
+            dialeto = csv.excel
+        leitor = csv.DictReader(arquivo, dialect=dialeto)
+        leitor.fieldnames = [coluna.strip().lower() for coluna in leitor.fieldnames or []]
+        faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in leitor.fieldnames]
+        if faltando:
+            raise ValueError(f"Colunas ausentes no CSV: {', '.join(faltando)}")
+
+        def validas():
+            nonlocal linhas, proximo_id
+            for linha in leitor:
+                linhas += 1
+                try:
+                    produto_id, nome, preco_centavos, categoria, estoque = _validar(linha)
+                except ValueError as e:
+                    rejeitadas.append((leitor.line_num, str(e)))
+                    continue
+                if produto_id is None:
+                    produto_id = por_nome.get(nome)
+                    if produto_id is None:
+                        produto_id = proximo_id
+                proximo_id = max(proximo_id, produto_id + 1)
+                por_nome[nome] = produto_id
+                importados[produto_id] = (nome, preco_centavos, categoria, estoque)
+                yield produto_id, nome, preco_centavos, categoria, estoque
+
+        try:
+            with sistema._get_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO produtos (id, nome, preco_centavos, categoria, estoque)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        nome = excluded.nome,
+                        preco_centavos = excluded.preco_centavos,
+                        categoria = excluded.categoria,
+                        estoque = excluded.estoque
+                ''', validas())
+        except sqlite3.Error as e:
+            print(f"Erro ao importar produtos: {e}")
+            return None
+
+    for produto_id, (nome, preco_centavos, categoria, estoque) in importados.items():
+        anterior = sistema.produtos.get(produto_id)
+        estoque_minimo = anterior.estoque_minimo if anterior else ESTOQUE_MINIMO_PADRAO
+        produto = Produto(produto_id, nome, preco_centavos, categoria, estoque, estoque_minimo)
+        sistema.produtos[produto_id] = produto
+    sistema.reindexar_produtos()
+    sistema.proximo_id_produto = max(sistema.proximo_id_produto, proximo_id)
+    sistema.salvar_dados()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "linhas": linhas,
+        "importados": len(importados),
+        "rejeitadas": rejeitadas,
+        "segundos": segundos,
+        "linhas_por_segundo": linhas / segundos if segundos > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[list] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa produtos de um arquivo CSV.")
+    parser.add_argument('arquivo', help="CSV com as colunas id (opcional), nome, preco, categoria, estoque")
+    parser.add_argument('--db', default='bar_system.db', help="caminho do banco (padrão: bar_system.db)")
+    parser.add_argument('--encoding', default='utf-8-sig', help="codificação do arquivo (padrão: utf-8-sig)")
+    args = parser.parse_args(argv)
+
+    try:
+        resultado = importar_produtos(SistemaBar(args.db), args.arquivo, args.encoding)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler o arquivo: {e}")
+        return 1
+    if resultado is None:
+        return 1
+
+    print(f"{resultado['importados']} produtos importados de {resultado['linhas']} linhas "
+          f"em {resultado['segundos']:.2f} s ({resultado['linhas_por_segundo']:.0f} linhas/s).")
+    for numero, motivo in resultado['rejeitadas']:
+        print(f"  linha {numero} rejeitada: {motivo}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,154 +1,293 @@
 import sqlite3
 import json
 import os
-import bcrypt
-
-def create_database():
-    """Cria o banco de dados e as tabelas necessárias."""
-    if os.path.exists('bar_system.db'):
-        os.remove('bar_system.db')
-        
-    conn = sqlite3.connect('bar_system.db')
-    cursor = conn.cursor()
-
-    # Criar tabelas
-    cursor.executescript('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY,
-            nome_usuario TEXT NOT NULL UNIQUE,
-            senha_hash TEXT NOT NULL,
-            nome_empresa TEXT NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS produtos (
-            id INTEGER PRIMARY KEY,
-            nome TEXT NOT NULL,
-            preco REAL NOT NULL,
-            categoria TEXT NOT NULL,
-            estoque INTEGER NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS mesas (
-            id INTEGER PRIMARY KEY,
-            comanda_id INTEGER,
-            FOREIGN KEY (comanda_id) REFERENCES comandas(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS comandas (
-            id INTEGER PRIMARY KEY,
-            mesa INTEGER NOT NULL,
-            status TEXT NOT NULL,
-            hora_abertura TEXT NOT NULL,
-            hora_fechamento TEXT,
-            nome_cliente TEXT,
-            FOREIGN KEY (mesa) REFERENCES mesas(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS itens_comanda (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            comanda_id INTEGER NOT NULL,
-            produto_id INTEGER NOT NULL,
-            quantidade INTEGER NOT NULL,
-            nome_produto TEXT NOT NULL,
-            preco_unitario REAL NOT NULL,
-            subtotal REAL NOT NULL,
-            FOREIGN KEY (comanda_id) REFERENCES comandas(id),
-            FOREIGN KEY (produto_id) REFERENCES produtos(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS contadores (
-            nome TEXT PRIMARY KEY,
-            valor INTEGER NOT NULL
-        );
-
-        -- Inserir contadores iniciais
-        INSERT OR IGNORE INTO contadores (nome, valor) VALUES 
-            ('proximo_id_usuario', 1),
-            ('proximo_id_produto', 1),
-            ('proximo_id_comanda', 1);
-    ''')
-
-    conn.commit()
-    conn.close()
-
-def migrate_data():
-    conn = sqlite3.connect('bar_system.db')
-    cursor = conn.cursor()
-
-    # Migrate usuarios.json
-    if os.path.exists('dados/usuarios.json'):
-        with open('dados/usuarios.json', 'r', encoding='utf-8') as f:
-            usuarios = json.load(f)
-            for user_id, user in usuarios.items():
-                # Criptografa a senha antes de salvar
-                senha_bytes = user['senha'].encode('utf-8')
-                salt = bcrypt.gensalt()
-                senha_hash = bcrypt.hashpw(senha_bytes, salt)
-                
-                cursor.execute('''
+from datetime import datetime
+from migrations import aplicar_migracoes
+
+def create_database(db_path='bar_system.db'):
+    """Cria o banco de dados ou atualiza o esquema de um banco existente.
+
+    Os dados já gravados são preservados: apenas as migrações pendentes
+    (veja migrations.py) são aplicadas.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        aplicar_migracoes(conn)
+    finally:
+        conn.close()
+
+def _data_iso(valor):
+    """Converte "dd/mm/aaaa hh:mm:ss" (formato dos arquivos JSON antigos) para ISO-8601."""
+    if not valor:
+        return valor
+    try:
+        return datetime.strptime(valor, "%d/%m/%Y %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return valor
+
+# Usuários gravados por transação ao migrar (o bcrypt é o trecho lento; cada lote concluído fica salvo)
+LOTE_USUARIOS = 64
+# Comandas por executemany ao migrar
+LOTE_COMANDAS = 1000
+# Presente enquanto uma carga inicial não termina; guarda o SQL dos índices e gatilhos removidos
+CARGA_INICIAL = 'migracao_json:carga_inicial'
+# Presente enquanto os resumos de vendas não forem refeitos depois de migrar as comandas
+RESUMOS_PENDENTES = 'migracao_json:resumos_pendentes'
+
+def _pares_json(caminho, tamanho_bloco=1 << 16):
+    """Percorre os pares (chave, valor) do objeto JSON de nível mais alto do arquivo.
+
+    O arquivo é lido em blocos e cada valor é decodificado com raw_decode
+    assim que está completo, sem carregar o arquivo inteiro na memória.
+    """
+    decodificador = json.JSONDecoder()
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        buffer = ''
+        posicao = 0
+        fim_arquivo = False
+
+        def ler_mais():
+            nonlocal buffer, posicao, fim_arquivo
+            bloco = arquivo.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            buffer = buffer[posicao:] + bloco
+            posicao = 0
+
+        def proximo_caractere(consumir=True):
+            nonlocal posicao
+            while True:
+                while posicao < len(buffer) and buffer[posicao].isspace():
+                    posicao += 1
+                if posicao < len(buffer):
+                    caractere = buffer[posicao]
+                    posicao += consumir
+                    return caractere
+                if fim_arquivo:
+                    raise ValueError(f"{caminho}: fim inesperado do arquivo")
+                ler_mais()
+
+        def proximo_valor():
+            nonlocal posicao
+            while True:
+                while posicao < len(buffer) and buffer[posicao].isspace():
+                    posicao += 1
+                try:
+                    valor, fim = decodificador.raw_decode(buffer, posicao)
+                    # Um número no fim do bloco pode continuar no próximo
+                    if fim < len(buffer) or fim_arquivo:
+                        posicao = fim
+                        return valor
+                except json.JSONDecodeError:
+                    if fim_arquivo:
+                        raise
+                ler_mais()
+
+        if proximo_caractere() != '{':
+            raise ValueError(f"{caminho}: esperado um objeto JSON")
+        if proximo_caractere(consumir=False) == '}':
+            return
+        while True:
+            chave = proximo_valor()
+            if proximo_caractere() != ':':
+                raise ValueError(f"{caminho}: esperado ':' depois de {chave!r}")
+            yield chave, proximo_valor()
+            separador = proximo_caractere()
+            if separador == '}':
+                return
+            if separador != ',':
+                raise ValueError(f"{caminho}: esperado ',' ou '}}' depois de {chave!r}")
+
+def _configuracao(conn, nome):
+    row = conn.execute('SELECT valor FROM configuracoes WHERE nome = ?', (nome,)).fetchone()
+    return row[0] if row else None
+
+def _assinatura(caminho):
+    estado = os.stat(caminho)
+    return f"{estado.st_size}:{estado.st_mtime_ns}"
+
+def _ja_migrado(conn, caminho):
+    """Confere o ponto de controle gravado ao fim da migração do arquivo (mesmo tamanho e data)."""
+    return _configuracao(conn, f"migracao_json:{os.path.basename(caminho)}") == _assinatura(caminho)
+
+def _marcar_migrado(conn, caminho):
+    conn.execute('INSERT OR REPLACE INTO configuracoes (nome, valor) VALUES (?, ?)',
+                 (f"migracao_json:{os.path.basename(caminho)}", _assinatura(caminho)))
+
+def _hash_senha_legada(argumentos):
+    """Executado nos processos de trabalho: (senha, custo) -> hash bcrypt."""
+    import bcrypt
+
+    senha, custo = argumentos
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(custo)).decode('utf-8')
+
+def _lotes(iteravel, tamanho):
+    lote = []
+    for elemento in iteravel:
+        lote.append(elemento)
+        if len(lote) == tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _migrar_usuarios(conn, caminho, processos=None):
+    """Gera os hashes em um pool de processos; lotes já gravados não são refeitos ao retomar."""
+    from concurrent.futures import ProcessPoolExecutor
+    from auth_system import CUSTO_PADRAO
+
+    row = conn.execute('SELECT valor FROM configuracoes WHERE nome = ?', ('custo_bcrypt',)).fetchone()
+    custo = int(row[0]) if row else CUSTO_PADRAO
+    existentes = {usuario_id for (usuario_id,) in conn.execute('SELECT id FROM usuarios')}
+    pendentes = ((int(user_id), user) for user_id, user in _pares_json(caminho) if int(user_id) not in existentes)
+
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        for lote in _lotes(pendentes, LOTE_USUARIOS):
+            hashes = pool.map(_hash_senha_legada, [(user['senha'], custo) for _, user in lote])
+            with conn:
+                conn.executemany('''
                     INSERT OR REPLACE INTO usuarios (id, nome_usuario, senha_hash, nome_empresa)
                     VALUES (?, ?, ?, ?)
-                ''', (int(user_id), user['nome_usuario'], senha_hash.decode('utf-8'), user['nome_empresa']))
-
-    # Migrate produtos.json
-    if os.path.exists('dados/produtos.json'):
-        with open('dados/produtos.json', 'r', encoding='utf-8') as f:
-            produtos = json.load(f)
-            for prod_id, prod in produtos.items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO produtos (id, nome, preco, categoria, estoque)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (int(prod_id), prod['nome'], prod['preco'], prod['categoria'], prod['estoque']))
-
-    # Migrate mesas.json
-    if os.path.exists('dados/mesas.json'):
-        with open('dados/mesas.json', 'r', encoding='utf-8') as f:
-            mesas = json.load(f)
-            for mesa_id, comanda_id in mesas.items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO mesas (id, comanda_id)
-                    VALUES (?, ?)
-                ''', (int(mesa_id), comanda_id))
-
-    # Migrate comandas.json
-    if os.path.exists('dados/comandas.json'):
-        with open('dados/comandas.json', 'r', encoding='utf-8') as f:
-            comandas = json.load(f)
-            for comanda_id, comanda in comandas.items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO comandas (id, mesa, status, hora_abertura, hora_fechamento, nome_cliente)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (int(comanda_id), comanda['mesa'], comanda['status'], comanda['hora_abertura'], comanda['hora_fechamento'], comanda.get('nome_cliente')))
-                
-                # Migrate itens_comanda
+                ''', [(user_id, user['nome_usuario'], senha_hash, user['nome_empresa'])
+                      for (user_id, user), senha_hash in zip(lote, hashes)])
+
+def _migrar_comandas(conn, caminho, reimportando):
+    from barsystem import reais_para_centavos
+
+    for lote in _lotes(_pares_json(caminho), LOTE_COMANDAS):
+        comandas = [(int(comanda_id), comanda) for comanda_id, comanda in lote]
+        if reimportando:
+            # O arquivo mudou desde a última migração: os itens da comanda são substituídos
+            conn.executemany('DELETE FROM itens_comanda WHERE comanda_id = ?', [(comanda_id,) for comanda_id, _ in comandas])
+        conn.executemany('''
+            INSERT OR REPLACE INTO comandas (id, mesa, status, hora_abertura, hora_fechamento, nome_cliente)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(comanda_id, comanda['mesa'], comanda['status'], _data_iso(comanda['hora_abertura']),
+               _data_iso(comanda['hora_fechamento']), comanda.get('nome_cliente'))
+              for comanda_id, comanda in comandas])
+
+        def itens():
+            for comanda_id, comanda in comandas:
                 for item in comanda.get('itens', []):
-                    cursor.execute('''
-                        INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario, subtotal)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (int(comanda_id), item['produto_id'], item['quantidade'], item['nome_produto'], item['preco_unitario'], item['subtotal']))
-
-    # Migrate contadores
-    if os.path.exists('dados/contadores.json'):
-        with open('dados/contadores.json', 'r', encoding='utf-8') as f:
-            contadores = json.load(f)
-            for nome, valor in contadores.items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO contadores (nome, valor)
-                    VALUES (?, ?)
-                ''', (nome, valor))
-
-    if os.path.exists('dados/contador_usuario.json'):
-        with open('dados/contador_usuario.json', 'r', encoding='utf-8') as f:
-            contador_usuario = json.load(f)
-            cursor.execute('''
-                INSERT OR REPLACE INTO contadores (nome, valor)
-                VALUES (?, ?)
-            ''', ('proximo_id_usuario', contador_usuario.get('proximo_id_usuario', 1)))
-
-    conn.commit()
-    conn.close()
+                    preco_centavos = reais_para_centavos(item['preco_unitario'])
+                    yield (comanda_id, item['produto_id'], item['quantidade'], item['nome_produto'],
+                           preco_centavos, item['quantidade'] * preco_centavos)
+
+        conn.executemany('''
+            INSERT INTO itens_comanda (comanda_id, produto_id, quantidade, nome_produto, preco_unitario_centavos, subtotal_centavos)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', itens())
+
+def migrate_data(db_path='bar_system.db', pasta='dados', processos=None):
+    """Importa os arquivos JSON da versão antiga para o banco, que é preservado.
+
+    Cada arquivo é lido em streaming e gravado com executemany em uma única
+    transação, junto com um ponto de controle (tamanho e data do arquivo):
+    se a migração for interrompida, rodar de novo pula os arquivos já
+    concluídos. Os usuários são gravados em lotes, com os hashes bcrypt
+    calculados em um pool de processos. Num banco vazio os índices e os
+    gatilhos de alterações são removidos durante a carga; o SQL deles fica
+    registrado em configuracoes, e eles são recriados no fim desta ou, se
+    ela for interrompida, da próxima execução.
+    """
+    import migrations
+    import resumos
+
+    caminho = lambda nome: os.path.join(pasta, nome)
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    aplicar_migracoes(conn)
+
+    # Uma carga inicial interrompida continua sendo carga inicial: índices e
+    # gatilhos seguem removidos até o fim da execução que a concluir
+    carga_inicial = _configuracao(conn, CARGA_INICIAL) is not None or not conn.execute(
+        'SELECT EXISTS (SELECT 1 FROM comandas) OR EXISTS (SELECT 1 FROM produtos)').fetchone()[0]
+    reimportando = not carga_inicial
+    if carga_inicial:
+        with conn:
+            removidos = conn.execute('''
+                SELECT type, name, sql FROM sqlite_master
+                WHERE (type = 'index' AND name LIKE 'idx_%') OR (type = 'trigger' AND name LIKE 'trg_%_alteracoes')
+            ''').fetchall()
+            # Registrado antes de remover, na mesma transação, para a recriação nunca se perder
+            anteriores = json.loads(_configuracao(conn, CARGA_INICIAL) or '[]')
+            conn.execute('INSERT OR REPLACE INTO configuracoes (nome, valor) VALUES (?, ?)',
+                         (CARGA_INICIAL, json.dumps(anteriores + [sql for _, _, sql in removidos])))
+            for tipo, nome, _ in removidos:
+                conn.execute(f'DROP {tipo.upper()} {nome}')
+
+    try:
+        if os.path.exists(caminho('usuarios.json')) and not _ja_migrado(conn, caminho('usuarios.json')):
+            _migrar_usuarios(conn, caminho('usuarios.json'), processos)
+            with conn:
+                _marcar_migrado(conn, caminho('usuarios.json'))
+
+        if os.path.exists(caminho('produtos.json')) and not _ja_migrado(conn, caminho('produtos.json')):
+            from barsystem import reais_para_centavos
+            with conn:
+                conn.executemany('''
+                    INSERT INTO produtos (id, nome, preco_centavos, categoria, estoque)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        nome = excluded.nome,
+                        preco_centavos = excluded.preco_centavos,
+                        categoria = excluded.categoria,
+                        estoque = excluded.estoque
+                ''', ((int(prod_id), prod['nome'], reais_para_centavos(prod['preco']), prod['categoria'], prod['estoque'])
+                      for prod_id, prod in _pares_json(caminho('produtos.json'))))
+                _marcar_migrado(conn, caminho('produtos.json'))
+
+        if os.path.exists(caminho('mesas.json')) and not _ja_migrado(conn, caminho('mesas.json')):
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO mesas (id, comanda_id) VALUES (?, ?)',
+                                 ((int(mesa_id), comanda_id) for mesa_id, comanda_id in _pares_json(caminho('mesas.json'))))
+                _marcar_migrado(conn, caminho('mesas.json'))
+
+        if os.path.exists(caminho('comandas.json')) and not _ja_migrado(conn, caminho('comandas.json')):
+            with conn:
+                _migrar_comandas(conn, caminho('comandas.json'), reimportando)
+                _marcar_migrado(conn, caminho('comandas.json'))
+                conn.execute('INSERT OR REPLACE INTO configuracoes (nome, valor) VALUES (?, ?)', (RESUMOS_PENDENTES, '1'))
+
+        if os.path.exists(caminho('contadores.json')) and not _ja_migrado(conn, caminho('contadores.json')):
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO contadores (nome, valor) VALUES (?, ?)',
+                                 _pares_json(caminho('contadores.json')))
+                _marcar_migrado(conn, caminho('contadores.json'))
+
+        if os.path.exists(caminho('contador_usuario.json')) and not _ja_migrado(conn, caminho('contador_usuario.json')):
+            with conn:
+                contador = dict(_pares_json(caminho('contador_usuario.json')))
+                conn.execute('INSERT OR REPLACE INTO contadores (nome, valor) VALUES (?, ?)',
+                             ('proximo_id_usuario', contador.get('proximo_id_usuario', 1)))
+                _marcar_migrado(conn, caminho('contador_usuario.json'))
+
+    finally:
+        # Sempre, mesmo sem carga inicial nesta execução: recria o que faltar
+        with conn:
+            for sql in json.loads(_configuracao(conn, CARGA_INICIAL) or '[]'):
+                nome = sql.split()[2]  # CREATE INDEX|TRIGGER <nome> ...
+                if conn.execute('SELECT 1 FROM sqlite_master WHERE name = ?', (nome,)).fetchone() is None:
+                    conn.execute(sql)
+            migrations.recriar_indices(conn)
+            conn.execute('DELETE FROM configuracoes WHERE nome = ?', (CARGA_INICIAL,))
+        # Depois dos índices: os resumos de vendas juntam comandas e itens
+        if _configuracao(conn, RESUMOS_PENDENTES) is not None:
+            resumos.reconstruir(conn)
+            with conn:
+                conn.execute('DELETE FROM configuracoes WHERE nome = ?', (RESUMOS_PENDENTES,))
+        conn.close()
+
+def calibrar_senhas(db_path='bar_system.db'):
+    """Grava o custo do bcrypt adequado a esta máquina (veja auth_system.calibrar_custo)."""
+    from auth_system import SistemaAutenticacao
+
+    custo = SistemaAutenticacao(db_path).calibrar()
+    if custo is not None:
+        print(f"Custo do bcrypt calibrado para {custo}.")
 
 if __name__ == '__main__':
     create_database()
+    # Calibra antes de migrar, para os hashes dos usuários antigos já saírem com o custo certo
+    calibrar_senhas()
     migrate_data()
-    print("Banco de dados criado e dados migrados com sucesso!")
\ No newline at end of file
+    print("Banco de dados criado/atualizado e dados migrados com sucesso!")
\ No newline at end of file
@@ -1,24 +1,36 @@
 from barsystem import SistemaBar, InterfaceTerminal
-from auth_system import AuthInterface
+from auth_system import AuthInterface, PIN_MAX, PIN_MIN
+from database import fechar_conexoes
 
 class InterfaceBarPersonalizada(InterfaceTerminal):
-    def __init__(self, usuario=None):
-        super().__init__()
+    def __init__(self, usuario=None, sistema=None, autenticacao=None):
+        super().__init__(sistema)
+        self.autenticacao = autenticacao
+        self.definir_usuario(usuario)
+
+    def definir_usuario(self, usuario):
+        """Troca o usuário da sessão mantendo o SistemaBar (e os dados já carregados)."""
         self.usuario = usuario
         self.nome_sistema = usuario.nome_empresa if usuario else "SISTEMA DE BAR"
+        self.running = True
     
     def menu_principal(self):
         self.limpar_tela()
         self.imprimir_titulo(self.nome_sistema)
+        self.mostrar_avisos_estoque()
         print("1. Gestão de Mesas")
         print("2. Gestão de Produtos e Estoque")
         print("3. Venda Rápida")
         print("4. Relatórios")
         print("5. Logout")
+        if self.autenticacao is not None:
+            print("6. Trocar Usuário (PIN)")
+            print("7. Definir Meu PIN")
         print("0. Sair")
         print(self.linha_separadora())
         
         opcao = input("Escolha uma opção: ")
+        self.sistema.atualizar()
         
         if opcao == "1":
             self.menu_mesas()
@@ -31,6 +43,10 @@ class InterfaceBarPersonalizada(InterfaceTerminal):
         elif opcao == "5":
             self.running = False
             return "logout"  # Sinaliza que o usuário deseja fazer logout
+        elif opcao == "6" and self.autenticacao is not None:
+            self.trocar_usuario()
+        elif opcao == "7" and self.autenticacao is not None:
+            self.definir_pin()
         elif opcao == "0":
             self.running = False
         else:
@@ -38,8 +54,44 @@ class InterfaceBarPersonalizada(InterfaceTerminal):
         
         return None
 
+    def trocar_usuario(self):
+        self.limpar_tela()
+        self.imprimir_titulo("TROCAR USUÁRIO")
+        print("Digite 'c' ou 'cancelar' para voltar.")
+
+        nome_usuario = input("Nome de usuário: ")
+        if nome_usuario.lower() in ['c', 'cancelar']:
+            return
+
+        espera = self.autenticacao.bloqueio_pin(nome_usuario)
+        if espera > 0:
+            input(f"PIN bloqueado por erros seguidos. Tente em {espera:.0f} s ou faça login com senha. "
+                  "Pressione Enter para continuar...")
+            return
+
+        usuario = self.autenticacao.autenticar_pin(nome_usuario, input("PIN: "))
+        if usuario is None:
+            input("Usuário ou PIN incorretos. Pressione Enter para continuar...")
+            return
+        self.definir_usuario(usuario)
+
+    def definir_pin(self):
+        self.limpar_tela()
+        self.imprimir_titulo("DEFINIR PIN")
+        print(f"O PIN permite trocar de usuário sem digitar a senha ({PIN_MIN} a {PIN_MAX} dígitos).")
+
+        pin = input("Novo PIN: ")
+        if pin != input("Confirme o PIN: "):
+            input("Os PINs não conferem. Pressione Enter para continuar...")
+            return
+        if self.autenticacao.definir_pin(self.usuario.id, pin):
+            input("PIN definido. Pressione Enter para continuar...")
+        else:
+            input(f"PIN inválido: use de {PIN_MIN} a {PIN_MAX} dígitos. Pressione Enter para continuar...")
+
 def main():
     auth_interface = AuthInterface()
+    interface_bar = None
     
     while True:
         # Iniciar processo de autenticação
@@ -50,8 +102,12 @@ def main():
             print("Programa encerrado.")
             break
         
-        # Iniciar o sistema com o usuário logado
-        interface_bar = InterfaceBarPersonalizada(usuario)
+        # O SistemaBar é criado no primeiro login e reaproveitado nos seguintes,
+        # sem recarregar o banco a cada troca de usuário
+        if interface_bar is None:
+            interface_bar = InterfaceBarPersonalizada(usuario, SistemaBar(), auth_interface.sistema)
+        else:
+            interface_bar.definir_usuario(usuario)
         
         resultado = None
         while interface_bar.running:
@@ -67,5 +123,7 @@ def main():
         if resultado != "logout":
             break
 
+    fechar_conexoes()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
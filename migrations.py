@@ -0,0 +1,319 @@
+import sqlite3
+
+
+def _v1_esquema_inicial(conn: sqlite3.Connection):
+    """Tabelas originais do sistema (idempotente para bancos já existentes)."""
+    comandos = [
+        '''CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY,
+            nome_usuario TEXT NOT NULL UNIQUE,
+            senha_hash TEXT NOT NULL,
+            nome_empresa TEXT NOT NULL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            preco REAL NOT NULL,
+            categoria TEXT NOT NULL,
+            estoque INTEGER NOT NULL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS mesas (
+            id INTEGER PRIMARY KEY,
+            comanda_id INTEGER,
+            FOREIGN KEY (comanda_id) REFERENCES comandas(id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS comandas (
+            id INTEGER PRIMARY KEY,
+            mesa INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            hora_abertura TEXT NOT NULL,
+            hora_fechamento TEXT,
+            nome_cliente TEXT,
+            FOREIGN KEY (mesa) REFERENCES mesas(id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS itens_comanda (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            comanda_id INTEGER NOT NULL,
+            produto_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            nome_produto TEXT NOT NULL,
+            preco_unitario REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            FOREIGN KEY (comanda_id) REFERENCES comandas(id),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS contadores (
+            nome TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )''',
+        '''INSERT OR IGNORE INTO contadores (nome, valor) VALUES
+            ('proximo_id_usuario', 1),
+            ('proximo_id_produto', 1),
+            ('proximo_id_comanda', 1)''',
+    ]
+    for comando in comandos:
+        conn.execute(comando)
+
+
+def _v2_indices(conn: sqlite3.Connection):
+    """Índices usados pelas consultas de itens, comandas abertas e relatórios."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_itens_comanda_comanda ON itens_comanda (comanda_id, produto_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_comandas_status ON comandas (status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_comandas_hora_fechamento ON comandas (hora_fechamento)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos (categoria)')
+
+
+def _v3_datas_iso(conn: sqlite3.Connection):
+    """Converte datas "dd/mm/aaaa hh:mm:ss" para ISO-8601 ("aaaa-mm-dd hh:mm:ss").
+
+    O formato ISO ordena como texto, permitindo filtrar períodos por índice.
+    """
+    for coluna in ('hora_abertura', 'hora_fechamento'):
+        conn.execute(f'''
+            UPDATE comandas
+            SET {coluna} = substr({coluna}, 7, 4) || '-' || substr({coluna}, 4, 2) || '-' ||
+                           substr({coluna}, 1, 2) || substr({coluna}, 11)
+            WHERE {coluna} LIKE '__/__/____%'
+        ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_comandas_hora_abertura ON comandas (hora_abertura)')
+
+
+def _v4_resumos_vendas(conn: sqlite3.Connection):
+    """Tabelas de resumo de vendas por hora/dia/mês, preenchidas com o histórico."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS resumo_vendas (
+        granularidade TEXT NOT NULL,
+        periodo TEXT NOT NULL,
+        receita REAL NOT NULL DEFAULT 0,
+        comandas INTEGER NOT NULL DEFAULT 0,
+        unidades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularidade, periodo)
+    ) WITHOUT ROWID''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS resumo_vendas_produto (
+        granularidade TEXT NOT NULL,
+        periodo TEXT NOT NULL,
+        produto_id INTEGER NOT NULL,
+        nome_produto TEXT NOT NULL,
+        receita REAL NOT NULL DEFAULT 0,
+        comandas INTEGER NOT NULL DEFAULT 0,
+        unidades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularidade, periodo, produto_id)
+    ) WITHOUT ROWID''')
+
+    for granularidade, tamanho in (('hora', 13), ('dia', 10), ('mes', 7)):
+        conn.execute('''
+            INSERT INTO resumo_vendas (granularidade, periodo, receita, comandas, unidades)
+            SELECT ?, substr(c.hora_fechamento, 1, ?), COALESCE(SUM(i.subtotal), 0),
+                   COUNT(DISTINCT c.id), COALESCE(SUM(i.quantidade), 0)
+            FROM comandas c
+            LEFT JOIN itens_comanda i ON i.comanda_id = c.id
+            WHERE c.status = 'fechada' AND c.hora_fechamento IS NOT NULL
+            GROUP BY substr(c.hora_fechamento, 1, ?)
+        ''', (granularidade, tamanho, tamanho))
+        conn.execute('''
+            INSERT INTO resumo_vendas_produto (granularidade, periodo, produto_id, nome_produto, receita, comandas, unidades)
+            SELECT ?, substr(c.hora_fechamento, 1, ?), i.produto_id, MAX(i.nome_produto),
+                   SUM(i.subtotal), COUNT(DISTINCT c.id), SUM(i.quantidade)
+            FROM comandas c
+            JOIN itens_comanda i ON i.comanda_id = c.id
+            WHERE c.status = 'fechada' AND c.hora_fechamento IS NOT NULL
+            GROUP BY substr(c.hora_fechamento, 1, ?), i.produto_id
+        ''', (granularidade, tamanho, tamanho))
+
+
+def _v5_centavos(conn: sqlite3.Connection):
+    """Valores monetários em centavos (INTEGER) em vez de REAL.
+
+    As tabelas são recriadas (receita padrão do SQLite para mudar colunas),
+    preservando os ids; os resumos são recalculados a partir dos itens.
+    """
+    conn.execute('''CREATE TABLE produtos_novo (
+        id INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL,
+        preco_centavos INTEGER NOT NULL,
+        categoria TEXT NOT NULL,
+        estoque INTEGER NOT NULL
+    )''')
+    conn.execute('''
+        INSERT INTO produtos_novo (id, nome, preco_centavos, categoria, estoque)
+        SELECT id, nome, CAST(ROUND(preco * 100) AS INTEGER), categoria, estoque FROM produtos
+    ''')
+    conn.execute('DROP TABLE produtos')
+    conn.execute('ALTER TABLE produtos_novo RENAME TO produtos')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos (categoria)')
+
+    conn.execute('''CREATE TABLE itens_comanda_novo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        comanda_id INTEGER NOT NULL,
+        produto_id INTEGER NOT NULL,
+        quantidade INTEGER NOT NULL,
+        nome_produto TEXT NOT NULL,
+        preco_unitario_centavos INTEGER NOT NULL,
+        subtotal_centavos INTEGER NOT NULL,
+        FOREIGN KEY (comanda_id) REFERENCES comandas(id),
+        FOREIGN KEY (produto_id) REFERENCES produtos(id)
+    )''')
+    conn.execute('''
+        INSERT INTO itens_comanda_novo (id, comanda_id, produto_id, quantidade, nome_produto,
+                                        preco_unitario_centavos, subtotal_centavos)
+        SELECT id, comanda_id, produto_id, quantidade, nome_produto,
+               CAST(ROUND(preco_unitario * 100) AS INTEGER),
+               quantidade * CAST(ROUND(preco_unitario * 100) AS INTEGER)
+        FROM itens_comanda
+    ''')
+    conn.execute('DROP TABLE itens_comanda')
+    conn.execute('ALTER TABLE itens_comanda_novo RENAME TO itens_comanda')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_itens_comanda_comanda ON itens_comanda (comanda_id, produto_id)')
+
+    conn.execute('DROP TABLE resumo_vendas')
+    conn.execute('DROP TABLE resumo_vendas_produto')
+    conn.execute('''CREATE TABLE resumo_vendas (
+        granularidade TEXT NOT NULL,
+        periodo TEXT NOT NULL,
+        receita_centavos INTEGER NOT NULL DEFAULT 0,
+        comandas INTEGER NOT NULL DEFAULT 0,
+        unidades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularidade, periodo)
+    ) WITHOUT ROWID''')
+    conn.execute('''CREATE TABLE resumo_vendas_produto (
+        granularidade TEXT NOT NULL,
+        periodo TEXT NOT NULL,
+        produto_id INTEGER NOT NULL,
+        nome_produto TEXT NOT NULL,
+        receita_centavos INTEGER NOT NULL DEFAULT 0,
+        comandas INTEGER NOT NULL DEFAULT 0,
+        unidades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularidade, periodo, produto_id)
+    ) WITHOUT ROWID''')
+
+    for granularidade, tamanho in (('hora', 13), ('dia', 10), ('mes', 7)):
+        conn.execute('''
+            INSERT INTO resumo_vendas (granularidade, periodo, receita_centavos, comandas, unidades)
+            SELECT ?, substr(c.hora_fechamento, 1, ?), COALESCE(SUM(i.subtotal_centavos), 0),
+                   COUNT(DISTINCT c.id), COALESCE(SUM(i.quantidade), 0)
+            FROM comandas c
+            LEFT JOIN itens_comanda i ON i.comanda_id = c.id
+            WHERE c.status = 'fechada' AND c.hora_fechamento IS NOT NULL
+            GROUP BY substr(c.hora_fechamento, 1, ?)
+        ''', (granularidade, tamanho, tamanho))
+        conn.execute('''
+            INSERT INTO resumo_vendas_produto (granularidade, periodo, produto_id, nome_produto, receita_centavos, comandas, unidades)
+            SELECT ?, substr(c.hora_fechamento, 1, ?), i.produto_id, MAX(i.nome_produto),
+                   SUM(i.subtotal_centavos), COUNT(DISTINCT c.id), SUM(i.quantidade)
+            FROM comandas c
+            JOIN itens_comanda i ON i.comanda_id = c.id
+            WHERE c.status = 'fechada' AND c.hora_fechamento IS NOT NULL
+            GROUP BY substr(c.hora_fechamento, 1, ?), i.produto_id
+        ''', (granularidade, tamanho, tamanho))
+
+
+def _v6_registro_alteracoes(conn: sqlite3.Connection):
+    """Registro de alterações por linha, preenchido por gatilhos.
+
+    Cada terminal guarda o último id lido de `alteracoes` e, quando o banco
+    muda (PRAGMA data_version), recarrega só as linhas registradas depois dele.
+    Itens de comanda registram a comanda a que pertencem.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS alteracoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabela TEXT NOT NULL,
+        chave INTEGER NOT NULL
+    )''')
+    gatilhos = (
+        ('produtos', 'produtos', 'id'),
+        ('comandas', 'comandas', 'id'),
+        ('mesas', 'mesas', 'id'),
+        ('itens_comanda', 'comandas', 'comanda_id'),
+    )
+    for tabela, registro, coluna in gatilhos:
+        for evento, linha in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabela}_{evento.lower()}_alteracoes
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    INSERT INTO alteracoes (tabela, chave) VALUES ('{registro}', {linha}.{coluna});
+                END
+            ''')
+
+
+def _v7_estoque_minimo(conn: sqlite3.Connection):
+    """Estoque mínimo por produto; os existentes ficam com 10, o limite fixo usado até aqui."""
+    conn.execute('ALTER TABLE produtos ADD COLUMN estoque_minimo INTEGER NOT NULL DEFAULT 10')
+
+
+def _v8_configuracoes(conn: sqlite3.Connection):
+    """Parâmetros da instalação (por exemplo, o custo do bcrypt calibrado para a máquina)."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS configuracoes (
+        nome TEXT PRIMARY KEY,
+        valor TEXT NOT NULL
+    )''')
+
+
+def _v9_pin_usuarios(conn: sqlite3.Connection):
+    """PIN de troca rápida de usuário (HMAC com chave guardada fora do banco)."""
+    conn.execute('ALTER TABLE usuarios ADD COLUMN pin_hash TEXT')
+
+
+def _v10_bloqueio_pin(conn: sqlite3.Connection):
+    """Erros seguidos de PIN e fim do bloqueio, para sobreviverem a reinícios."""
+    conn.execute('ALTER TABLE usuarios ADD COLUMN pin_falhas INTEGER NOT NULL DEFAULT 0')
+    conn.execute('ALTER TABLE usuarios ADD COLUMN pin_bloqueado_ate REAL')
+
+
+# Migrações em ordem; a posição na lista (a partir de 1) é a versão do esquema.
+# Nunca altere uma migração já publicada: acrescente uma nova ao final.
+MIGRACOES = [
+    _v1_esquema_inicial,
+    _v2_indices,
+    _v3_datas_iso,
+    _v4_resumos_vendas,
+    _v5_centavos,
+    _v6_registro_alteracoes,
+    _v7_estoque_minimo,
+    _v8_configuracoes,
+    _v9_pin_usuarios,
+    _v10_bloqueio_pin,
+]
+
+VERSAO_ATUAL = len(MIGRACOES)
+
+
+def recriar_indices(conn: sqlite3.Connection):
+    """Recria os índices e os gatilhos de alterações que estiverem faltando.
+
+    Idempotente; usado depois de cargas em massa que os removem (init_db.migrate_data).
+    """
+    _v2_indices(conn)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_comandas_hora_abertura ON comandas (hora_abertura)')
+    _v6_registro_alteracoes(conn)
+
+
+def versao_esquema(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migracoes(conn: sqlite3.Connection) -> int:
+    """Aplica, no próprio banco, as migrações ainda não executadas.
+
+    Cada migração roda em sua própria transação junto com a atualização de
+    PRAGMA user_version, de modo que uma falha não deixa o esquema pela metade.
+    Retorna a versão final do esquema.
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    while versao_esquema(conn) < VERSAO_ATUAL:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Relê a versão dentro da transação: outro processo pode ter migrado antes
+            versao = versao_esquema(conn)
+            if versao >= VERSAO_ATUAL:
+                conn.rollback()
+                break
+            MIGRACOES[versao](conn)
+            conn.execute(f'PRAGMA user_version = {versao + 1}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    return versao_esquema(conn)
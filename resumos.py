@@ -0,0 +1,130 @@
+"""Tabelas de resumo de vendas (por hora, dia e mês).
+
+As tabelas resumo_vendas e resumo_vendas_produto são atualizadas na mesma
+transação que fecha uma comanda ou registra uma venda rápida, de modo que
+os relatórios de período leem poucas linhas já agregadas em vez de somar
+todos os itens vendidos. A receita é guardada em centavos (inteiros).
+
+Para recalcular tudo a partir do histórico: python resumos.py [--db caminho]
+"""
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+from migrations import aplicar_migracoes
+
+# Granularidade -> tamanho do prefixo da data ISO ("aaaa-mm-dd hh:mm:ss")
+GRANULARIDADES = {
+    'hora': 13,  # "aaaa-mm-dd hh"
+    'dia': 10,   # "aaaa-mm-dd"
+    'mes': 7,    # "aaaa-mm"
+}
+
+
+def periodo(granularidade: str, data_hora: str) -> str:
+    """Retorna a chave do período de uma data ISO na granularidade informada."""
+    return data_hora[:GRANULARIDADES[granularidade]]
+
+
+def registrar_venda(cursor: sqlite3.Cursor, hora_fechamento: str, itens: Iterable):
+    """Soma uma comanda fechada (ou venda rápida) aos resumos.
+
+    Deve ser chamada dentro da transação que grava o fechamento.
+    """
+    por_produto: Dict[int, list] = {}
+    for item in itens:
+        linha = por_produto.setdefault(item.produto_id, [item.nome_produto, 0, 0])
+        linha[1] += item.quantidade
+        linha[2] += item.subtotal_centavos
+    _somar(cursor, hora_fechamento, por_produto)
+
+
+def registrar_comanda(cursor: sqlite3.Cursor, comanda_id: int, hora_fechamento: str) -> int:
+    """Soma uma comanda fechada aos resumos a partir dos itens gravados no banco.
+
+    Deve ser chamada dentro da transação que grava o fechamento; o resultado
+    é o mesmo de reconstruir(), mesmo que a cópia em memória da comanda esteja
+    desatualizada. Retorna o total da comanda em centavos.
+    """
+    cursor.execute('''
+        SELECT produto_id, MAX(nome_produto), SUM(quantidade), SUM(subtotal_centavos)
+        FROM itens_comanda
+        WHERE comanda_id = ?
+        GROUP BY produto_id
+    ''', (comanda_id,))
+    por_produto = {produto_id: [nome, quantidade, total] for produto_id, nome, quantidade, total in cursor.fetchall()}
+    return _somar(cursor, hora_fechamento, por_produto)
+
+
+def _somar(cursor: sqlite3.Cursor, hora_fechamento: str, por_produto: Dict[int, list]) -> int:
+    """Soma uma venda aos resumos; `por_produto`: produto_id -> [nome, unidades, centavos]."""
+    receita = sum(linha[2] for linha in por_produto.values())
+    unidades = sum(linha[1] for linha in por_produto.values())
+
+    for granularidade in GRANULARIDADES:
+        chave = periodo(granularidade, hora_fechamento)
+        cursor.execute('''
+            INSERT INTO resumo_vendas (granularidade, periodo, receita_centavos, comandas, unidades)
+            VALUES (?, ?, ?, 1, ?)
+            ON CONFLICT (granularidade, periodo) DO UPDATE SET
+                receita_centavos = receita_centavos + excluded.receita_centavos,
+                comandas = comandas + 1,
+                unidades = unidades + excluded.unidades
+        ''', (granularidade, chave, receita, unidades))
+        cursor.executemany('''
+            INSERT INTO resumo_vendas_produto (granularidade, periodo, produto_id, nome_produto, receita_centavos, comandas, unidades)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (granularidade, periodo, produto_id) DO UPDATE SET
+                nome_produto = excluded.nome_produto,
+                receita_centavos = receita_centavos + excluded.receita_centavos,
+                comandas = comandas + 1,
+                unidades = unidades + excluded.unidades
+        ''', [(granularidade, chave, produto_id, nome, total, quantidade)
+              for produto_id, (nome, quantidade, total) in por_produto.items()])
+    return receita
+
+
+def reconstruir(conn: sqlite3.Connection):
+    """Recalcula os resumos a partir de todas as comandas fechadas."""
+    with conn:
+        conn.execute('DELETE FROM resumo_vendas')
+        conn.execute('DELETE FROM resumo_vendas_produto')
+        for granularidade, tamanho in GRANULARIDADES.items():
+            conn.execute('''
+                INSERT INTO resumo_vendas (granularidade, periodo, receita_centavos, comandas, unidades)
+                SELECT ?, substr(c.hora_fechamento, 1, ?), COALESCE(SUM(i.subtotal_centavos), 0),
+                       COUNT(DISTINCT c.id), COALESCE(SUM(i.quantidade), 0)
+                FROM comandas c
+                LEFT JOIN itens_comanda i ON i.comanda_id = c.id
+                WHERE c.status = 'fechada' AND c.hora_fechamento IS NOT NULL
+                GROUP BY substr(c.hora_fechamento, 1, ?)
+            ''', (granularidade, tamanho, tamanho))
+            conn.execute('''
+                INSERT INTO resumo_vendas_produto (granularidade, periodo, produto_id, nome_produto, receita_centavos, comandas, unidades)
+                SELECT ?, substr(c.hora_fechamento, 1, ?), i.produto_id, MAX(i.nome_produto),
+                       SUM(i.subtotal_centavos), COUNT(DISTINCT c.id), SUM(i.quantidade)
+                FROM comandas c
+                JOIN itens_comanda i ON i.comanda_id = c.id
+                WHERE c.status = 'fechada' AND c.hora_fechamento IS NOT NULL
+                GROUP BY substr(c.hora_fechamento, 1, ?), i.produto_id
+            ''', (granularidade, tamanho, tamanho))
+
+
+def main(argv: Optional[list] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconstrói as tabelas de resumo de vendas.")
+    parser.add_argument('--db', default='bar_system.db', help="caminho do banco (padrão: bar_system.db)")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        aplicar_migracoes(conn)
+        reconstruir(conn)
+        total = conn.execute('SELECT COUNT(*) FROM resumo_vendas').fetchone()[0]
+    finally:
+        conn.close()
+    print(f"Resumos reconstruídos: {total} períodos.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""Serviço local que expõe o SistemaBar como uma API JSON sobre HTTP.
+
+Um único processo é dono do SistemaBar e de todas as gravações no banco;
+terminais extras, coletores e a interface gráfica viram clientes leves.
+O laço asyncio atende muitas conexões ao mesmo tempo, e as chamadas ao
+SistemaBar são executadas, uma de cada vez, em uma única thread de
+trabalho. Assim não há disputa entre processos pela escrita no SQLite e o
+laço nunca fica bloqueado esperando o disco.
+
+Uso:
+    python servidor.py [--db bar_system.db] [--porta 8765] [--escrita-adiada]
+    python servidor.py --unix /tmp/bar.sock
+
+Exemplos (valores em centavos):
+    curl localhost:8765/produtos
+    curl 'localhost:8765/produtos?categoria=cervejas'
+    curl localhost:8765/categorias
+    curl 'localhost:8765/estoque/baixo?margem=5'
+    curl -X POST localhost:8765/comandas/abrir -d '{"mesa": 3, "nome_cliente": "Ana"}'
+    curl -X POST localhost:8765/comandas/itens -d '{"comanda_id": 1, "produto_id": 2, "quantidade": 2}'
+    curl -X POST localhost:8765/comandas/itens -d '{"comanda_id": 1, "itens": [{"produto_id": 2, "quantidade": 1}, {"produto_id": 5, "quantidade": 3}]}'
+    curl -X POST localhost:8765/comandas/fechar -d '{"comanda_id": 1}'
+    curl -X POST localhost:8765/venda_rapida -d '{"itens": [{"produto_id": 2, "quantidade": 1}]}'
+    curl 'localhost:8765/relatorios/resumo?granularidade=dia&inicio=2024-05-01&fim=2024-05-31'
+"""
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import resumos
+from barsystem import ItemComanda, SistemaBar, VendaRapida
+from database import fechar_conexoes
+
+PORTA_PADRAO = 8765
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+# (método, caminho) -> nome do método de ServicoBar que atende a rota
+ROTAS = {
+    ('GET', '/produtos'): 'produtos',
+    ('GET', '/categorias'): 'categorias',
+    ('GET', '/estoque/baixo'): 'estoque_baixo',
+    ('GET', '/mesas'): 'mesas',
+    ('GET', '/comandas'): 'comandas_abertas',
+    ('GET', '/comanda'): 'comanda',
+    ('POST', '/comandas/abrir'): 'abrir_comanda',
+    ('POST', '/comandas/itens'): 'adicionar_item',
+    ('POST', '/comandas/remover_item'): 'remover_item',
+    ('POST', '/comandas/fechar'): 'fechar_comanda',
+    ('POST', '/venda_rapida'): 'venda_rapida',
+    ('GET', '/relatorios/resumo'): 'resumo',
+    ('GET', '/relatorios/mais_vendidos'): 'mais_vendidos',
+    ('GET', '/relatorios/comandas_dia'): 'comandas_dia',
+}
+
+MENSAGENS_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 409: 'Conflict', 500: 'Internal Server Error'}
+
+
+class ErroApi(Exception):
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _comanda_json(comanda) -> Dict:
+    dados = comanda.to_dict()
+    dados["total_centavos"] = comanda.calcular_total_centavos()
+    return dados
+
+
+class ServicoBar:
+    """Operações da API. Todos os métodos rodam na thread de trabalho."""
+
+    def __init__(self, sistema: SistemaBar):
+        self.sistema = sistema
+
+    def produtos(self, p):
+        return {"produtos": [produto.to_dict() for produto in self.sistema.consultar_produtos(p.get('categoria'))]}
+
+    def categorias(self, p):
+        return {"categorias": [{"categoria": nome, "produtos": quantidade, "estoque": estoque}
+                               for nome, quantidade, estoque in self.sistema.listar_categorias()]}
+
+    def estoque_baixo(self, p):
+        produtos = self.sistema.produtos_estoque_baixo(int(p.get('margem', 0)))
+        return {"produtos": [produto.to_dict() for produto in produtos]}
+
+    def mesas(self, p):
+        return {"livres": self.sistema.listar_mesas_livres(), "ocupadas": self.sistema.listar_mesas_ocupadas()}
+
+    def comandas_abertas(self, p):
+        return {"comandas": [_comanda_json(comanda) for comanda in self.sistema.listar_comandas_abertas()]}
+
+    def comanda(self, p):
+        comanda = self.sistema.obter_comanda(int(p['id']))
+        if comanda is None:
+            raise ErroApi(404, "Comanda não encontrada.")
+        return _comanda_json(comanda)
+
+    def abrir_comanda(self, p):
+        comanda = self.sistema.abrir_comanda(int(p['mesa']), p.get('nome_cliente'))
+        if comanda is None:
+            raise ErroApi(409, "Mesa inexistente ou ocupada.")
+        return _comanda_json(comanda)
+
+    def adicionar_item(self, p):
+        """Um item (produto_id, quantidade) ou vários em "itens", lançados juntos."""
+        comanda_id = int(p['comanda_id'])
+        if 'itens' in p:
+            itens = [(int(item['produto_id']), int(item['quantidade'])) for item in p['itens']]
+        else:
+            itens = [(int(p['produto_id']), int(p['quantidade']))]
+        if not self.sistema.adicionar_itens_comanda(comanda_id, itens):
+            for produto_id in {produto_id for produto_id, _ in itens}:
+                produto = self.sistema.produtos.get(produto_id)
+                pedido = sum(quantidade for item_id, quantidade in itens if item_id == produto_id)
+                if produto is not None and produto.estoque < pedido:
+                    raise ErroApi(409, f"Estoque insuficiente de {produto.nome} (disponível: {produto.estoque}).")
+            raise ErroApi(409, "Comanda ou produto inválido.")
+        return _comanda_json(self.sistema.comandas[comanda_id])
+
+    def remover_item(self, p):
+        comanda_id = int(p['comanda_id'])
+        if not self.sistema.remover_item_comanda(comanda_id, int(p['produto_id']), int(p['quantidade'])):
+            raise ErroApi(409, "Comanda ou item inválido.")
+        return _comanda_json(self.sistema.comandas[comanda_id])
+
+    def fechar_comanda(self, p):
+        comanda = self.sistema.comandas.get(int(p['comanda_id']))
+        if comanda is None or self.sistema.fechar_comanda(comanda.id) is None:
+            raise ErroApi(409, "Comanda inexistente ou já fechada.")
+        return _comanda_json(comanda)
+
+    def venda_rapida(self, p):
+        venda = VendaRapida()
+        for item in p['itens']:
+            produto = self.sistema.produtos.get(int(item['produto_id']))
+            if produto is None:
+                raise ErroApi(400, f"Produto {item['produto_id']} não encontrado.")
+            quantidade = int(item['quantidade'])
+            if quantidade <= 0:
+                raise ErroApi(400, "Quantidade deve ser maior que zero.")
+            venda.adicionar_item(ItemComanda(produto.id, quantidade, produto.nome, produto.preco_centavos))
+        if not venda.itens:
+            raise ErroApi(400, "Venda sem itens.")
+        if not self.sistema.registrar_venda_rapida(venda):
+            raise ErroApi(409, "Estoque insuficiente para a venda.")
+        return {"hora_venda": venda.hora_venda, "total_centavos": venda.calcular_total_centavos()}
+
+    def resumo(self, p):
+        granularidade = p.get('granularidade', 'dia')
+        if granularidade not in resumos.GRANULARIDADES:
+            raise ErroApi(400, f"Granularidade inválida: {granularidade}")
+        return self.sistema.resumo_vendas(granularidade, p['inicio'], p['fim'])
+
+    def mais_vendidos(self, p):
+        granularidade = p.get('granularidade', 'dia')
+        if granularidade not in resumos.GRANULARIDADES:
+            raise ErroApi(400, f"Granularidade inválida: {granularidade}")
+        limite = int(p['limite']) if 'limite' in p else None
+        return {"produtos": self.sistema.produtos_mais_vendidos(granularidade, p['inicio'], p['fim'], limite)}
+
+    def comandas_dia(self, p):
+        from datetime import datetime
+
+        dia = datetime.strptime(p['dia'], "%Y-%m-%d") if 'dia' in p else None
+        campo = p.get('campo', 'hora_abertura')
+        comandas = self.sistema.buscar_comandas_dia(dia, campo, p.get('status'))
+        return {"comandas": [_comanda_json(comanda) for comanda in comandas]}
+
+    def executar(self, nome: str, parametros: Dict) -> Tuple[int, Dict]:
+        """Executa uma operação e devolve (status HTTP, resposta)."""
+        try:
+            # Mantém a memória em dia com terminais que ainda gravam direto no banco
+            self.sistema.atualizar()
+            return 200, getattr(self, nome)(parametros)
+        except ErroApi as e:
+            return e.status, {"erro": e.mensagem}
+        except KeyError as e:
+            return 400, {"erro": f"Parâmetro obrigatório ausente: {e.args[0]}"}
+        except (ValueError, TypeError) as e:
+            return 400, {"erro": f"Parâmetro inválido: {e}"}
+
+
+class ServidorBar:
+    def __init__(self, db_path: str = 'bar_system.db', escrita_adiada: bool = False):
+        self.db_path = db_path
+        self.escrita_adiada = escrita_adiada
+        # Uma única thread é dona do SistemaBar e da conexão com o banco
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sistema-bar')
+        self.servico: Optional[ServicoBar] = None
+
+    async def _na_thread(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+    async def iniciar(self):
+        sistema = await self._na_thread(SistemaBar, self.db_path, False, self.escrita_adiada)
+        self.servico = ServicoBar(sistema)
+
+    async def encerrar(self):
+        """Grava a fila pendente e fecha as conexões, na thread que as abriu."""
+        def fechar():
+            if self.servico.sistema.fila is not None:
+                self.servico.sistema.fila.fechar()
+            fechar_conexoes()
+
+        await self._na_thread(fechar)
+        self._executor.shutdown()
+
+    async def despachar(self, metodo: str, alvo: str, corpo: bytes) -> Tuple[int, Dict]:
+        url = urlsplit(alvo)
+        nome = ROTAS.get((metodo, url.path.rstrip('/') or '/'))
+        if nome is None:
+            return 404, {"erro": f"Rota não encontrada: {metodo} {url.path}"}
+
+        parametros = dict(parse_qsl(url.query))
+        if corpo:
+            try:
+                dados = json.loads(corpo)
+            except ValueError:
+                return 400, {"erro": "Corpo da requisição não é um JSON válido."}
+            if not isinstance(dados, dict):
+                return 400, {"erro": "O corpo da requisição deve ser um objeto JSON."}
+            parametros.update(dados)
+
+        return await self._na_thread(self.servico.executar, nome, parametros)
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma conexão HTTP/1.1 (com keep-alive) até o cliente desconectar."""
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                metodo, alvo, _ = linha.decode('latin-1').split(' ', 2)
+
+                cabecalhos = {}
+                while True:
+                    cabecalho = await reader.readline()
+                    if cabecalho in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                tamanho = int(cabecalhos.get('content-length', 0))
+                if tamanho > TAMANHO_MAXIMO_CORPO:
+                    status, resposta = 400, {"erro": "Corpo da requisição grande demais."}
+                    cabecalhos['connection'] = 'close'
+                else:
+                    corpo = await reader.readexactly(tamanho) if tamanho else b''
+                    try:
+                        status, resposta = await self.despachar(metodo.upper(), alvo, corpo)
+                    except Exception as e:
+                        status, resposta = 500, {"erro": f"Erro interno: {e}"}
+
+                fechar = cabecalhos.get('connection', '').lower() == 'close'
+                dados = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {MENSAGENS_STATUS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(dados)}\r\n"
+                    f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n".encode('latin-1') + dados
+                )
+                await writer.drain()
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def servir(db_path: str, host: str = '127.0.0.1', porta: int = PORTA_PADRAO,
+                 caminho_unix: Optional[str] = None, escrita_adiada: bool = False):
+    servidor_bar = ServidorBar(db_path, escrita_adiada)
+    await servidor_bar.iniciar()
+
+    if caminho_unix:
+        if os.path.exists(caminho_unix):
+            os.remove(caminho_unix)
+        servidor = await asyncio.start_unix_server(servidor_bar.atender, path=caminho_unix)
+        print(f"Servindo em {caminho_unix}", flush=True)
+    else:
+        servidor = await asyncio.start_server(servidor_bar.atender, host, porta)
+        print(f"Servindo em http://{host}:{porta}", flush=True)
+
+    # SIGINT/SIGTERM encerram o serviço gravando o que estiver pendente
+    parar = asyncio.Event()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sinal, parar.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    try:
+        async with servidor:
+            await parar.wait()
+    finally:
+        await servidor_bar.encerrar()
+
+
+def main(argv: Optional[list] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serviço local com a API JSON do sistema de bar.")
+    parser.add_argument('--db', default='bar_system.db', help="caminho do banco (padrão: bar_system.db)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--unix', help="atende em um socket Unix em vez de TCP")
+    parser.add_argument('--escrita-adiada', action='store_true', help="grava os itens lançados em grupo (veja escrita.py)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(servir(args.db, args.host, args.porta, args.unix, args.escrita_adiada))
+    except KeyboardInterrupt:
+        print("Serviço encerrado.")
+
+
+if __name__ == '__main__':
+    main()